@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+SQLite cache for Google Books (and Open Library) API responses
+
+Responses are stored as raw JSON under the normalized query string together
+with their fetch time and ETag. Entries expire after a TTL; "no items"
+answers get a shorter one so books that Google adds later are picked up
+again. Expired entries are kept until pruned, so their ETag can turn the
+refresh into a conditional request that the API answers with 304.
+
+Usage:
+  python3 api_cache.py stats
+  python3 api_cache.py list [--negative] [--expired] [--limit 20]
+  python3 api_cache.py show "Das Parfum Süskind, Patrick"
+  python3 api_cache.py prune [--negative]
+  python3 api_cache.py warm [books_database.json] [--rps 2] [--concurrency 4]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from pools import map_bounded
+from rate_limit import TokenBucket
+
+DEFAULT_CACHE_FILE = 'api_cache.sqlite'
+
+# Time to live of found volumes and of "no items" answers, in seconds
+TTL = 90 * 24 * 3600
+NEGATIVE_TTL = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    query_key  TEXT PRIMARY KEY,
+    query      TEXT NOT NULL,
+    body       TEXT NOT NULL,
+    has_items  INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    etag       TEXT
+)
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: NFC, case-folded, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFC', query).casefold().split())
+
+
+def has_items(data: Dict) -> bool:
+    """
+    True if a response found something: a Google Books volume or volume
+    resource, an Open Library search doc or an Open Library resource such
+    as a work
+    """
+    return bool(data.get('items') or data.get('id') or data.get('docs') or data.get('key'))
+
+
+class ResponseCache:
+    """Thread-safe SQLite store of raw API responses"""
+
+    def __init__(self, path: Path, ttl: float = TTL, negative_ttl: float = NEGATIVE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(SCHEMA)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(responses)')]
+        if 'etag' not in columns:
+            # Caches written before ETags were stored
+            self.conn.execute('ALTER TABLE responses ADD COLUMN etag TEXT')
+        self.conn.commit()
+
+    def _expired(self, found: bool, fetched_at: float, now: float) -> bool:
+        """True if an entry is older than its TTL"""
+        ttl = self.ttl if found else self.negative_ttl
+        return now - fetched_at > ttl
+
+    def get(self, query: str) -> Optional[Dict]:
+        """Cached response for query, or None if missing or expired"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, has_items, fetched_at FROM responses WHERE query_key = ?',
+                (normalize_query(query),)).fetchone()
+            if row is None or self._expired(row[1], row[2], time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def fresh(self, query: str) -> bool:
+        """True if query has an unexpired entry; not counted as a hit or miss"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT has_items, fetched_at FROM responses WHERE query_key = ?',
+                (normalize_query(query),)).fetchone()
+        return row is not None and not self._expired(row[0], row[1], time.time())
+
+    def get_stale(self, query: str) -> Optional[Tuple[Dict, str]]:
+        """(response, ETag) of an entry whatever its age, or None if it has no ETag"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, etag FROM responses WHERE query_key = ? AND etag IS NOT NULL',
+                (normalize_query(query),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, query: str, body: str, etag: Optional[str] = None) -> None:
+        """Store the raw JSON text of a response and its ETag"""
+        data = json.loads(body)
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (normalize_query(query), query, body, int(has_items(data)), time.time(), etag))
+            self.conn.commit()
+
+    def touch(self, query: str) -> None:
+        """Restart the TTL of an entry the API confirmed unchanged (304)"""
+        with self.lock:
+            self.conn.execute('UPDATE responses SET fetched_at = ? WHERE query_key = ?',
+                              (time.time(), normalize_query(query)))
+            self.conn.commit()
+
+    def entries(self) -> Iterator[Tuple[str, bool, float, bool]]:
+        """Yield (query, has_items, fetched_at, expired), newest first"""
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT query, has_items, fetched_at FROM responses ORDER BY fetched_at DESC').fetchall()
+        for query, items, fetched_at in rows:
+            yield query, bool(items), fetched_at, self._expired(items, fetched_at, now)
+
+    def prune(self, negative: bool = False) -> int:
+        """Delete expired entries (and all negative ones if asked); returns the count"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM responses WHERE '
+                '(has_items = 1 AND fetched_at < ?) OR (has_items = 0 AND (fetched_at < ? OR ?))',
+                (now - self.ttl, now - self.negative_ttl, int(negative)))
+            self.conn.commit()
+            count = cursor.rowcount
+            self.conn.execute('VACUUM')
+        return count
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """The process-wide cache, opened on first use (path from $GOOGLE_BOOKS_CACHE)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(Path(os.environ.get('GOOGLE_BOOKS_CACHE', DEFAULT_CACHE_FILE)))
+        return _cache
+
+
+def open_cache(path: Path) -> ResponseCache:
+    """Replace the process-wide cache with one stored at path"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = ResponseCache(path)
+        return _cache
+
+
+def print_cache_summary() -> None:
+    """One line with the hits and misses of this run, if the cache was used"""
+    if _cache is not None and _cache.hits + _cache.misses:
+        print(f"  API cache: {_cache.hits} hits, {_cache.misses} misses "
+              f"({_cache.path})")
+
+
+def _age(seconds: float) -> str:
+    """Short human-readable age"""
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.0f}h"
+    return f"{seconds / 86400:.0f}d"
+
+
+def cmd_stats(cache: ResponseCache, args) -> None:
+    entries = list(cache.entries())
+    positive = sum(1 for e in entries if e[1])
+    expired = sum(1 for e in entries if e[3])
+    print(f"📁 {cache.path} ({cache.path.stat().st_size / 1024:.0f} KB)")
+    print(f"  Entries:   {len(entries)}")
+    print(f"  Found:     {positive}")
+    print(f"  No items:  {len(entries) - positive}")
+    print(f"  Expired:   {expired}")
+    if entries:
+        now = time.time()
+        print(f"  Newest:    {_age(now - entries[0][2])} ago")
+        print(f"  Oldest:    {_age(now - entries[-1][2])} ago")
+
+
+def cmd_list(cache: ResponseCache, args) -> None:
+    now = time.time()
+    shown = 0
+    for query, items, fetched_at, expired in cache.entries():
+        if (args.negative and items) or (args.expired and not expired):
+            continue
+        status = '✓' if items else '∅'
+        print(f"  {status} {_age(now - fetched_at):>4} {'expired ' if expired else ''}{query}")
+        shown += 1
+        if shown >= args.limit:
+            break
+
+
+def cmd_show(cache: ResponseCache, args) -> None:
+    data = cache.get(args.query)
+    if data is None:
+        print("Not cached (or expired)")
+        return
+    print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def cmd_prune(cache: ResponseCache, args) -> None:
+    count = cache.prune(negative=args.negative)
+    print(f"✓ Removed {count} entries")
+
+
+def cmd_warm(cache: ResponseCache, args) -> None:
+    import google_books  # imports this module, so only loaded when needed
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        books = json.load(f)
+
+    queries: List[str] = []
+    seen = set()
+    for book in books:
+        query = google_books.build_query(book['title'], book['author'])
+        key = normalize_query(query)
+        if key not in seen:
+            seen.add(key)
+            queries.append(query)
+
+    missing = [query for query in queries if google_books.cached_volumes(query) is None]
+    print(f"📚 {len(queries)} queries, {len(missing)} not cached")
+    if not missing:
+        return
+
+    limiter = TokenBucket(args.rps)
+
+    def warm(query: str) -> bool:
+        try:
+            google_books.search_volumes(query, limiter)
+            return True
+        except requests.RequestException as e:
+            print(f"  ⚠ {query}: {e}")
+            return False
+
+    fetched = 0
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    try:
+        for _, future in map_bounded(executor, warm, missing, args.concurrency):
+            fetched += future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    print(f"✓ Fetched {fetched} of {len(missing)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and maintain the Google Books response cache')
+    parser.add_argument('--cache', default=os.environ.get('GOOGLE_BOOKS_CACHE', DEFAULT_CACHE_FILE),
+                        help=f'cache file (default: $GOOGLE_BOOKS_CACHE or {DEFAULT_CACHE_FILE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('stats', help='count entries')
+
+    list_parser = commands.add_parser('list', help='list cached queries, newest first')
+    list_parser.add_argument('--negative', action='store_true', help='only "no items" answers')
+    list_parser.add_argument('--expired', action='store_true', help='only expired entries')
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    show_parser = commands.add_parser('show', help='print the cached response of a query')
+    show_parser.add_argument('query')
+
+    prune_parser = commands.add_parser('prune', help='delete expired entries')
+    prune_parser.add_argument('--negative', action='store_true',
+                              help='also delete all "no items" answers')
+
+    warm_parser = commands.add_parser('warm', help='fetch every uncached query of a database')
+    warm_parser.add_argument('database', nargs='?', default='books_database.json')
+    warm_parser.add_argument('--rps', type=float, default=2.0)
+    warm_parser.add_argument('--concurrency', type=int, default=4)
+
+    args = parser.parse_args()
+    os.environ['GOOGLE_BOOKS_CACHE'] = args.cache
+    handlers = {'stats': cmd_stats, 'list': cmd_list, 'show': cmd_show,
+                'prune': cmd_prune, 'warm': cmd_warm}
+    handlers[args.command](get_cache(), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared German date parser against the old linear-scan parsers
+on the date_read values of the real preparsed*.txt corpus
+
+Usage: python3 benchmarks/bench_dates.py [--repeat 200]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import german_dates  # noqa: E402
+
+
+def legacy_book_list_date(text: str) -> Optional[Dict[str, int]]:
+    """parse_books.parse_date as it was before german_dates"""
+    if not text:
+        return None
+    text_lower = text.lower().strip()
+    year_match = re.search(r'\b(20\d{2}|0[6-9]|1[0-9]|2[0-5])\b', text_lower)
+    if year_match:
+        year = int(year_match.group(1))
+        if year < 100:
+            year = 2000 + year if year < 50 else 1900 + year
+        for month_name, month_num in german_dates.BOOK_LIST_MONTHS.items():
+            if month_name in text_lower:
+                return {'year': year, 'month': month_num}
+        return {'year': year, 'month': None}
+    return None
+
+
+def legacy_preparsed_date(date_str: str) -> tuple:
+    """parse_preparsed.parse_date as it was before german_dates"""
+    if not date_str:
+        return None, None
+    date_lower = date_str.lower().strip().rstrip('.')
+    iso_match = re.match(r'(\d{4})-(\d{2})-\d{2}', date_lower)
+    if iso_match:
+        return int(iso_match.group(1)), int(iso_match.group(2))
+    year_match = re.search(r'\b(20\d{2}|\d{2})\b', date_lower)
+    year = None
+    if year_match:
+        year = int(year_match.group(1))
+        if year < 100:
+            year = 2000 + year if year < 50 else 1900 + year
+    month = None
+    for month_name, month_num in german_dates.PREPARSED_MONTHS.items():
+        if month_name in date_lower:
+            month = month_num
+            break
+    return year, month
+
+
+def new_book_list_date(text: str) -> Optional[Dict[str, int]]:
+    """Same contract as parse_books.parse_date"""
+    if not text:
+        return None
+    date = german_dates.parse_book_list_date(text)
+    return {'year': date[0], 'month': date[1]} if date else None
+
+
+def new_preparsed_date(date_str: str) -> tuple:
+    """Same contract as parse_preparsed.parse_date"""
+    if not date_str:
+        return None, None
+    return german_dates.parse_preparsed_date(date_str)
+
+
+def load_dates() -> List[str]:
+    """Collect every date_read value from the preparsed files"""
+    dates = []
+    for i in range(1, 5):
+        filepath = ROOT / f'preparsed{i}.txt'
+        if filepath.exists():
+            with open(filepath, 'r', encoding='utf-8') as f:
+                dates.extend(book.get('date_read') or '' for book in json.load(f))
+    return dates
+
+
+def time_calls(func, inputs: List[str]) -> float:
+    """Return seconds spent calling func on every input"""
+    start = time.perf_counter()
+    for value in inputs:
+        func(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the German date parsers')
+    parser.add_argument('--repeat', type=int, default=200, help='passes over the date strings')
+    args = parser.parse_args()
+
+    repeat = args.repeat
+    dates = load_dates()
+    inputs = dates * repeat
+
+    print(f"📅 {len(dates)} date strings ({len(set(dates))} distinct), repeated {repeat}x")
+
+    for name, cache_name, legacy, new, cached in [
+            ('parse_books', 'book_list', legacy_book_list_date, new_book_list_date,
+             german_dates.parse_book_list_date),
+            ('parse_preparsed', 'preparsed', legacy_preparsed_date, new_preparsed_date,
+             german_dates.parse_preparsed_date)]:
+        mismatches = sum(1 for d in dates if legacy(d) != new(d))
+
+        legacy_time = time_calls(legacy, inputs)
+        # Call the undecorated function to time the matcher without the cache
+        uncached_time = time_calls(lambda d: cached.__wrapped__(d) if d else None, inputs)
+        german_dates.clear_caches()
+        new_time = time_calls(new, inputs)
+        stats = german_dates.cache_stats()[cache_name]
+
+        print(f"\n{name}:")
+        print(f"  legacy linear scan: {legacy_time * 1e9 / len(inputs):8.0f} ns/call")
+        print(f"  regex, no cache:    {uncached_time * 1e9 / len(inputs):8.0f} ns/call")
+        print(f"  regex + LRU cache:  {new_time * 1e9 / len(inputs):8.0f} ns/call")
+        print(f"  speed-up:           {legacy_time / new_time:8.1f}x")
+        print(f"  cache:              {stats['hits']} hits, {stats['misses']} misses")
+        print(f"  mismatches:         {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
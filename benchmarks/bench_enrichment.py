@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Enrichment throughput and latency against the local mock Google Books API
+
+Runs parse_preparsed.process_books with fetch_missing on a synthetic corpus
+at several concurrency levels, each with an empty response cache, and
+reports books per second, p50/p99 request and per-book latency and the
+share of books that got a cover and a description. 429/503 answers are
+left to the adaptive rate limiter, which queues those books again. With
+--open-library, Google Books lookups are hedged by the mock Open Library.
+Results are saved as JSON like bench_parsing.py.
+
+Usage: python3 benchmarks/bench_enrichment.py --books 300 --concurrency 1,4,16 \\
+           --latency lognormal:80:0.5 --error-rate 0.01
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import api_cache  # noqa: E402
+import enrich_profile  # noqa: E402
+import google_books  # noqa: E402
+import http_client  # noqa: E402
+import open_library  # noqa: E402
+import parse_preparsed  # noqa: E402
+import providers  # noqa: E402
+from benchmarks.bench_parsing import RESULTS_DIR, git_commit  # noqa: E402
+from benchmarks.corpus import generate_preparsed  # noqa: E402
+from benchmarks.mock_books_api import MockConfig, MockServer  # noqa: E402
+from enrich_profile import percentile  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+
+
+def run_level(server: MockServer, books: List[Dict], concurrency: int, rps: float,
+              max_rps: float, cache_dir: Path, hedge: bool = False) -> Dict:
+    """Enrich books once at one concurrency level"""
+    api_cache.open_cache(cache_dir / f"cache-{concurrency}{'-hedged' if hedge else ''}.sqlite")
+    http_client.configure(connections_per_host=concurrency)
+    latencies = []
+    http_client.get_session(retry_throttled=False).hooks['response'].append(
+        lambda response, *args, **kwargs: latencies.append(response.elapsed.total_seconds()))
+    server.counts.clear()
+    secondary = providers.OpenLibraryProvider(TokenBucket(rps)) if hedge else None
+
+    profile = enrich_profile.enable()
+    start = time.perf_counter()
+    processed = parse_preparsed.process_books(books, True, rps, concurrency, max_rps=max_rps,
+                                              secondary=secondary)
+    elapsed = time.perf_counter() - start
+    enrich_profile.disable()
+    book_seconds = profile.book_totals().get('book', [])
+
+    return {
+        'concurrency': concurrency,
+        'open_library': hedge,
+        'books': len(books),
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'books_per_second': len(books) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'book_p50_ms': percentile(book_seconds, 50) * 1000,
+        'book_p99_ms': percentile(book_seconds, 99) * 1000,
+        'covers': sum(1 for book in processed if book.get('cover_url')) / len(books),
+        'descriptions': sum(1 for book in processed if book.get('description')) / len(books),
+        'statuses': {str(status): count for status, count in sorted(server.counts.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark enrichment against a local mock API')
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--concurrency', default='1,2,4,8,16',
+                        help='comma-separated concurrency levels (default: 1,2,4,8,16)')
+    parser.add_argument('--rps', type=float, default=1000.0,
+                        help='initial rate limit; high by default so concurrency is the bound')
+    parser.add_argument('--max-rps', type=float, help='rate the limiter may ramp up to (default: --rps)')
+    parser.add_argument('--latency', default='lognormal:80:0.5', help='mock latency spec')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--burst-every', type=float, default=0.0)
+    parser.add_argument('--burst-length', type=float, default=0.0)
+    parser.add_argument('--sparse-rate', type=float, default=0.0,
+                        help='share of mock volumes without description and cover')
+    parser.add_argument('--open-library', action='store_true',
+                        help='run every level without and with the Open Library hedge')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/enrichment-<commit>.json)')
+    args = parser.parse_args()
+
+    books = generate_preparsed(args.books, args.seed)
+    for book in books:
+        book['description'] = None  # every book needs a lookup
+
+    config = MockConfig(args.latency, args.error_rate, args.burst_every, args.burst_length,
+                        seed=args.seed, sparse_rate=args.sparse_rate)
+    server = MockServer(config).start()
+    google_books.set_base_url(server.base_url)
+    open_library.set_base_url(server.root_url)
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for level in [int(c) for c in args.concurrency.split(',')]:
+                for hedge in ([False, True] if args.open_library else [False]):
+                    results.append(run_level(server, books, level, args.rps,
+                                             args.max_rps or args.rps, Path(tmp), hedge))
+            api_cache.open_cache(Path(tmp) / 'closing.sqlite').close()
+    finally:
+        server.stop()
+
+    print(f"\n📊 {args.books} books, latency {args.latency}, error rate {args.error_rate}")
+    print(f"  {'concurrency':>11} {'hedge':>5} {'books/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'book p99':>9} {'covers':>7} {'descr.':>7} {'requests':>9}  statuses")
+    for r in results:
+        print(f"  {r['concurrency']:>11} {'OL' if r['open_library'] else '-':>5} "
+              f"{r['books_per_second']:9.1f} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} "
+              f"{r['book_p99_ms']:9.1f} {r['covers']:7.1%} {r['descriptions']:7.1%} "
+              f"{r['requests']:>9}  {r['statuses']}")
+
+    commit = git_commit()
+    output_file = Path(args.output) if args.output else RESULTS_DIR / f'enrichment-{commit}.json'
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'mock': {'latency': args.latency, 'error_rate': args.error_rate,
+                     'sparse_rate': args.sparse_rate,
+                     'burst_every': args.burst_every, 'burst_length': args.burst_length},
+            'results': results,
+        }, f, indent=2)
+
+    print(f"\n✓ Saved results to {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Differential check and throughput benchmark for the zero-regex fast path
+
+Every line of the real books*.txt lists and of a synthetic corpus is parsed
+both by parse_book_line (fast path with regex fallback) and by
+parse_book_line_regex. Any difference is printed and the script exits with
+status 1, so it can guard changes to either path.
+
+Usage: python3 benchmarks/bench_fast_path.py [--scale 100k] [--seed 42]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import german_dates  # noqa: E402
+import parse_books  # noqa: E402
+from benchmarks.corpus import SCALES, generate_book_lines  # noqa: E402
+
+
+def real_lines() -> List[str]:
+    """All lines of the real book lists, line numbers already removed"""
+    lines = []
+    for filename in parse_books.BOOK_FILES + ['bookscombined.txt']:
+        filepath = ROOT / filename
+        if filepath.exists():
+            with open(filepath, 'r', encoding='utf-8') as f:
+                lines.extend(parse_books.LINE_NUMBER_RE.sub('', line) for line in f)
+    return lines
+
+
+def differences(lines: List[str]) -> int:
+    """Count and print lines where the two parsers disagree"""
+    count = 0
+    for line in lines:
+        fast = parse_books.parse_book_line(line)
+        slow = parse_books.parse_book_line_regex(line)
+        if fast != slow:
+            count += 1
+            if count <= 10:
+                print(f"  ✗ {line!r}\n    fast:  {fast}\n    regex: {slow}")
+    return count
+
+
+def throughput(func: Callable, lines: List[str], repeat: int = 3) -> float:
+    """Best lines per second over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        german_dates.clear_caches()
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and benchmark the parser fast path')
+    parser.add_argument('--scale', choices=list(SCALES), default='100k')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    corpora = {
+        'real books*.txt': real_lines(),
+        f'synthetic {args.scale}': list(generate_book_lines(SCALES[args.scale], args.seed)),
+    }
+
+    failed = False
+    for name, lines in corpora.items():
+        fast_hits = sum(1 for line in lines
+                        if parse_books.parse_book_line_fast(line) is not parse_books.FALLBACK)
+        mismatches = differences(lines)
+        failed = failed or mismatches > 0
+
+        fast = throughput(parse_books.parse_book_line, lines)
+        slow = throughput(parse_books.parse_book_line_regex, lines)
+
+        print(f"\n📊 {name}: {len(lines)} lines")
+        print(f"  decided by fast path: {fast_hits / len(lines) * 100:5.1f}%")
+        print(f"  mismatches:           {mismatches}")
+        print(f"  regex path:           {slow:10.0f} lines/s")
+        print(f"  fast path:            {fast:10.0f} lines/s")
+        print(f"  speed-up:             {fast / slow:10.1f}x")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
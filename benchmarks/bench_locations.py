@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Accuracy and throughput of the gazetteer-backed location detection against
+the old known-list-plus-regex rules
+
+Accuracy is measured on the notes of the real preparsed*.txt corpus and on a
+synthetic corpus, whose places are benchmarks/corpus.py's LOCATIONS. Both
+checks are circular: every place they contain was put into locations.txt,
+so they only show that nothing else is taken for a place. The held-out
+notes below were labelled by hand (is this a place to a reader?) without
+consulting locations.txt, so places missing from it count as errors there,
+and SPLITS checks that the detail after a place is kept as notes.
+Throughput is the time per note, and the
+load time and lookup cost of a gazetteer grown to --names synthetic place
+names show that lookups do not slow down as the index grows.
+
+Usage: python3 benchmarks/bench_locations.py [--repeat 200] [--names 200000]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import gazetteer  # noqa: E402
+import parse_preparsed  # noqa: E402
+from benchmarks.corpus import LOCATIONS, generate_preparsed  # noqa: E402
+
+# Notes of the real corpus that name a place; every other note does not.
+# locations.txt was seeded with these places
+REAL_PLACES = {
+    'Bergisch Gladbach', 'Sydney', 'England', 'Frankreich', 'Berlin', 'Schweden',
+    'Göteborg', 'Baskenland – Spanien', 'Bonn-Arzt und Wissenschaftler', 'Belfast', 'Köln',
+}
+
+# Notes in the style of the reading lists that are not in the corpus,
+# labelled independently of locations.txt: (notes, names a place)
+HELD_OUT = [
+    ('Hamburg', True), ('München', True), ('Wien', True), ('Zürich', True),
+    ('Garmisch-Partenkirchen – Bayern', True), ('Baden-Baden, Kurort', True),
+    ('Rheinland-Pfalz', True), ('Mexiko-Stadt / Mexiko', True), ('Paris', True),
+    ('Schottland', True), ('Irland', True), ('Norwegen', True), ('Stockholm', True),
+    ('Dublin', True), ('Wuppertal', True), ('Lübeck', True), ('Bremen', True),
+    ('Oslo', True), ('Kopenhagen', True), ('Bayern', True), ('Island', True),
+    ('Bretagne', True), ('Toskana', True), ('New York', True), ('Kanada', True),
+    ('Ostfriesland', True), ('Sylt', True), ('Münster-Krimi', False),
+    ('Lieblingsbuch', False), ('Krimi', False), ('spannend!', False), ('2. Teil', False),
+    ('Band 3', False), ('Sommerurlaub', False), ('geschenkt von Anna', False),
+    ('Hörbuch', False), ('Fortsetzung folgt', False), ('Leseprobe', False),
+    ('Thriller', False), ('zu lang', False), ('Teil 2 der Trilogie', False),
+    ('Urlaubslektüre', False), ('Mama', False), ('Weihnachten', False),
+    ('Buchclub', False), ('ausgeliehen', False), ('Bestseller', False),
+    ('nicht beendet', False), ('Kurzgeschichten', False), ('Liebesroman', False),
+    ('Familiensaga', False), ('Oma empfohlen', False), ('Anna - Mamas Tipp', False),
+]
+
+# Notes naming a place with more detail, and how they should be split into
+# (location, remaining notes)
+SPLITS = [
+    ('England - super!', ('England', 'super!')),
+    ('Köln – TOP!', ('Köln', 'TOP!')),
+    ('Wien/Urlaub 2019', ('Wien', 'Urlaub 2019')),
+    ('Berlin, geschenkt von Anna', ('Berlin', 'geschenkt von Anna')),
+    ('Bonn-Arzt und Wissenschaftler', ('Bonn', 'Arzt und Wissenschaftler')),
+    ('Baden-Baden, Kurort', ('Baden-Baden', 'Kurort')),
+    ('Baskenland – Spanien', ('Baskenland – Spanien', None)),
+]
+
+
+def legacy_location(notes: str) -> Tuple[Optional[str], Optional[str]]:
+    """parse_preparsed.extract_location_from_notes as it was before gazetteer.py"""
+    if not notes:
+        return None, None
+    notes = notes.strip()
+    if re.search(r'\b(Fall|Band)\b', notes, re.IGNORECASE):
+        return None, notes
+    known_locations = [
+        'Bergisch Gladbach', 'Sydney', 'England', 'Frankreich', 'Berlin',
+        'Autorenteam', 'Schweden', 'Göteborg', 'Baskenland – Spanien',
+        'Bonn-Arzt und Wissenschaftler', 'Belfast', 'Köln'
+    ]
+    for location in known_locations:
+        if notes.lower() == location.lower():
+            return location, None
+    if re.search(r'[😐👍]|\d+\.|zum |Esther', notes):
+        return None, notes
+    if re.match(r'^[A-Za-zäöüÄÖÜß\s-]{2,30}$', notes) and len(notes.split()) <= 4:
+        return notes, None
+    return None, notes
+
+
+def load_notes() -> List[str]:
+    """Collect every non-empty notes value from the preparsed files"""
+    notes = []
+    for i in range(1, 5):
+        filepath = ROOT / f'preparsed{i}.txt'
+        if filepath.exists():
+            with open(filepath, 'r', encoding='utf-8') as f:
+                notes.extend(book['notes'] for book in json.load(f) if book.get('notes'))
+    return notes
+
+
+def accuracy(func: Callable, labelled: List[Tuple[str, bool]]) -> Dict:
+    """Share of notes classified right, with the misclassified ones"""
+    wrong = sorted({notes for notes, is_place in labelled
+                    if (func(notes)[0] is not None) != is_place})
+    right = sum(1 for notes, is_place in labelled if (func(notes)[0] is not None) == is_place)
+    return {'accuracy': right / len(labelled), 'wrong': wrong}
+
+
+def time_calls(func: Callable, inputs: List[str]) -> float:
+    """Return seconds spent calling func on every input"""
+    start = time.perf_counter()
+    for value in inputs:
+        func(value)
+    return time.perf_counter() - start
+
+
+def synthetic_names(count: int, seed: int) -> List[str]:
+    """count distinct German-looking place names"""
+    rng = random.Random(seed)
+    starts = ['Alt', 'Neu', 'Ober', 'Unter', 'Groß', 'Klein', 'Bad ', 'Sankt ', 'Hohen', 'Nieder']
+    stems = ['bach', 'berg', 'burg', 'dorf', 'feld', 'hausen', 'heim', 'ingen', 'stadt', 'tal',
+             'brück', 'au', 'rode', 'hagen', 'kirchen', 'wald', 'see', 'furt', 'hof', 'stein']
+    letters = 'abcdefghiklmnoprstuwäöü'
+    names = set()
+    while len(names) < count:
+        middle = ''.join(rng.choice(letters) for _ in range(rng.randint(2, 6)))
+        name = f"{rng.choice(starts)}{middle}{rng.choice(stems)}".capitalize()
+        if rng.random() < 0.2:
+            name += f" an der {rng.choice(['Ruhr', 'Saale', 'Oder', 'Lahn', 'Mosel'])}"
+        names.add(name)
+    return sorted(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark location detection in notes')
+    parser.add_argument('--repeat', type=int, default=200, help='passes over the real notes')
+    parser.add_argument('--names', type=int, default=200_000, help='size of the large gazetteer')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    new = parse_preparsed.extract_location_from_notes
+    real = load_notes()
+    synthetic = [book['notes'] for book in generate_preparsed(20_000, args.seed) if book['notes']]
+
+    bundled = gazetteer.use_files()
+    print(f"📍 {len(real)} real notes ({len(set(real))} distinct), {len(synthetic)} synthetic; "
+          f"{len(bundled)} names in locations.txt")
+
+    for corpus, labelled in [
+            ('real (circular)', [(notes, notes in REAL_PLACES) for notes in real]),
+            ('synthetic (circular)', [(notes, notes in LOCATIONS) for notes in synthetic]),
+            (f'{len(HELD_OUT)} held-out', HELD_OUT)]:
+        print(f"\nAccuracy on the {corpus} notes:")
+        for name, func in [('legacy rules', legacy_location), ('gazetteer', new)]:
+            result = accuracy(func, labelled)
+            wrong = ', '.join(repr(n) for n in result['wrong'][:8]) or '-'
+            print(f"  {name:14} {result['accuracy']:7.1%}  wrong: {wrong}")
+
+    split_right = [notes for notes, expected in SPLITS if new(notes) == expected]
+    print(f"\nPlace plus detail split into location and notes: {len(split_right)} of {len(SPLITS)}")
+    for notes, expected in SPLITS:
+        if notes not in split_right:
+            print(f"  {notes!r}: {new(notes)} (expected {expected})")
+
+    inputs = real * args.repeat
+    legacy_time = time_calls(legacy_location, inputs)
+    new_time = time_calls(new, inputs)
+    print(f"\nThroughput on the real notes, repeated {args.repeat}x:")
+    print(f"  legacy rules: {legacy_time * 1e9 / len(inputs):8.0f} ns/note")
+    print(f"  gazetteer:    {new_time * 1e9 / len(inputs):8.0f} ns/note")
+    print(f"  speed-up:     {legacy_time / new_time:8.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        extra = Path(tmp) / 'places.txt'
+        extra.write_text('\n'.join(synthetic_names(args.names, args.seed)) + '\n', encoding='utf-8')
+        start = time.perf_counter()
+        large = gazetteer.use_files(extra)
+        load_time = time.perf_counter() - start
+    large_time = time_calls(new, inputs)
+
+    print(f"\nWith {len(large)} names ({args.names} synthetic added):")
+    print(f"  load:         {load_time:8.2f} s ({load_time * 1e9 / len(large):.0f} ns/name)")
+    print(f"  gazetteer:    {large_time * 1e9 / len(inputs):8.0f} ns/note "
+          f"({large_time / new_time:.2f}x the bundled list)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the parsing layer on seeded synthetic corpora
+
+Times parse_book_line, parse_file, parse_date, extract_series_info and
+parse_preparsed.process_book(fetch_missing=False) at 10k/100k/1M scale and
+writes the results as JSON so runs can be compared between commits.
+
+Usage:
+  python3 benchmarks/bench_parsing.py --scales 10k,100k
+  python3 benchmarks/bench_parsing.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import german_dates  # noqa: E402
+import parse_books  # noqa: E402
+import parse_preparsed  # noqa: E402
+from benchmarks.corpus import SCALES, generate_book_lines, generate_preparsed  # noqa: E402
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+
+
+def best_of(repeat: int, func: Callable[[], None]) -> float:
+    """Run func repeat times and return the fastest wall-clock time"""
+    times = []
+    for _ in range(repeat):
+        german_dates.clear_caches()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_scale(scale: str, seed: int, repeat: int) -> List[Dict]:
+    """Run every benchmark on one corpus size"""
+    count = SCALES[scale]
+    lines = list(generate_book_lines(count, seed))
+    preparsed = generate_preparsed(count, seed)
+    dates = [book['date_read'] for book in preparsed if book['date_read']]
+    titles = [book['title'] for book in preparsed]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        books_file = Path(tmp) / 'books.txt'
+        books_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        cases = [
+            ('parse_book_line', len(lines),
+             lambda: [parse_books.parse_book_line(line) for line in lines]),
+            ('parse_file', len(lines),
+             lambda: parse_books.parse_file(books_file)),
+            ('parse_books.parse_date', len(dates),
+             lambda: [parse_books.parse_date(date) for date in dates]),
+            ('parse_preparsed.parse_date', len(dates),
+             lambda: [parse_preparsed.parse_date(date) for date in dates]),
+            ('extract_series_info', len(titles),
+             lambda: [parse_books.extract_series_info(title) for title in titles]),
+            ('process_book', len(preparsed),
+             lambda: [parse_preparsed.process_book(book, fetch_missing=False) for book in preparsed]),
+        ]
+
+        results = []
+        for name, items, func in cases:
+            seconds = best_of(repeat, func)
+            results.append({
+                'benchmark': name,
+                'scale': scale,
+                'items': items,
+                'seconds': seconds,
+                'ns_per_item': seconds * 1e9 / items if items else None,
+                'items_per_second': items / seconds if seconds else None,
+            })
+            print(f"  {name:28} {items:>9} items  {seconds * 1e9 / items:9.0f} ns/item  "
+                  f"{items / seconds:12.0f} items/s")
+
+    return results
+
+
+def git_commit() -> str:
+    """Current commit hash, or 'unknown' outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old_file: Path, new_file: Path) -> None:
+    """Print the speed ratio of every benchmark present in both result files"""
+    with open(old_file, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_file, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    old_results = {(r['benchmark'], r['scale']): r for r in old['results']}
+    print(f"{old['commit']} -> {new['commit']}")
+    for result in new['results']:
+        before = old_results.get((result['benchmark'], result['scale']))
+        if not before:
+            continue
+        ratio = before['ns_per_item'] / result['ns_per_item']
+        marker = '⚠' if ratio < 0.9 else ' '
+        print(f"{marker} {result['benchmark']:28} {result['scale']:>5}  "
+              f"{before['ns_per_item']:9.0f} -> {result['ns_per_item']:9.0f} ns/item  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parsing layer')
+    parser.add_argument('--scales', default='10k,100k',
+                        help=f"comma-separated corpus sizes from {', '.join(SCALES)} (default: 10k,100k)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, best is kept')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/parsing-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two results files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(Path(args.compare[0]), Path(args.compare[1]))
+        return
+
+    commit = git_commit()
+    results = []
+    for scale in args.scales.split(','):
+        print(f"📊 Scale {scale} (seed {args.seed})")
+        results.extend(run_scale(scale, args.seed, args.repeat))
+
+    output_file = Path(args.output) if args.output else RESULTS_DIR / f'parsing-{commit}.json'
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': results,
+        }, f, indent=2)
+
+    print(f"\n✓ Saved results to {output_file}")
+
+
+if __name__ == '__main__':
+    main()
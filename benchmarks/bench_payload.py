@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Bytes per book and decode time of Google Books responses, by request mode
+
+Fetches the answer for every book of a synthetic corpus from the local mock
+API as full or partial (`fields`) responses, with and without gzip, and
+reports the bytes on the wire, the decoded size and the time to decompress
+and parse them. A second pass refreshes an expired cache through
+google_books.search_volumes to measure what the If-None-Match revalidation
+costs. Results are saved as JSON like bench_parsing.py.
+
+Usage: python3 benchmarks/bench_payload.py --books 300
+"""
+
+import argparse
+import gzip
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import api_cache  # noqa: E402
+import google_books  # noqa: E402
+import http_client  # noqa: E402
+from benchmarks.bench_parsing import RESULTS_DIR, git_commit  # noqa: E402
+from benchmarks.corpus import generate_preparsed  # noqa: E402
+from benchmarks.mock_books_api import MockConfig, MockServer  # noqa: E402
+
+MODES = [
+    ('full', False, 'identity'),
+    ('full+gzip', False, 'gzip'),
+    ('partial', True, 'identity'),
+    ('partial+gzip', True, 'gzip'),
+]
+
+
+def decode(raw: bytes, encoding: str) -> Dict:
+    """Parsed response from the bytes received"""
+    if encoding == 'gzip':
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+
+def run_mode(name: str, partial: bool, encoding: str, queries: List[str], repeat: int) -> Dict:
+    """Fetch every query once in one mode and time decoding the bodies"""
+    google_books.set_partial_response(partial)
+    bodies = []
+    for query in queries:
+        response = http_client.get(google_books.volumes_url(query),
+                                   headers={'Accept-Encoding': encoding}, stream=True)
+        response.raise_for_status()
+        bodies.append((response.raw.read(decode_content=False),
+                       response.headers.get('Content-Encoding', 'identity')))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoded = [decode(raw, content_encoding) for raw, content_encoding in bodies]
+        times.append(time.perf_counter() - start)
+    decoded_bytes = sum(len(json.dumps(data, ensure_ascii=False).encode('utf-8')) for data in decoded)
+    wire_bytes = sum(len(raw) for raw, _ in bodies)
+
+    return {
+        'mode': name,
+        'books': len(queries),
+        'wire_bytes': wire_bytes,
+        'bytes_per_book': wire_bytes / len(queries),
+        'decoded_bytes_per_book': decoded_bytes / len(queries),
+        'decode_us_per_book': min(times) * 1e6 / len(queries),
+    }
+
+
+def run_refresh(server: MockServer, queries: List[str], cache_file: Path) -> Dict:
+    """Fill a cache, expire it and refresh it with conditional requests"""
+    google_books.set_partial_response(True)
+    cache = api_cache.open_cache(cache_file)
+    for query in queries:
+        google_books.search_volumes(query)
+
+    cache.ttl = cache.negative_ttl = 0
+    server.counts.clear()
+    sent_before = server.bytes_sent
+    for query in queries:
+        google_books.search_volumes(query)
+
+    return {
+        'mode': 'refresh (If-None-Match)',
+        'books': len(queries),
+        'wire_bytes': server.bytes_sent - sent_before,
+        'bytes_per_book': (server.bytes_sent - sent_before) / len(queries),
+        'statuses': {str(status): count for status, count in sorted(server.counts.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare response sizes and decode times of API request modes')
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5, help='decode runs per mode, best is kept')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/payload-<commit>.json)')
+    args = parser.parse_args()
+
+    books = generate_preparsed(args.books, args.seed)
+    queries = [google_books.build_query(book['title'], book['author']) for book in books]
+
+    server = MockServer(MockConfig(seed=args.seed)).start()
+    google_books.set_base_url(server.base_url)
+
+    try:
+        results = [run_mode(name, partial, encoding, queries, args.repeat)
+                   for name, partial, encoding in MODES]
+        with tempfile.TemporaryDirectory() as tmp:
+            refresh = run_refresh(server, queries, Path(tmp) / 'cache.sqlite')
+            api_cache.open_cache(Path(tmp) / 'closing.sqlite').close()
+    finally:
+        server.stop()
+
+    baseline = results[0]['bytes_per_book']
+    print(f"\n📊 {args.books} books")
+    print(f"  {'mode':14} {'bytes/book':>11} {'decoded':>9} {'decode µs':>10} {'vs full':>8}")
+    for r in results:
+        print(f"  {r['mode']:14} {r['bytes_per_book']:11.0f} {r['decoded_bytes_per_book']:9.0f} "
+              f"{r['decode_us_per_book']:10.1f} {r['bytes_per_book'] / baseline:7.1%}")
+    print(f"  Refresh of an expired cache: {refresh['bytes_per_book']:.0f} body bytes/book, "
+          f"statuses {refresh['statuses']}")
+
+    commit = git_commit()
+    output_file = Path(args.output) if args.output else RESULTS_DIR / f'payload-{commit}.json'
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': results,
+            'refresh': refresh,
+        }, f, indent=2)
+
+    print(f"\n✓ Saved results to {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic corpus generator for the parser benchmarks
+
+Produces books*.txt-style lines and preparsed JSON entries that mimic the
+quirks of the real lists: series markers, emoji and rating notes, locations
+in parentheses after the author, dates with and without parentheses, and
+description lines that the parser has to skip.
+
+Usage: python3 benchmarks/corpus.py 100k [--seed 42] [--out DIR]
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+AUTHORS = [
+    'Sparks, Nicholas', 'Link, Charlotte', 'Gerritsen, Tess', 'Robotham, Michael',
+    'Follett, Ken', 'Fitzek, Sebastian', 'Kepler, Lars', 'Marklund, Liza',
+    'King, Stephen', 'Adler-Olsen, Jussi', 'Gier, Kerstin', 'Safier, David',
+    'Süskind, Patrick', 'Roberts, Nora', 'Lennox, Judith', 'Konsalik, Heinz',
+    'Franz, Andreas', 'Beckett, Simon', 'Brown, Dan', 'Dijkzeul, Lieneke',
+    'Nesbø, Jo', 'Läckberg, Camilla', 'Mankell, Henning', 'Tursten, Helene',
+]
+
+TITLE_WORDS = [
+    'Die', 'Der', 'Das', 'Tod', 'Nacht', 'Haus', 'Schwestern', 'Himmels',
+    'Lächeln', 'Sterne', 'Täuschung', 'Meer', 'Zeit', 'im', 'Wind', 'Schweigen',
+    'des', 'Glücks', 'Spiel', 'Teufel', 'Regen', 'Macht', 'Freiheit', 'Brücken',
+    'Kinder', 'von', 'Eden', 'Chemie', 'Seelenbrecher', 'Therapie', 'Insel',
+]
+
+MONTHS = [
+    'Januar', 'Jan.', 'Februar', 'Feb.', 'März', 'April', 'Mai', 'Juni', 'Juli',
+    'August', 'Aug.', 'September', 'Sept.', 'Sep.', 'Oktober', 'Okt.',
+    'November', 'Nov.', 'Dezember', 'Dez.',
+]
+
+SERIES_MARKERS = ['(Band {n})', '({n}. Fall)', '(Fall {n})', '({n}.)']
+
+NOTES = ['😐', 'TOP!', 'super!', 'nee!', 'zum heulen', '-Heidi-', 'selbst',
+         'Romy', 'Sonja', 'Esther', 'Top!', '👍']
+
+LOCATIONS = ['Bergisch Gladbach', 'Sydney', 'England', 'Frankreich', 'Berlin',
+             'Schweden', 'Göteborg', 'Belfast', 'Köln']
+
+DESCRIPTION_STARTS = [
+    'Als', 'Ein', 'In', 'Sie', 'Er', 'Die Geschichte', 'Vom', 'Mit', 'Für', 'Auf',
+    'Seit', 'Nach', 'Während', 'Berlin, im', '>>',
+]
+
+DESCRIPTION_WORDS = [
+    'einer', 'süddeutschen', 'Kleinstadt', 'erlebt', 'das', 'Mädchen', 'helle',
+    'Tage', 'Kommissarin', 'ermittelt', 'in', 'einem', 'rätselhaften', 'Mordfall',
+    'und', 'bald', 'wird', 'klar', 'dass', 'nichts', 'ist', 'wie', 'es', 'scheint',
+]
+
+
+def _title(rng: random.Random) -> str:
+    """Random German-looking title"""
+    return ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 5)))
+
+
+def _date(rng: random.Random, four_digit: bool) -> str:
+    """Random German month + year as used in the lists"""
+    year = rng.randint(2006, 2025)
+    return f"{rng.choice(MONTHS)} {year if four_digit else f'{year % 100:02d}'}"
+
+
+def _description(rng: random.Random) -> str:
+    """Random description line that the parser must skip"""
+    words = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(8, 40)))
+    return f"{rng.choice(DESCRIPTION_STARTS)} {words}."
+
+
+def generate_book_line(rng: random.Random) -> str:
+    """One book entry in the books*.txt format"""
+    author = rng.choice(AUTHORS)
+    if rng.random() < 0.05:
+        author = f"{author} ({rng.choice(LOCATIONS)})"
+
+    title = _title(rng)
+    if rng.random() < 0.15:
+        title = f"{title} {rng.choice(SERIES_MARKERS).format(n=rng.randint(1, 12))}"
+
+    shape = rng.random()
+    if shape < 0.75:
+        line = f"{author}: {title} ({_date(rng, four_digit=False)})"
+    elif shape < 0.9:
+        # Date padded to a column without parentheses, like books2-4.txt
+        line = f"{author}: {title}{' ' * rng.randint(3, 40)}{_date(rng, four_digit=True)}"
+    else:
+        line = f"{author}: {title}"
+
+    if rng.random() < 0.2:
+        line = f"{line} {rng.choice(NOTES)}"
+    return line
+
+
+def generate_book_lines(count: int, seed: int = 42) -> Iterator[str]:
+    """Yield count lines of a books*.txt-style list"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.65:
+            yield generate_book_line(rng)
+        elif kind < 0.9:
+            yield _description(rng)
+        else:
+            yield rng.choice(['', ' '])
+
+
+def generate_preparsed(count: int, seed: int = 42) -> List[Dict]:
+    """Return count entries in the preparsed*.txt JSON format"""
+    rng = random.Random(seed)
+    books = []
+    for _ in range(count):
+        title = _title(rng)
+        if rng.random() < 0.15:
+            title = f"{title} {rng.choice(SERIES_MARKERS[:3]).format(n=rng.randint(1, 12))}"
+
+        notes = None
+        roll = rng.random()
+        if roll < 0.1:
+            notes = rng.choice(NOTES)
+        elif roll < 0.15:
+            notes = rng.choice(LOCATIONS)
+        elif roll < 0.18:
+            notes = f"{rng.randint(1, 9)}. Fall {rng.choice(NOTES)}"
+
+        date_read = None
+        if rng.random() < 0.95:
+            date_read = _date(rng, four_digit=rng.random() < 0.7)
+
+        books.append({
+            'author': rng.choice(AUTHORS),
+            'title': title,
+            'date_read': date_read,
+            'notes': notes,
+            'description': _description(rng) if rng.random() < 0.9 else None,
+        })
+    return books
+
+
+def write_corpus(directory: Path, count: int, seed: int = 42) -> Dict[str, Path]:
+    """Write a books list and a preparsed file of the given size"""
+    directory.mkdir(parents=True, exist_ok=True)
+    books_file = directory / f'books_{count}.txt'
+    preparsed_file = directory / f'preparsed_{count}.json'
+
+    with open(books_file, 'w', encoding='utf-8') as f:
+        for line in generate_book_lines(count, seed):
+            f.write(line + '\n')
+
+    with open(preparsed_file, 'w', encoding='utf-8') as f:
+        json.dump(generate_preparsed(count, seed), f, ensure_ascii=False, indent=2)
+
+    return {'books': books_file, 'preparsed': preparsed_file}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic book corpus')
+    parser.add_argument('scale', choices=list(SCALES), help='number of lines/entries')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='synthetic', help='output directory')
+    args = parser.parse_args()
+
+    paths = write_corpus(Path(args.out), SCALES[args.scale], args.seed)
+    for kind, path in paths.items():
+        print(f"✓ Wrote {kind} corpus to {path}")
+
+
+if __name__ == '__main__':
+    main()
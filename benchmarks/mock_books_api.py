@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Google Books /books/v1/volumes endpoints and the
+Open Library /search.json and /works/<id>.json endpoints
+
+Serves recorded responses (from an api_cache.sqlite file) or deterministic
+synthetic volumes shaped like the real API's, with configurable latency,
+429 bursts and random 5xx errors. Like the real API it honours the `fields`
+partial-response parameter, gzips answers for clients that accept it and
+sends ETags, answering a matching If-None-Match with 304. Synthetic volumes
+the server has answered with can be fetched again by id (/volumes/<id>) or
+with an isbn:<ISBN> query. Cover URLs (/books/content?id=..&zoom=N and
+Open Library's /b/id/<id>-<S|M|L>.jpg) answer with a deterministic PNG
+whose size grows with the zoom level (or the part of it a Range header asks
+for). Point the enrichment scripts at it with
+GOOGLE_BOOKS_API_URL=http://127.0.0.1:8765/books/v1 (and a separate
+GOOGLE_BOOKS_CACHE, so the real cache stays clean) and OPEN_LIBRARY_URL and
+OPEN_LIBRARY_COVERS_URL=http://127.0.0.1:8765.
+
+Usage:
+  python3 benchmarks/mock_books_api.py --latency lognormal:80:0.5 \\
+      --error-rate 0.02 --burst-every 30 --burst-length 2
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import random
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api_cache import normalize_query  # noqa: E402
+
+ID_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-'
+
+DESCRIPTION_WORDS = [
+    'Eine', 'junge', 'Frau', 'kehrt', 'nach', 'Jahren', 'in', 'ihr', 'Heimatdorf',
+    'zurück', 'und', 'stößt', 'auf', 'ein', 'dunkles', 'Geheimnis', 'der', 'Familie',
+    'Kommissar', 'ermittelt', 'im', 'Fall', 'einer', 'verschwundenen', 'Schülerin',
+    'Roman', 'über', 'Liebe', 'Schuld', 'Vergebung', 'spannend', 'bewegend',
+]
+
+CATEGORIES = ['Fiction', 'Fiction / Thrillers / General', 'Fiction / Romance / General',
+              'Fiction / Mystery & Detective / General', 'Juvenile Fiction']
+
+PUBLISHERS = ['Goldmann Verlag', 'Blanvalet Taschenbuch Verlag', 'Heyne Verlag',
+              'Droemer eBook', 'Lübbe', 'Knaur eBook', 'S. Fischer Verlag']
+
+
+# Widths of the synthetic covers by Google Books zoom level and Open Library
+# size; covers are 2:3 portraits
+COVER_WIDTHS = {'5': 80, '1': 128, '2': 256, '3': 400, '4': 640, '6': 960, '50': 1280}
+OPEN_LIBRARY_COVER_WIDTHS = {'S': 40, 'M': 180, 'L': 500}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency sampler in seconds from a spec:
+    none, fixed:MS, uniform:LO_MS:HI_MS, lognormal:MEDIAN_MS:SIGMA, exponential:MEAN_MS
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(':')] if params else []
+    if kind == 'none':
+        return lambda rng: 0.0
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'lognormal' and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    if kind == 'exponential' and len(values) == 1:
+        return lambda rng: rng.expovariate(1000 / values[0])
+    raise ValueError(f"bad latency spec: {spec!r}")
+
+
+def _isbn13(digits: str) -> str:
+    """ISBN-13 from the 9 core digits, with the 978 prefix"""
+    body = '978' + digits
+    check = (10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def _isbn10(digits: str) -> str:
+    """ISBN-10 from the 9 core digits"""
+    check = sum(int(d) * (10 - i) for i, d in enumerate(digits))
+    check = (11 - check % 11) % 11
+    return digits + ('X' if check == 10 else str(check))
+
+
+def _unit(salt: bytes, query: str) -> float:
+    """Deterministic number in [0, 1) for a query"""
+    digest = hashlib.sha256(salt + normalize_query(query).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32
+
+
+def synthetic_volume(query: str, sparse_rate: float = 0.0) -> Dict:
+    """
+    Deterministic volume resource for a query, shaped like the real API's.
+    A sparse_rate share of volumes has no description and no imageLinks
+    """
+    rng = random.Random(hashlib.sha256(normalize_query(query).encode('utf-8')).digest())
+    volume_id = ''.join(rng.choice(ID_CHARS) for _ in range(12))
+    words = query.split()
+    split = max(1, len(words) - 2)
+    title = ' '.join(words[:split]) or 'Unbekannt'
+    author = ' '.join(reversed(words[split:])).replace(',', '') or 'Unbekannt'
+    core = ''.join(rng.choice('0123456789') for _ in range(9))
+    cover = (f"http://books.google.com/books/content?id={volume_id}&printsec=frontcover"
+             f"&img=1&zoom=1&edge=curl&source=gbs_api")
+    description = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(60, 250))) + '.'
+
+    volume = {
+        'kind': 'books#volume',
+        'id': volume_id,
+        'etag': hashlib.md5(volume_id.encode()).hexdigest()[:11],
+        'selfLink': f"https://www.googleapis.com/books/v1/volumes/{volume_id}",
+        'volumeInfo': {
+            'title': title,
+            'authors': [author],
+            'publisher': rng.choice(PUBLISHERS),
+            'publishedDate': f"{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'description': description,
+            'industryIdentifiers': [
+                {'type': 'ISBN_13', 'identifier': _isbn13(core)},
+                {'type': 'ISBN_10', 'identifier': _isbn10(core)},
+            ],
+            'readingModes': {'text': rng.random() < 0.5, 'image': False},
+            'pageCount': rng.randint(120, 900),
+            'printType': 'BOOK',
+            'categories': [rng.choice(CATEGORIES)],
+            'maturityRating': 'NOT_MATURE',
+            'allowAnonLogging': False,
+            'contentVersion': f"1.{rng.randint(0, 9)}.{rng.randint(0, 9)}.0.preview.2",
+            'panelizationSummary': {'containsEpubBubbles': False, 'containsImageBubbles': False},
+            'imageLinks': {
+                'smallThumbnail': cover.replace('zoom=1', 'zoom=5'),
+                'thumbnail': cover,
+            },
+            'language': 'de',
+            'previewLink': f"http://books.google.de/books?id={volume_id}&printsec=frontcover&dq={urllib.parse.quote(query)}&hl=&cd=1&source=gbs_api",
+            'infoLink': f"http://books.google.de/books?id={volume_id}&dq={urllib.parse.quote(query)}&hl=&source=gbs_api",
+            'canonicalVolumeLink': f"https://books.google.com/books/about/{urllib.parse.quote(title)}.html?hl=&id={volume_id}",
+        },
+        'saleInfo': {'country': 'DE', 'saleability': 'NOT_FOR_SALE', 'isEbook': False},
+        'accessInfo': {
+            'country': 'DE',
+            'viewability': 'PARTIAL',
+            'embeddable': True,
+            'publicDomain': False,
+            'textToSpeechPermission': 'ALLOWED',
+            'epub': {'isAvailable': False},
+            'pdf': {'isAvailable': False},
+            'webReaderLink': f"http://play.google.com/books/reader?id={volume_id}&hl=&source=gbs_api",
+            'accessViewStatus': 'SAMPLE',
+            'quoteSharingAllowed': False,
+        },
+        'searchInfo': {'textSnippet': description[:150] + ' ...'},
+    }
+    if _unit(b'sparse:', query) < sparse_rate:
+        del volume['volumeInfo']['description'], volume['volumeInfo']['imageLinks']
+        del volume['searchInfo']
+    return volume
+
+
+def synthetic_response(query: str, miss_rate: float, sparse_rate: float = 0.0) -> Dict:
+    """Volumes response for a query; a miss_rate share of queries finds nothing"""
+    if _unit(b'miss:', query) < miss_rate:
+        return {'kind': 'books#volumes', 'totalItems': 0}
+    return {'kind': 'books#volumes', 'totalItems': 1,
+            'items': [synthetic_volume(query, sparse_rate)]}
+
+
+def _work_id(query: str) -> str:
+    """Open Library work id of a query"""
+    digest = hashlib.sha256(b'work:' + normalize_query(query).encode('utf-8')).digest()
+    return f"OL{int.from_bytes(digest[:4], 'big') % 10 ** 8}W"
+
+
+def synthetic_search(query: str, miss_rate: float) -> Dict:
+    """Open Library search.json answer for a query, with one doc unless it misses"""
+    if _unit(b'openlibrary-miss:', query) < miss_rate:
+        return {'numFound': 0, 'start': 0, 'numFoundExact': True, 'docs': []}
+
+    rng = random.Random(hashlib.sha256(b'openlibrary:' + normalize_query(query).encode('utf-8')).digest())
+    words = query.split()
+    split = max(1, len(words) - 2)
+    core = ''.join(rng.choice('0123456789') for _ in range(9))
+    doc = {
+        'key': f"/works/{_work_id(query)}",
+        'title': ' '.join(words[:split]) or 'Unbekannt',
+        'author_name': [' '.join(reversed(words[split:])).replace(',', '') or 'Unbekannt'],
+        'first_publish_year': rng.randint(1995, 2024),
+        'publisher': [rng.choice(PUBLISHERS)],
+        'isbn': [_isbn10(core), _isbn13(core)],
+        'language': ['ger'],
+        'cover_i': rng.randint(10 ** 6, 10 ** 7),
+        'number_of_pages_median': rng.randint(120, 900),
+        'subject': [rng.choice(CATEGORIES), 'Fiction'],
+        'edition_count': rng.randint(1, 30),
+        'has_fulltext': False,
+        'ebook_access': 'no_ebook',
+    }
+    return {'numFound': 1, 'start': 0, 'numFoundExact': True, 'docs': [doc]}
+
+
+def synthetic_work(work_id: str) -> Dict:
+    """Open Library work resource with a description"""
+    rng = random.Random(work_id)
+    description = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(40, 160))) + '.'
+    return {
+        'key': f"/works/{work_id}",
+        'title': 'Unbekannt',
+        'description': {'type': '/type/text', 'value': description},
+        'covers': [rng.randint(10 ** 6, 10 ** 7)],
+        'type': {'key': '/type/work'},
+        'revision': rng.randint(1, 20),
+    }
+
+
+def _png(width: int, height: int, rows: List[bytes]) -> bytes:
+    """8-bit RGB PNG of the given pixel rows"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    raw = b''.join(b'\x00' + row for row in rows)
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+@lru_cache(maxsize=256)
+def synthetic_cover(key: str, width: int) -> bytes:
+    """Deterministic cover PNG of a volume or cover id: colour bands with some texture"""
+    rng = random.Random(f"cover:{key}")
+    height = width * 3 // 2
+    bands = []
+    for _ in range(rng.randint(3, 6)):
+        color = [rng.randrange(256) for _ in range(3)]
+        tiles = [bytes(max(0, min(255, c + rng.randint(-12, 12))) for _ in range(16) for c in color)
+                 for _ in range(8)]
+        bands.append([(tile * (width // 16 + 1))[:width * 3] for tile in tiles])
+    rows = [rng.choice(bands[y * len(bands) // height]) for y in range(height)]
+    return _png(width, height, rows)
+
+
+def parse_fields(spec: str) -> Dict:
+    """
+    Selection tree of a `fields` parameter, e.g. 'items(id,volumeInfo/title)'
+    -> {'items': {'id': None, 'volumeInfo': {'title': None}}}; None selects
+    a whole value
+    """
+    tree, pos = _parse_selection(spec, 0)
+    if pos != len(spec):
+        raise ValueError(f"bad fields spec: {spec!r}")
+    return tree
+
+
+def _parse_selection(spec: str, pos: int) -> Tuple[Dict, int]:
+    """Comma-separated paths starting at pos, up to a ')' or the end"""
+    tree: Dict = {}
+    while True:
+        start = pos
+        while pos < len(spec) and spec[pos] not in ',()':
+            pos += 1
+        path = spec[start:pos].split('/')
+        if not all(path):
+            raise ValueError(f"bad fields spec: {spec!r}")
+
+        selection = None
+        if pos < len(spec) and spec[pos] == '(':
+            selection, pos = _parse_selection(spec, pos + 1)
+            if pos >= len(spec) or spec[pos] != ')':
+                raise ValueError(f"bad fields spec: {spec!r}")
+            pos += 1
+        for name in reversed(path[1:]):
+            selection = {name: selection}
+        _merge(tree, path[0], selection)
+
+        if pos < len(spec) and spec[pos] == ',':
+            pos += 1
+            continue
+        return tree, pos
+
+
+def _merge(tree: Dict, name: str, selection: Optional[Dict]) -> None:
+    """Add a selection of name to tree; selecting all of a value wins"""
+    if name in tree and (tree[name] is None or selection is None):
+        tree[name] = None
+    elif name in tree:
+        for key, value in selection.items():
+            _merge(tree[name], key, value)
+    else:
+        tree[name] = selection
+
+
+def project(data: Any, tree: Optional[Dict]) -> Any:
+    """The parts of a response selected by a parse_fields tree"""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if isinstance(data, dict):
+        return {name: project(data[name], selection)
+                for name, selection in tree.items() if name in data}
+    return data
+
+
+def load_recorded(path: Path) -> Dict[str, str]:
+    """Raw response bodies from an api_cache.sqlite file, by normalized query"""
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute('SELECT query_key, body FROM responses'))
+    finally:
+        conn.close()
+
+
+class MockConfig:
+    """Behaviour of the mock server"""
+
+    def __init__(self, latency: str = 'none', error_rate: float = 0.0,
+                 burst_every: float = 0.0, burst_length: float = 0.0,
+                 retry_after: int = 1, miss_rate: float = 0.05, seed: int = 42,
+                 recorded: Optional[Path] = None, sparse_rate: float = 0.0,
+                 open_library_miss_rate: float = 0.2):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.miss_rate = miss_rate
+        self.sparse_rate = sparse_rate
+        self.open_library_miss_rate = open_library_miss_rate
+        self.rng = random.Random(seed)
+        self.recorded = load_recorded(recorded) if recorded else {}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.server.count(status)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers = {**(headers or {}), 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+        self.server.count_bytes(len(body))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps({'error': {'code': status, 'message': message}}).encode('utf-8')
+        self._send(status, body, headers)
+
+    def do_GET(self):
+        config: MockConfig = self.server.config
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+
+        with self.server.lock:
+            delay = config.sample_latency(config.rng)
+            failed = config.rng.random() < config.error_rate
+            error_status = config.rng.choice([500, 503])
+        time.sleep(delay)
+
+        work = re.fullmatch(r'/works/(OL\d+W)\.json', url.path)
+        volume = re.fullmatch(r'/books/v1/volumes/([\w-]+)', url.path)
+        open_library_cover = re.fullmatch(r'/b/id/(\d+)-([SML])\.jpg', url.path)
+        google_cover = url.path == '/books/content' and 'id' in params
+        if not work and not volume and not open_library_cover and not google_cover and not (
+                url.path in ('/books/v1/volumes', '/search.json') and 'q' in params):
+            self._error(404, 'Not Found')
+            return
+        if url.path.startswith('/books/v1/') and self.server.in_burst():
+            self._error(429, 'Rate Limit Exceeded', {'Retry-After': str(config.retry_after)})
+            return
+        if failed:
+            self._error(error_status, 'Backend Error')
+            return
+
+        if google_cover:
+            zoom = params.get('zoom', ['1'])[0]
+            self._send_image(synthetic_cover(params['id'][0], COVER_WIDTHS.get(zoom, 128)))
+            return
+        if open_library_cover:
+            width = OPEN_LIBRARY_COVER_WIDTHS[open_library_cover.group(2)]
+            self._send_image(synthetic_cover(open_library_cover.group(1), width))
+            return
+        if work:
+            body = json.dumps(synthetic_work(work.group(1)), ensure_ascii=False)
+        elif url.path == '/search.json':
+            data = synthetic_search(params['q'][0], config.open_library_miss_rate)
+            if 'fields' in params:
+                fields = params['fields'][0].split(',')
+                data['docs'] = [{name: doc[name] for name in fields if name in doc}
+                                for doc in data['docs']]
+            body = json.dumps(data, ensure_ascii=False)
+        elif volume:
+            query = self.server.volume_queries.get(volume.group(1))
+            if query is None:
+                self._error(404, 'The volume ID could not be found.')
+                return
+            body = self._project(json.dumps(synthetic_volume(query, config.sparse_rate)), params)
+        else:
+            body = self._project(self._volumes_body(params['q'][0]), params)
+        if body is None:
+            return
+        self._send_body(body.encode('utf-8'))
+
+    def _volumes_body(self, query: str) -> str:
+        """Body of a volumes search; isbn: queries find the volumes served before"""
+        config: MockConfig = self.server.config
+        if query.startswith('isbn:'):
+            known = self.server.isbn_queries.get(query[5:])
+            if known is None:
+                return json.dumps({'kind': 'books#volumes', 'totalItems': 0})
+            volume = synthetic_volume(known, config.sparse_rate)
+            return json.dumps({'kind': 'books#volumes', 'totalItems': 1, 'items': [volume]},
+                              ensure_ascii=False)
+
+        body = config.recorded.get(normalize_query(query))
+        if body is None:
+            data = synthetic_response(query, config.miss_rate, config.sparse_rate)
+            self.server.remember(query, data)
+            body = json.dumps(data, ensure_ascii=False)
+        return body
+
+    def _project(self, body: str, params: Dict) -> Optional[str]:
+        """body reduced to the fields parameter, or None after sending a 400"""
+        if 'fields' in params:
+            try:
+                tree = parse_fields(params['fields'][0])
+            except ValueError as e:
+                self._error(400, str(e))
+                return None
+            body = json.dumps(project(json.loads(body), tree), ensure_ascii=False)
+        return body
+
+    def _send_image(self, body: bytes) -> None:
+        """
+        200 with an image, never compressed (like the real image servers),
+        or 206 with the part asked for by a single-range Range header
+        """
+        status, headers = 200, {}
+        requested = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', '').strip())
+        if requested and any(requested.groups()):
+            first, last = requested.groups()
+            if not first:
+                start, end = max(0, len(body) - int(last)), len(body) - 1
+            else:
+                start, end = int(first), min(int(last or len(body) - 1), len(body) - 1)
+            if start >= len(body) or start > end:
+                self.server.count(416)
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(body)}"
+            status, body = 206, body[start:end + 1]
+        self.server.count(status)
+        self.server.count_bytes(len(body))
+        self.send_response(status)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_body(self, body: bytes) -> None:
+        """200 with an ETag, or 304 if the client already has this body"""
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server.count(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._send(200, body, {'ETag': etag})
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded mock server; start() runs it in a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, config: MockConfig, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), MockHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.counts: Dict[int, int] = {}
+        self.bytes_sent = 0
+        # Queries of the synthetic volumes served, by volume id and by ISBN
+        self.volume_queries: Dict[str, str] = {}
+        self.isbn_queries: Dict[str, str] = {}
+        self.started = time.monotonic()
+        self.thread = None
+
+    @property
+    def root_url(self) -> str:
+        """Value for OPEN_LIBRARY_URL / open_library.set_base_url()"""
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def base_url(self) -> str:
+        """Value for GOOGLE_BOOKS_API_URL / google_books.set_base_url()"""
+        return f"{self.root_url}/books/v1"
+
+    def in_burst(self) -> bool:
+        """True during the 429 window at the start of every burst period"""
+        if not self.config.burst_every:
+            return False
+        return (time.monotonic() - self.started) % self.config.burst_every < self.config.burst_length
+
+    def count(self, status: int) -> None:
+        with self.lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def remember(self, query: str, data: Dict) -> None:
+        """Index a synthetic volumes response for id and ISBN lookups"""
+        for volume in data.get('items', []):
+            with self.lock:
+                self.volume_queries[volume['id']] = query
+                for identifier in volume['volumeInfo']['industryIdentifiers']:
+                    self.isbn_queries[identifier['identifier']] = query
+
+    def count_bytes(self, size: int) -> None:
+        """Add to the response body bytes sent"""
+        with self.lock:
+            self.bytes_sent += size
+
+    def start(self) -> 'MockServer':
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local mock of the Google Books volumes API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='none',
+                        help='none, fixed:MS, uniform:LO:HI, lognormal:MEDIAN:SIGMA or exponential:MEAN')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of random 500/503 answers')
+    parser.add_argument('--burst-every', type=float, default=0.0,
+                        help='seconds between 429 bursts (0 = never)')
+    parser.add_argument('--burst-length', type=float, default=0.0, help='seconds each burst lasts')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After of 429 answers')
+    parser.add_argument('--miss-rate', type=float, default=0.05,
+                        help='share of synthetic queries answered with no items')
+    parser.add_argument('--sparse-rate', type=float, default=0.0,
+                        help='share of synthetic volumes without description and cover')
+    parser.add_argument('--open-library-miss-rate', type=float, default=0.2,
+                        help='share of Open Library searches that find nothing')
+    parser.add_argument('--recorded', type=Path, help='serve responses recorded in this api_cache.sqlite')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.error_rate, args.burst_every, args.burst_length,
+                        args.retry_after, args.miss_rate, args.seed, args.recorded,
+                        args.sparse_rate, args.open_library_miss_rate)
+    server = MockServer(config, args.host, args.port)
+    print(f"📡 Mock Google Books API on {server.base_url}")
+    if config.recorded:
+        print(f"  {len(config.recorded)} recorded responses from {args.recorded}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 Answers by status: {dict(sorted(server.counts.items()))}")
+
+
+if __name__ == '__main__':
+    main()
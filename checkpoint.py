@@ -0,0 +1,76 @@
+"""
+Append-only checkpoint journal for enrichment runs
+
+Every finished book is appended as one JSON line {"index", "key", "record"}
+and flushed to disk before the next result is accepted, so a crash loses
+only the requests that were in flight. A run started with --resume replays
+the journal and skips every book it already holds.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+
+def entry_key(book: Dict) -> str:
+    """Identity of an input book, used to check a journal still matches the input"""
+    return f"{book['author']}\x1f{book['title']}"
+
+
+class CheckpointJournal:
+    """JSONL journal of enriched books, keyed by their position in the input"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def replay(self, books: List[Dict]) -> Dict[int, Dict]:
+        """
+        Return {index: record} of journaled books that match the input.
+        A line torn by a crash is cut off so new entries append cleanly
+        """
+        done = {}
+        if not self.path.exists():
+            return done
+
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good_end += len(line)
+                index = entry['index']
+                if index < len(books) and entry['key'] == entry_key(books[index]):
+                    done[index] = entry['record']
+
+        if good_end < self.path.stat().st_size:
+            os.truncate(self.path, good_end)
+        return done
+
+    def open(self, resume: bool) -> None:
+        """Open for appending; without resume any previous journal is discarded"""
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def record(self, index: int, book: Dict, record: Dict) -> None:
+        """Append one finished book and force it to disk"""
+        line = json.dumps({'index': index, 'key': entry_key(book), 'record': record},
+                          ensure_ascii=False)
+        self.file.write(line + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self) -> None:
+        """Close and delete the journal once its results are saved"""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Precompute cover placeholders (BlurHash and dominant colour) for the website
+
+For every mirrored cover (local_cover, see mirror_covers.py) a BlurHash
+string of about 30 characters and the cover's average colour are stored in
+the book as cover_placeholder, so index.html can paint a blurred preview
+the moment a card is rendered, without waiting for (or requesting) the
+image. Covers are decoded and shrunk in a pool of processes; each worker
+encodes its whole batch at once with NumPy (sRGB to linear light, the
+cosine transform and the quantization are array operations over all
+covers). Results are cached in covers/placeholders.json by the SHA-256 of
+the cover, so re-runs only process new covers.
+
+Usage: python3 cover_placeholders.py [--workers N]
+"""
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from mirror_covers import COVERS_DIR, DATABASE_FILE, load_manifest, save_manifest
+from resize_covers import source_hash
+
+CACHE_FILE = Path(COVERS_DIR) / 'placeholders.json'
+
+# BlurHash components across and down; covers are portrait
+COMPONENTS = (3, 4)
+
+# Size covers are shrunk to before encoding; BlurHash does not depend on
+# the aspect ratio, so every cover is sampled on the same grid
+SAMPLE_SIZE = (32, 48)
+
+# Covers encoded per worker task
+BATCH_SIZE = 64
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def base83(value: int, length: int) -> str:
+    """value as `length` base-83 digits"""
+    return ''.join(BASE83[(value // 83 ** (length - 1 - i)) % 83] for i in range(length))
+
+
+def srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    """0-255 sRGB values to linear light in 0-1"""
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(values: np.ndarray) -> np.ndarray:
+    """Linear light to rounded 0-255 sRGB integers"""
+    v = np.clip(values, 0.0, 1.0)
+    srgb = np.where(v <= 0.0031308, v * 12.92, 1.055 * np.power(v, 1 / 2.4) - 0.055)
+    return (srgb * 255 + 0.5).astype(np.int64)
+
+
+def load_sample(path: str) -> np.ndarray:
+    """Cover shrunk to SAMPLE_SIZE as a (height, width, 3) float array"""
+    with Image.open(path) as image:
+        image.draft('RGB', (SAMPLE_SIZE[0] * 2, SAMPLE_SIZE[1] * 2))
+        sample = image.convert('RGB').resize(SAMPLE_SIZE, Image.Resampling.BOX)
+    return np.asarray(sample, dtype=np.float64)
+
+
+def encode_batch(pixels: np.ndarray, components: Tuple[int, int] = COMPONENTS) -> List[Dict[str, str]]:
+    """
+    BlurHash and average colour of a (covers, height, width, 3) sRGB batch,
+    as [{'blurhash', 'color'}, ...]
+    """
+    count, height, width, _ = pixels.shape
+    cx, cy = components
+    linear = srgb_to_linear(pixels)
+
+    # factors[n, j, i] = norm / (w h) * sum over y, x of cos(pi j y / h) cos(pi i x / w) linear[n, y, x]
+    basis_x = np.cos(np.pi * np.outer(np.arange(cx), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(cy), np.arange(height)) / height)
+    norm = np.full((cy, cx, 1), 2.0)
+    norm[0, 0] = 1.0
+    factors = np.einsum('jy,ix,nyxc->njic', basis_y, basis_x, linear) * norm / (width * height)
+    factors = factors.reshape(count, cy * cx, 3)
+
+    dc = linear_to_srgb(factors[:, 0])
+    ac = factors[:, 1:]
+    size_flag = (cx - 1) + (cy - 1) * 9
+
+    if ac.shape[1]:
+        quantised_max = np.clip(np.floor(np.abs(ac).max(axis=(1, 2)) * 166 - 0.5), 0, 82).astype(np.int64)
+    else:
+        quantised_max = np.zeros(count, dtype=np.int64)
+    maximum = (quantised_max + 1) / 166
+    scaled = ac / maximum[:, None, None]
+    quantised = np.clip(np.floor(np.sign(scaled) * np.sqrt(np.abs(scaled)) * 9 + 9.5), 0, 18).astype(np.int64)
+    ac_values = quantised[:, :, 0] * 19 * 19 + quantised[:, :, 1] * 19 + quantised[:, :, 2]
+    dc_values = (dc[:, 0] << 16) + (dc[:, 1] << 8) + dc[:, 2]
+
+    results = []
+    for n in range(count):
+        blurhash = (base83(size_flag, 1) + base83(int(quantised_max[n]), 1)
+                    + base83(int(dc_values[n]), 4)
+                    + ''.join(base83(int(value), 2) for value in ac_values[n]))
+        results.append({'blurhash': blurhash, 'color': '#{:06x}'.format(int(dc_values[n]))})
+    return results
+
+
+def encode_files(paths: List[str]) -> List[Optional[Dict[str, str]]]:
+    """Placeholders of a batch of cover files (runs in a worker process); None for unreadable ones"""
+    samples = []
+    for path in paths:
+        try:
+            samples.append(load_sample(path))
+        except (OSError, ValueError, Image.DecompressionBombError):
+            samples.append(None)
+    readable = [sample for sample in samples if sample is not None]
+    encoded = iter(encode_batch(np.stack(readable)) if readable else [])
+    return [next(encoded) if sample is not None else None for sample in samples]
+
+
+def compute_placeholders(books: List[Dict], workers: Optional[int] = None,
+                         cache_file: Path = CACHE_FILE) -> Dict[str, int]:
+    """
+    Set every book's cover_placeholder ({'blurhash', 'color'}, or None
+    without a mirrored cover). Returns counts of computed, cached and
+    failed covers
+    """
+    cache = load_manifest(cache_file)
+    sources: Dict[str, str] = {}
+    for book in books:
+        local = book.get('local_cover')
+        if local and Path(local).exists() and local not in sources:
+            sources[local] = source_hash(Path(local))
+    todo = sorted({sha: local for local, sha in sources.items() if sha not in cache}.items())
+    counts = {'computed': 0, 'cached': len(set(sources.values())) - len(todo), 'failed': 0}
+
+    if todo:
+        batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor, \
+                    tqdm(total=len(todo), desc='Placeholders', unit='cover') as pbar:
+                results = executor.map(encode_files, [[local for _, local in batch] for batch in batches])
+                for batch, placeholders in zip(batches, results):
+                    for (sha, local), placeholder in zip(batch, placeholders):
+                        if placeholder is None:
+                            pbar.write(f"  ✗ {local}: not a readable image")
+                            counts['failed'] += 1
+                        else:
+                            cache[sha] = placeholder
+                            counts['computed'] += 1
+                    pbar.update(len(batch))
+        finally:
+            save_manifest(cache_file, cache)
+
+    for book in books:
+        sha = sources.get(book.get('local_cover'))
+        book['cover_placeholder'] = cache.get(sha) if sha else None
+    return counts
+
+
+def main(workers: Optional[int] = None):
+    """Main function"""
+    db_file = Path(DATABASE_FILE)
+    if not db_file.exists():
+        print(f"Error: {DATABASE_FILE} not found!")
+        print("Please run parse_preparsed.py first.")
+        return
+
+    with open(db_file, 'r', encoding='utf-8') as f:
+        books = json.load(f)
+    if not any(book.get('local_cover') for book in books):
+        print("No mirrored covers found. Please run mirror_covers.py first.")
+        return
+
+    counts = compute_placeholders(books, workers)
+
+    with open(db_file, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✅ {counts['computed']} placeholders computed, {counts['cached']} cached, "
+          f"{counts['failed']} failed")
+    print(f"📝 cover_placeholder written to {DATABASE_FILE} "
+          f"({sum(1 for b in books if b.get('cover_placeholder'))} of {len(books)} books)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute BlurHash placeholders of the mirrored covers')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes to decode covers with (default: one per CPU)')
+    args = parser.parse_args()
+    main(args.workers)
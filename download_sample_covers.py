@@ -4,9 +4,10 @@ Download a few sample covers to inspect image quality
 """
 
 import json
-import requests
 from pathlib import Path
 
+import http_client
+
 # Create samples directory
 samples_dir = Path('sample_covers')
 samples_dir.mkdir(exist_ok=True)
@@ -29,7 +30,7 @@ for i, book in enumerate(books_with_covers, 1):
     print(f"{i}. Downloading: {author} - {title}")
 
     try:
-        response = requests.get(book['cover_url'], timeout=10)
+        response = http_client.get(book['cover_url'])
         response.raise_for_status()
 
         with open(filepath, 'wb') as f:
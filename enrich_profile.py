@@ -0,0 +1,174 @@
+"""
+Opt-in per-stage timings for the enrichment pipeline
+
+Code paths wrap their stages in span('stage') and each book in book(label);
+nothing is recorded unless PROFILE is set, so the normal path costs one
+global lookup per stage. Enable with enable(), then print report() and save
+the spans as a Chrome trace (chrome://tracing, Perfetto) at the end of a run.
+
+Stages: cache_lookup, rate_limit, connect (DNS, TCP and TLS of a new
+connection), server (request sent until the body is read, minus connect),
+decode, cache_store, extract, merge, and book for the whole book.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+class EnrichmentProfile:
+    """Spans (stage, book, thread, start_ns, duration_ns) of one run"""
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.spans: List[Tuple[str, str, int, int, int]] = []
+        self.local = threading.local()
+
+    def current_book(self) -> str:
+        """Label of the book the calling thread works on, or ''"""
+        return getattr(self.local, 'book', '')
+
+    def record(self, stage: str, start: int, end: int) -> None:
+        """Record one span of the calling thread; list.append is thread-safe"""
+        self.spans.append((stage, self.current_book(), threading.get_ident(), start, end - start))
+
+    def book_totals(self) -> Dict[str, List[float]]:
+        """Per stage, the seconds each book spent in it (books without the stage left out)"""
+        totals: Dict[Tuple[str, str], int] = {}
+        for stage, book, _, _, duration in self.spans:
+            totals[stage, book] = totals.get((stage, book), 0) + duration
+        # server spans include the connect spans nested in them
+        for (stage, book), duration in list(totals.items()):
+            if stage == 'server' and ('connect', book) in totals:
+                totals[stage, book] = duration - totals['connect', book]
+
+        per_stage: Dict[str, List[float]] = {}
+        for (stage, _), duration in totals.items():
+            per_stage.setdefault(stage, []).append(duration / 1e9)
+        return per_stage
+
+    def report(self) -> str:
+        """Human-readable table of p50/p95/p99 per stage, in milliseconds"""
+        wall = (time.perf_counter_ns() - self.started) / 1e9
+        lines = [f"  {'stage':14} {'books':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total s':>9}"]
+        for stage, values in sorted(self.book_totals().items(), key=lambda x: -sum(x[1])):
+            lines.append(f"  {stage:14} {len(values):6} {percentile(values, 50) * 1000:9.2f} "
+                         f"{percentile(values, 95) * 1000:9.2f} {percentile(values, 99) * 1000:9.2f} "
+                         f"{sum(values):9.2f}")
+        lines.append(f"  Wall-clock time: {wall:.2f} s; stage totals add up the time of all threads")
+        return '\n'.join(lines)
+
+    def write_trace(self, path: Path) -> None:
+        """Save the spans in the Chrome trace event format"""
+        threads: Dict[int, int] = {}
+        events = []
+        for stage, book, ident, start, duration in sorted(self.spans, key=lambda s: s[3]):
+            tid = threads.setdefault(ident, len(threads) + 1)
+            events.append({
+                'name': stage, 'cat': 'enrichment', 'ph': 'X', 'pid': 1, 'tid': tid,
+                'ts': (start - self.started) / 1000, 'dur': duration / 1000,
+                'args': {'book': book},
+            })
+        for tid in threads.values():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                           'args': {'name': f"worker {tid}"}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+# The active profile, or None when profiling is off
+PROFILE: Optional[EnrichmentProfile] = None
+
+
+def enable() -> EnrichmentProfile:
+    """Start profiling the enrichment stages"""
+    global PROFILE
+    PROFILE = EnrichmentProfile()
+    return PROFILE
+
+
+def disable() -> None:
+    """Stop profiling"""
+    global PROFILE
+    PROFILE = None
+
+
+@contextmanager
+def _span(profile: EnrichmentProfile, stage: str) -> Iterator[None]:
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        profile.record(stage, start, time.perf_counter_ns())
+
+
+def span(stage: str) -> ContextManager:
+    """Context manager timing one stage of the current book, if profiling is on"""
+    profile = PROFILE
+    if profile is None:
+        return nullcontext()
+    return _span(profile, stage)
+
+
+@contextmanager
+def _book(profile: EnrichmentProfile, label: str) -> Iterator[None]:
+    previous = profile.current_book()
+    profile.local.book = label
+    try:
+        with _span(profile, 'book'):
+            yield
+    finally:
+        profile.local.book = previous
+
+
+def book(label: str) -> ContextManager:
+    """Context manager attributing the spans inside it to a book, if profiling is on"""
+    profile = PROFILE
+    if profile is None:
+        return nullcontext()
+    return _book(profile, label)
+
+
+def in_current_book(func: Callable) -> Callable:
+    """func wrapped to run under the calling thread's book, for handing it to another thread"""
+    profile = PROFILE
+    if profile is None:
+        return func
+    label = profile.current_book()
+
+    def run(*args, **kwargs):
+        previous = profile.current_book()
+        profile.local.book = label
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.local.book = previous
+
+    return run
+
+
+def finish(trace_file: Optional[str]) -> None:
+    """Print the report and save the trace, if profiling is on"""
+    if PROFILE is None:
+        return
+
+    print("\n" + "=" * 60)
+    print("⏱  Enrichment stage timings")
+    print("=" * 60)
+    print(PROFILE.report())
+
+    if trace_file:
+        PROFILE.write_trace(Path(trace_file))
+        print(f"\n📁 Saved trace to {trace_file} (open in chrome://tracing or ui.perfetto.dev)")
@@ -3,26 +3,52 @@
 Script to fetch book covers and metadata from Google Books API
 """
 
+import argparse
 import json
 import requests
-import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, Optional
-import urllib.parse
+from typing import Dict, Iterator, Optional, Tuple
 
+import api_cache
+import google_books
+import http_client
+import jsonl_output
+from checkpoint import CheckpointJournal
+from rate_limit import AdaptiveRateLimiter
 
-def search_google_books(title: str, author: str) -> Optional[Dict]:
-    """Search Google Books API for a book"""
-    # Clean up the query
-    query = f"{title} {author}".strip()
-    encoded_query = urllib.parse.quote(query)
+# Requests per second to start at and the most the rate may ramp up to
+DEFAULT_RPS = 2.0
+DEFAULT_MAX_RPS = 10.0
+
+# Times a book is queued again after 429/503 answers before the run stops
+MAX_THROTTLED_ATTEMPTS = 8
+
+OUTPUT_FILE = 'books_enriched.json'
+
+# Output of --stream runs, one enriched book per line in input order
+STREAM_FILE = 'books_enriched.jsonl'
 
-    url = f"https://www.googleapis.com/books/v1/volumes?q={encoded_query}&maxResults=1"
+# Checkpoint of a run, removed once the output is written
+JOURNAL_FILE = 'books_enriched.journal.jsonl'
+
+
+def search_google_books(title: str, author: str,
+                        limiter: Optional[AdaptiveRateLimiter] = None,
+                        volume_id: Optional[str] = None,
+                        isbn: Optional[str] = None) -> Optional[Dict]:
+    """
+    Search Google Books API for a book (answers are cached on disk).
+    A known volume id or ISBN is fetched directly instead of searching.
+    http_client.Throttled is raised, not swallowed, so the book can be retried
+    """
+    # Clean up the query
+    query = google_books.build_query(title, author)
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = google_books.search_identifiers(volume_id, isbn, limiter)
+        if data is None:
+            data = google_books.search_volumes(query, limiter)
 
         if 'items' in data and len(data['items']) > 0:
             book_info = data['items'][0]['volumeInfo']
@@ -65,6 +91,8 @@ def search_google_books(title: str, author: str) -> Optional[Dict]:
 
             return result
 
+    except http_client.Throttled:
+        raise
     except requests.RequestException as e:
         print(f"  Error fetching data for '{title}': {e}")
         return None
@@ -72,55 +100,135 @@ def search_google_books(title: str, author: str) -> Optional[Dict]:
     return None
 
 
-def enrich_books(books: list, delay: float = 0.5) -> list:
-    """Enrich book data with information from Google Books API"""
-    enriched_books = []
+def enrich_book(book: Dict, limiter: Optional[AdaptiveRateLimiter] = None) -> Dict:
+    """Copy of book merged with what Google Books knows about it"""
+    # Make a copy of the book
+    enriched_book = book.copy()
+
+    # Search Google Books
+    google_data = search_google_books(book['title'], book['author'], limiter,
+                                      book.get('google_books_id'), book.get('isbn'))
+
+    if google_data:
+        # Merge the data
+        enriched_book.update(google_data)
+        if google_data['cover_url']:
+            print(f"  ✓ Found cover image")
+        else:
+            print(f"  ⚠ No cover image found")
+    else:
+        print(f"  ✗ No data found")
+        # Add empty fields
+        enriched_book.update({
+            'google_books_id': None,
+            'description': None,
+            'publisher': None,
+            'published_date': None,
+            'page_count': None,
+            'categories': [],
+            'language': None,
+            'isbn': None,
+            'cover_url': None
+        })
+
+    return enriched_book
+
+
+def iter_enriched(books: list, limiter: Optional[AdaptiveRateLimiter] = None,
+                  journal: Optional[CheckpointJournal] = None,
+                  resume: bool = False) -> Iterator[Tuple[int, Dict]]:
+    """
+    Enrich book data with information from Google Books API, yielding
+    (input index, enriched book) as each book is done.
+    Requests are paced by limiter (a new one at DEFAULT_RPS if omitted);
+    a throttled book is asked again right away, once the limiter has slowed
+    down, up to MAX_THROTTLED_ATTEMPTS times before http_client.Throttled
+    is raised. Books are yielded in input order, so a streaming writer never
+    has to hold any back. Each enriched book is appended to journal; with
+    resume, books already in it are yielded from there instead of being
+    fetched again
+    """
+    if limiter is None:
+        limiter = AdaptiveRateLimiter(DEFAULT_RPS, DEFAULT_MAX_RPS)
     total = len(books)
+    done = {}
+    if journal is not None:
+        if resume:
+            done = journal.replay(books)
+        journal.open(resume)
 
     print(f"Fetching data for {total} books...")
+    if done:
+        print(f"Resuming: {len(done)} books already done")
     print("This may take a while. Please be patient!\n")
 
-    for i, book in enumerate(books, 1):
-        print(f"[{i}/{total}] {book['author']}: {book['title']}")
-
-        # Make a copy of the book
-        enriched_book = book.copy()
-
-        # Search Google Books
-        google_data = search_google_books(book['title'], book['author'])
-
-        if google_data:
-            # Merge the data
-            enriched_book.update(google_data)
-            if google_data['cover_url']:
-                print(f"  ✓ Found cover image")
-            else:
-                print(f"  ⚠ No cover image found")
-        else:
-            print(f"  ✗ No data found")
-            # Add empty fields
-            enriched_book.update({
-                'google_books_id': None,
-                'description': None,
-                'publisher': None,
-                'published_date': None,
-                'page_count': None,
-                'categories': [],
-                'language': None,
-                'isbn': None,
-                'cover_url': None
-            })
-
-        enriched_books.append(enriched_book)
+    queue = deque(range(total))
+    attempts = {}
+    try:
+        while queue:
+            index = queue.popleft()
+            if index in done:
+                yield index, done.pop(index)
+                continue
+            book = books[index]
+            print(f"[{index + 1}/{total}] {book['author']}: {book['title']} "
+                  f"({limiter.rate:.1f} req/s)")
+            try:
+                enriched_book = enrich_book(book, limiter)
+            except http_client.Throttled as e:
+                attempts[index] = attempts.get(index, 0) + 1
+                if attempts[index] >= MAX_THROTTLED_ATTEMPTS:
+                    raise
+                wait = f", retry after {e.retry_after:g}s" if e.retry_after else ''
+                print(f"  ⏸ Throttled{wait}; slowing down to {limiter.rate:.1f} req/s")
+                queue.appendleft(index)
+                continue
+            if journal is not None:
+                journal.record(index, book, enriched_book)
+            yield index, enriched_book
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def enrich_books(books: list, limiter: Optional[AdaptiveRateLimiter] = None,
+                 journal: Optional[CheckpointJournal] = None, resume: bool = False) -> list:
+    """The books of iter_enriched, collected in input order"""
+    enriched_books = [None] * len(books)
+    for index, enriched_book in iter_enriched(books, limiter, journal, resume):
+        enriched_books[index] = enriched_book
+    return enriched_books
 
-        # Rate limiting - be nice to the API
-        if i < total:
-            time.sleep(delay)
 
-    return enriched_books
+def stream_books(books: list, output_file: Path, limiter: Optional[AdaptiveRateLimiter] = None,
+                 journal: Optional[CheckpointJournal] = None, resume: bool = False) -> Dict[str, int]:
+    """
+    Write the books of iter_enriched to a JSONL file in input order as they
+    are done, without keeping them in memory. Returns the counts of books,
+    covers and descriptions
+    """
+    counts = {'books': 0, 'covers': 0, 'descriptions': 0}
+    with jsonl_output.OrderedJsonlWriter(output_file) as output:
+        for index, enriched_book in iter_enriched(books, limiter, journal, resume):
+            output.write(index, enriched_book)
+            counts['books'] += 1
+            counts['covers'] += bool(enriched_book.get('cover_url'))
+            counts['descriptions'] += bool(enriched_book.get('description'))
+    return counts
+
+
+def finalize_stream() -> None:
+    """Compact STREAM_FILE into OUTPUT_FILE, the JSON array the website reads"""
+    if not Path(STREAM_FILE).exists():
+        print(f"Error: {STREAM_FILE} not found! Run with --stream first.")
+        return
+    count = jsonl_output.compact(Path(STREAM_FILE), Path(OUTPUT_FILE))
+    print(f"Compacted {count} books from {STREAM_FILE} into {OUTPUT_FILE}")
 
 
-def main():
+def main(choice: Optional[str] = None, resume: bool = False,
+         rps: float = DEFAULT_RPS, max_rps: float = DEFAULT_MAX_RPS,
+         stream: bool = False, finalize: bool = True):
     """Main function"""
     # Load the books database
     db_file = Path('books_database.json')
@@ -135,10 +243,11 @@ def main():
     print(f"Loaded {len(books)} books from database\n")
 
     # Ask user if they want to process all books or just a sample
-    print("Options:")
-    print("  1. Process first 10 books (for testing)")
-    print("  2. Process all books")
-    choice = input("\nEnter your choice (1 or 2): ").strip()
+    if not choice:
+        print("Options:")
+        print("  1. Process first 10 books (for testing)")
+        print("  2. Process all books")
+        choice = input("\nEnter your choice (1 or 2): ").strip()
 
     if choice == '1':
         books = books[:10]
@@ -146,27 +255,76 @@ def main():
     else:
         print(f"\nProcessing all {len(books)} books...\n")
 
+    journal = CheckpointJournal(Path(JOURNAL_FILE))
+    if not resume and journal.exists():
+        print(f"⚠ Discarding the unfinished run in {JOURNAL_FILE} (use --resume to continue it)\n")
+
     # Enrich the books
-    enriched_books = enrich_books(books)
+    limiter = AdaptiveRateLimiter(rps, max(rps, max_rps))
+    try:
+        if stream:
+            counts = stream_books(books, Path(STREAM_FILE), limiter, journal, resume)
+        else:
+            enriched_books = enrich_books(books, limiter, journal, resume)
+    except http_client.Throttled as e:
+        print(f"\n✗ Still throttled after {MAX_THROTTLED_ATTEMPTS} attempts ({e})")
+        print(f"Finished books are kept in {JOURNAL_FILE}; rerun later with --resume")
+        return
 
     # Save enriched data
-    output_file = 'books_enriched.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enriched_books, f, ensure_ascii=False, indent=2)
+    if stream:
+        output_files = [STREAM_FILE]
+        if finalize:
+            jsonl_output.compact(Path(STREAM_FILE), Path(OUTPUT_FILE))
+            output_files.append(OUTPUT_FILE)
+    else:
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(enriched_books, f, ensure_ascii=False, indent=2)
+        output_files = [OUTPUT_FILE]
+        counts = {
+            'books': len(enriched_books),
+            'covers': sum(1 for b in enriched_books if b.get('cover_url')),
+            'descriptions': sum(1 for b in enriched_books if b.get('description')),
+        }
+    journal.remove()
 
     # Statistics
-    covers_found = sum(1 for b in enriched_books if b.get('cover_url'))
-    descriptions_found = sum(1 for b in enriched_books if b.get('description'))
+    total = max(counts['books'], 1)
 
     print(f"\n" + "="*50)
     print(f"Processing complete!")
-    print(f"Saved to: {output_file}")
+    print(f"Saved to: {', '.join(output_files)}")
     print(f"\nStatistics:")
-    print(f"  Total books: {len(enriched_books)}")
-    print(f"  Covers found: {covers_found} ({covers_found/len(enriched_books)*100:.1f}%)")
-    print(f"  Descriptions found: {descriptions_found} ({descriptions_found/len(enriched_books)*100:.1f}%)")
+    print(f"  Total books: {counts['books']}")
+    print(f"  Covers found: {counts['covers']} ({counts['covers']/total*100:.1f}%)")
+    print(f"  Descriptions found: {counts['descriptions']} ({counts['descriptions']/total*100:.1f}%)")
+    api_cache.print_cache_summary()
     print("="*50)
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Fetch covers and metadata into books_enriched.json')
+    parser.add_argument('choice', nargs='?', choices=['1', '2'],
+                        help='1 = first 10 books, 2 = all books (asks if omitted)')
+    parser.add_argument('--resume', action='store_true',
+                        help=f'continue an interrupted run from {JOURNAL_FILE}')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS,
+                        help=f'initial requests per second (default: {DEFAULT_RPS:g})')
+    parser.add_argument('--max-rps', type=float, default=DEFAULT_MAX_RPS,
+                        help='requests per second the rate may ramp up to while the API '
+                             f'does not throttle (default: {DEFAULT_MAX_RPS:g})')
+    parser.add_argument('--stream', action='store_true',
+                        help=f'write each book to {STREAM_FILE} as soon as it is done instead of '
+                             f'keeping all of them in memory, then compact it into {OUTPUT_FILE}')
+    parser.add_argument('--no-finalize', dest='finalize', action='store_false',
+                        help=f'with --stream, leave {OUTPUT_FILE} alone and only write {STREAM_FILE}')
+    parser.add_argument('--finalize', dest='finalize_only', action='store_true',
+                        help=f'only compact {STREAM_FILE} into {OUTPUT_FILE} (also while a '
+                             '--stream run is still going)')
+    args = parser.parse_args()
+    if args.rps <= 0:
+        parser.error('--rps must be positive')
+    if args.finalize_only:
+        finalize_stream()
+    else:
+        main(args.choice, args.resume, args.rps, args.max_rps, args.stream, args.finalize)
@@ -0,0 +1,146 @@
+"""
+Place-name index that tells locations apart from other notes
+
+Names are loaded once from a data file into a dict keyed by their
+normalized form (NFKC, casefolded, dashes unified, whitespace collapsed),
+so a lookup is one hash probe however many names are loaded. Normalized
+notes are memoized in a bounded LRU cache, as they repeat a lot. The bundled
+locations.txt has German, Austrian and Swiss places, European countries,
+regions and cities, and the places that occur in the reading lists. Add
+larger lists with $GAZETTEER_FILES (paths separated like $PATH) or
+use_files() to recognise more.
+
+Data files hold one name per line (# starts a comment), or GeoNames
+tab-separated rows (e.g. DE.txt or cities15000.txt from
+download.geonames.org), whose name, ASCII name and alternate names are all
+indexed under the name.
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_FILE = Path(__file__).resolve().parent / 'locations.txt'
+
+# Maximum number of distinct texts whose normalized form is remembered
+CACHE_SIZE = 4096
+
+# Hyphens, dashes and minus signs all compare as '-'
+DASHES = str.maketrans({c: '-' for c in '‐‑‒–—―−'})
+
+# A place followed by more detail: "Baskenland – Spanien", "Bonn-Arzt und Wissenschaftler"
+LEADING_PLACE_RE = re.compile(r'\s*[-‐‑‒–—―−,/]\s*')
+
+
+def normalize(name: str) -> str:
+    """Form names are compared in: "Baskenland – Spanien" -> "baskenland - spanien" """
+    if name.isascii():
+        return ' '.join(name.lower().split())
+    return ' '.join(unicodedata.normalize('NFKC', name).translate(DASHES).casefold().split())
+
+
+cached_normalize = lru_cache(maxsize=CACHE_SIZE)(normalize)
+
+
+def read_names(path: Path) -> Iterator[tuple[str, str]]:
+    """(name, canonical name) pairs of a data file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if '\t' in line:
+                # GeoNames: geonameid, name, asciiname, alternatenames, ...
+                columns = line.rstrip('\n').split('\t')
+                if len(columns) < 4:
+                    continue
+                canonical = columns[1]
+                yield canonical, canonical
+                yield columns[2], canonical
+                for alternate in columns[3].split(','):
+                    yield alternate, canonical
+            else:
+                name = line.split('#', 1)[0].strip()
+                if name:
+                    yield name, name
+
+
+class Gazetteer:
+    """Normalized place names mapped to their canonical spelling"""
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize(name) in self.names
+
+    def add(self, name: str, canonical: Optional[str] = None) -> None:
+        """Index name; the first canonical spelling added for it is kept"""
+        key = normalize(name)
+        if key:
+            self.names.setdefault(key, canonical or name.strip())
+
+    def load(self, path: Path) -> int:
+        """Index the names of a data file, returning how many were new"""
+        before = len(self.names)
+        for name, canonical in read_names(path):
+            self.add(name, canonical)
+        return len(self.names) - before
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Canonical spelling of text if it is a known place, else None"""
+        return self.names.get(cached_normalize(text))
+
+    def leading_place(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        (canonical place, rest) if text starts with a known place followed by
+        a dash, comma or slash and more text, else None. Every separator ends
+        a candidate and the longest known one wins, so "Baden-Baden, Kurort"
+        gives ("Baden-Baden", "Kurort"), not Baden
+        """
+        text = text.strip()
+        for match in reversed(list(LEADING_PLACE_RE.finditer(text))):
+            place = self.names.get(cached_normalize(text[:match.start()]))
+            rest = text[match.end():].strip()
+            if place is not None and rest:
+                return place, rest
+        return None
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def _load(paths: List[Path]) -> Gazetteer:
+    gazetteer = Gazetteer()
+    for path in paths:
+        gazetteer.load(path)
+    return gazetteer
+
+
+def get_gazetteer() -> Gazetteer:
+    """
+    The process-wide gazetteer, loaded on first use from locations.txt and
+    the files in $GAZETTEER_FILES
+    """
+    global _gazetteer
+    if _gazetteer is not None:
+        return _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            extra = os.environ.get('GAZETTEER_FILES', '')
+            _gazetteer = _load([DEFAULT_FILE] + [Path(p) for p in extra.split(os.pathsep) if p])
+        return _gazetteer
+
+
+def use_files(*paths: Path, bundled: bool = True) -> Gazetteer:
+    """Replace the process-wide gazetteer with the names of paths (and locations.txt)"""
+    global _gazetteer
+    gazetteer = _load(([DEFAULT_FILE] if bundled else []) + [Path(p) for p in paths])
+    with _gazetteer_lock:
+        _gazetteer = gazetteer
+    return gazetteer
@@ -0,0 +1,134 @@
+"""
+Shared German date parsing for parse_books.py and parse_preparsed.py
+
+Month names are matched with one regular expression compiled at import
+time, and parsed results are memoized in bounded LRU caches because the inputs repeat a lot
+("Mai 06", "Januar 2025", "Okt. 08", ...).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+# Maximum number of distinct date strings remembered per parser
+CACHE_SIZE = 4096
+
+# Month tables are in priority order: when several names occur in one string
+# the first listed wins, exactly like the original linear scans.
+
+# Months recognised in the books*.txt lists
+BOOK_LIST_MONTHS = {
+    'jan': 1, 'januar': 1, 'feb': 2, 'februar': 2, 'märz': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'mai': 5, 'juni': 6, 'juli': 7, 'aug': 8,
+    'august': 8, 'sep': 9, 'sept': 9, 'september': 9, 'okt': 10,
+    'oktober': 10, 'nov': 11, 'november': 11, 'dez': 12, 'dezember': 12
+}
+
+# Months recognised in the date_read field of the preparsed files
+PREPARSED_MONTHS = {
+    'jan': 1, 'januar': 1,
+    'feb': 2, 'februar': 2,
+    'mär': 3, 'märz': 3, 'mar': 3,
+    'apr': 4, 'april': 4,
+    'mai': 5,
+    'jun': 6, 'juni': 6,
+    'jul': 7, 'juli': 7,
+    'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9,
+    'okt': 10, 'oktober': 10,
+    'nov': 11, 'november': 11,
+    'dez': 12, 'dezember': 12
+}
+
+BOOK_LIST_YEAR_RE = re.compile(r'\b(20\d{2}|0[6-9]|1[0-9]|2[0-5])\b')
+PREPARSED_YEAR_RE = re.compile(r'\b(20\d{2}|\d{2})\b')
+ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-\d{2}')
+
+class MonthMatcher:
+    """Finds the highest-priority month name in a string with one compiled alternation"""
+
+    def __init__(self, months: Dict[str, int]):
+        self.months = months
+        # re tries alternatives in order, so at any position the
+        # highest-priority name starting there is the one matched
+        self.pattern = re.compile('|'.join(re.escape(name) for name in months))
+
+    def find(self, text: str) -> Optional[int]:
+        """Return the month of the highest-priority name occurring in text"""
+        match = self.pattern.search(text)
+        if match is None:
+            return None
+        if self.pattern.search(text, match.start() + 1) is None:
+            return self.months[match.group()]
+
+        # More than one name: the first listed wins, as in the original scans
+        for name, month in self.months.items():
+            if name in text:
+                return month
+        return None
+
+
+BOOK_LIST_MATCHER = MonthMatcher(BOOK_LIST_MONTHS)
+PREPARSED_MATCHER = MonthMatcher(PREPARSED_MONTHS)
+
+
+def _full_year(year: int) -> int:
+    """Convert a 2-digit year to 4 digits"""
+    if year < 100:
+        return 2000 + year if year < 50 else 1900 + year
+    return year
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_book_list_date(text: str) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    Parse a date from a books*.txt parenthetical or note.
+    Returns (year, month), or None if no year is found
+    """
+    text_lower = text.lower().strip()
+
+    year_match = BOOK_LIST_YEAR_RE.search(text_lower)
+    if not year_match:
+        return None
+
+    year = _full_year(int(year_match.group(1)))
+    return year, BOOK_LIST_MATCHER.find(text_lower)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_preparsed_date(date_str: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse a preparsed date_read value and return (year, month)"""
+    date_lower = date_str.lower().strip().rstrip('.')
+
+    # Try ISO format first: YYYY-MM-DD
+    iso_match = ISO_DATE_RE.match(date_lower)
+    if iso_match:
+        return int(iso_match.group(1)), int(iso_match.group(2))
+
+    year = None
+    year_match = PREPARSED_YEAR_RE.search(date_lower)
+    if year_match:
+        year = _full_year(int(year_match.group(1)))
+
+    return year, PREPARSED_MATCHER.find(date_lower)
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Return hit/miss counters and sizes of both date caches"""
+    stats = {}
+    for name, func in [('book_list', parse_book_list_date),
+                       ('preparsed', parse_preparsed_date)]:
+        info = func.cache_info()
+        stats[name] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+        }
+    return stats
+
+
+def clear_caches() -> None:
+    """Empty both date caches and reset their counters"""
+    parse_book_list_date.cache_clear()
+    parse_preparsed_date.cache_clear()
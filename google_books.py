@@ -0,0 +1,227 @@
+"""
+Google Books volume search shared by parse_preparsed.py and fetch_covers.py
+
+Responses go through the SQLite cache of api_cache.py, so only queries that
+are new or whose cache entry has expired reach the network. The API base URL
+can be pointed elsewhere (e.g. at benchmarks/mock_books_api.py) with
+$GOOGLE_BOOKS_API_URL or set_base_url().
+
+Requests ask only for the volume fields the scripts read (the `fields`
+partial-response parameter) and revalidate expired cache entries with
+If-None-Match, so an unchanged answer costs a bodiless 304.
+
+Books with a known volume id or ISBN are fetched directly (/volumes/<id>,
+q=isbn:<ISBN-13>) instead of by the free-text title and author query;
+these answers are cached under "volume:<id>" and "isbn:<ISBN-13>".
+"""
+
+import json
+import os
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+import requests
+
+import api_cache
+import enrich_profile
+import http_client
+from rate_limit import AdaptiveRateLimiter, TokenBucket
+
+DEFAULT_BASE_URL = 'https://www.googleapis.com/books/v1'
+BASE_URL = os.environ.get('GOOGLE_BOOKS_API_URL', DEFAULT_BASE_URL).rstrip('/')
+
+# Partial response: the parts of a volume that search_google_books uses
+VOLUME_PARTS = ('id,volumeInfo(description,publisher,publishedDate,pageCount,'
+                'categories,language,industryIdentifiers,imageLinks)')
+VOLUME_FIELDS = f"items({VOLUME_PARTS})"
+PARTIAL_RESPONSE = os.environ.get('GOOGLE_BOOKS_FULL_RESPONSE', '') == ''
+
+
+def set_base_url(base_url: str) -> None:
+    """Send requests to another server implementing /volumes"""
+    global BASE_URL
+    BASE_URL = base_url.rstrip('/')
+
+
+def set_partial_response(enabled: bool) -> None:
+    """Request only VOLUME_FIELDS (True) or the full volume resources (False)"""
+    global PARTIAL_RESPONSE
+    PARTIAL_RESPONSE = enabled
+
+
+def volumes_url(query: str) -> str:
+    """Search URL of query, projected to VOLUME_FIELDS in partial-response mode"""
+    url = f"{BASE_URL}/volumes?q={urllib.parse.quote(query)}&maxResults=1"
+    if PARTIAL_RESPONSE:
+        url += f"&fields={urllib.parse.quote(VOLUME_FIELDS, safe=',()/')}"
+    return url
+
+
+def _cache_query(query: str) -> str:
+    """Cache key query; answers of other servers never mix with the real API's"""
+    return query if BASE_URL == DEFAULT_BASE_URL else f"{BASE_URL} {query}"
+
+
+def build_query(title: str, author: str) -> str:
+    """Search query used for a book"""
+    return f"{title} {author}".strip()
+
+
+def cached_volumes(query: str) -> Optional[Dict]:
+    """Cached response for query, or None"""
+    return api_cache.get_cache().get(_cache_query(query))
+
+
+def is_cached(query: str) -> bool:
+    """True if search_volumes would answer query without a request"""
+    return api_cache.get_cache().fresh(_cache_query(query))
+
+
+def _fetch(cache_query: str, url: str, limiter: Optional[TokenBucket]) -> Tuple[Dict, bool]:
+    """
+    (response, fetched) for url, from the cache entry cache_query or the API;
+    fetched is True if a new body was downloaded
+    """
+    with enrich_profile.span('cache_lookup'):
+        cache = api_cache.get_cache()
+        data = cache.get(cache_query)
+        if data is not None:
+            return data, False
+        stale = cache.get_stale(cache_query)
+    headers = {'If-None-Match': stale[1]} if stale else {}
+
+    if limiter is not None:
+        with enrich_profile.span('rate_limit'):
+            limiter.acquire()
+
+    adaptive = isinstance(limiter, AdaptiveRateLimiter)
+    sent_at = time.monotonic()
+    with enrich_profile.span('server'):
+        response = http_client.get(url, retry_throttled=not adaptive, headers=headers)
+    if response.status_code in http_client.THROTTLE_STATUSES:
+        throttled = http_client.Throttled(response)
+        if adaptive:
+            limiter.throttled(sent_at, throttled.retry_after)
+        raise throttled
+    if adaptive:
+        limiter.succeeded()
+
+    if response.status_code == 304 and stale:
+        cache.touch(cache_query)
+        return stale[0], False
+    response.raise_for_status()
+    with enrich_profile.span('decode'):
+        data = response.json()
+    with enrich_profile.span('cache_store'):
+        cache.put(cache_query, response.text, response.headers.get('ETag'))
+    return data, True
+
+
+def search_volumes(query: str, limiter: Optional[TokenBucket] = None) -> Dict:
+    """
+    Raw volumes response for query, from the cache or the API.
+    A token is taken from limiter only when a request is made. An expired
+    entry with an ETag is revalidated and reused if the API answers 304.
+    With an AdaptiveRateLimiter, 429/503 answers are not retried here but
+    reported to it and raised as http_client.Throttled, so the caller can
+    queue the book again. A newly fetched volume is also cached under its
+    ISBN-13s and volume id, so identifier lookups of it need no request.
+    Raises requests.RequestException on network and HTTP errors that are
+    left after http_client's retries
+    """
+    data, fetched = _fetch(_cache_query(query), volumes_url(query), limiter)
+    if fetched and data.get('items'):
+        _index_volume(data['items'][0])
+    return data
+
+
+def isbn13(isbn: str) -> Optional[str]:
+    """ISBN-13 of an ISBN-10 or ISBN-13 (hyphens and spaces ignored), or None if invalid"""
+    digits = isbn.replace('-', '').replace(' ', '').upper()
+    if len(digits) == 13 and digits.isdigit():
+        return digits if _isbn13_check(digits[:12]) == digits[12] else None
+    if len(digits) == 10 and digits[:9].isdigit() and (digits[9].isdigit() or digits[9] == 'X'):
+        check = (11 - sum(int(d) * (10 - i) for i, d in enumerate(digits[:9])) % 11) % 11
+        if digits[9] != ('X' if check == 10 else str(check)):
+            return None
+        body = '978' + digits[:9]
+        return body + _isbn13_check(body)
+    return None
+
+
+def _isbn13_check(body: str) -> str:
+    """Check digit of the first 12 digits of an ISBN-13"""
+    return str((10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body)) % 10) % 10)
+
+
+def _isbn_query(code: str) -> str:
+    return f"isbn:{code}"
+
+
+def _volume_query(volume_id: str) -> str:
+    return f"volume:{volume_id}"
+
+
+def _index_volume(volume: Dict, by_id: bool = True) -> None:
+    """Cache a volume under its ISBN-13s (and id), as search_isbn (and get_volume) answers"""
+    cache = api_cache.get_cache()
+    if by_id and volume.get('id'):
+        cache.put(_cache_query(_volume_query(volume['id'])), json.dumps(volume, ensure_ascii=False))
+    body = json.dumps({'items': [volume]}, ensure_ascii=False)
+    codes = {isbn13(identifier['identifier'])
+             for identifier in volume.get('volumeInfo', {}).get('industryIdentifiers', [])
+             if identifier.get('type') in ('ISBN_13', 'ISBN_10')}
+    for code in codes - {None}:
+        cache.put(_cache_query(_isbn_query(code)), body)
+
+
+def search_isbn(isbn: str, limiter: Optional[TokenBucket] = None) -> Dict:
+    """Raw volumes response for an isbn: query, cached under the ISBN-13"""
+    code = isbn13(isbn) or isbn
+    return _fetch(_cache_query(_isbn_query(code)), volumes_url(_isbn_query(code)), limiter)[0]
+
+
+def get_volume(volume_id: str, limiter: Optional[TokenBucket] = None) -> Dict:
+    """Raw volume resource of a Google Books volume id; it is also cached under its ISBN-13s"""
+    url = f"{BASE_URL}/volumes/{urllib.parse.quote(volume_id)}"
+    if PARTIAL_RESPONSE:
+        url += f"?fields={urllib.parse.quote(VOLUME_PARTS, safe=',()/')}"
+    volume, fetched = _fetch(_cache_query(_volume_query(volume_id)), url, limiter)
+    if fetched and volume.get('id'):
+        _index_volume(volume, by_id=False)
+    return volume
+
+
+def identifier_cached(volume_id: Optional[str], isbn: Optional[str]) -> bool:
+    """True if search_identifiers would answer from the cache"""
+    cache = api_cache.get_cache()
+    if volume_id and cache.fresh(_cache_query(_volume_query(volume_id))):
+        return True
+    code = isbn13(isbn) if isbn else None
+    return bool(code and cache.fresh(_cache_query(_isbn_query(code))))
+
+
+def search_identifiers(volume_id: Optional[str], isbn: Optional[str],
+                       limiter: Optional[TokenBucket] = None) -> Optional[Dict]:
+    """
+    Volumes-shaped response for a known volume id, else for an ISBN, or
+    None if neither is given or finds a volume. A volume id the API no
+    longer knows (404) counts as not found
+    """
+    if volume_id:
+        try:
+            volume = get_volume(volume_id, limiter)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            volume = None
+        if volume and volume.get('id'):
+            return {'items': [volume]}
+
+    code = isbn13(isbn) if isbn else None
+    if code:
+        data = search_isbn(code, limiter)
+        if data.get('items'):
+            return data
+    return None
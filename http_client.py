@@ -0,0 +1,182 @@
+"""
+Shared HTTP client for the network scripts
+
+All requests go through one pooled requests.Session, so connections (and
+their TLS handshakes) are reused across books. Each host gets a bounded
+pool of keep-alive connections, and 429/5xx answers and connection errors
+are retried with exponential backoff plus jitter, honouring Retry-After.
+Callers that pace themselves (see rate_limit.AdaptiveRateLimiter) can ask
+for a session that hands 429/503 answers back instead of retrying them.
+Responses are requested gzip-compressed; Google's APIs only compress for
+clients whose User-Agent contains "gzip", hence the suffix.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import enrich_profile
+
+DEFAULT_TIMEOUT = 10
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 0.5
+BACKOFF_MAX = 30
+BACKOFF_JITTER = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# "Slow down" answers, left to the caller by get(..., retry_throttled=False)
+THROTTLE_STATUSES = (429, 503)
+
+# Hosts with a cached pool, and keep-alive connections per host
+POOL_HOSTS = 10
+CONNECTIONS_PER_HOST = 8
+
+USER_AGENT = 'book-library/0.1 (gzip)'
+
+
+class Throttled(requests.HTTPError):
+    """A 429/503 answer; retry_after is the server's Retry-After in seconds, or None"""
+
+    def __init__(self, response: requests.Response):
+        super().__init__(f"{response.status_code} throttled: {response.url}", response=response)
+        self.retry_after = retry_after(response)
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait according to the Retry-After header (delay or HTTP date)"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """Connection whose DNS lookup and TCP connect show up in enrich_profile"""
+
+    def connect(self):
+        with enrich_profile.span('connect'):
+            super().connect()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """Connection whose DNS lookup, TCP connect and TLS handshake show up in enrich_profile"""
+
+    def connect(self):
+        with enrich_profile.span('connect'):
+            super().connect()
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open TimedHTTP(S)Connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(timeout: float = DEFAULT_TIMEOUT, retries: int = MAX_RETRIES,
+                   connections_per_host: int = CONNECTIONS_PER_HOST,
+                   retry_throttled: bool = True) -> TimeoutSession:
+    """
+    New pooled session with the retry policy mounted for http and https.
+    Without retry_throttled, 429/503 answers are returned as they are
+    """
+    statuses = RETRY_STATUSES if retry_throttled else tuple(
+        status for status in RETRY_STATUSES if status not in THROTTLE_STATUSES)
+    retry = Retry(
+        total=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_max=BACKOFF_MAX,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=statuses,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        # urllib3 retries 429/503 carrying Retry-After whatever status_forcelist says
+        respect_retry_after_header=retry_throttled,
+        raise_on_status=False,
+    )
+    # pool_block makes connections_per_host a hard limit: extra threads wait
+    # for a free connection instead of opening (and discarding) new ones
+    adapter = TimedAdapter(pool_connections=POOL_HOSTS, pool_maxsize=connections_per_host,
+                          max_retries=retry, pool_block=True)
+
+    session = TimeoutSession(timeout)
+    session.headers['User-Agent'] = USER_AGENT
+    session.headers['Accept-Encoding'] = 'gzip'
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Shared sessions by retry_throttled
+_sessions: Dict[bool, TimeoutSession] = {}
+_session_lock = threading.Lock()
+_settings = {
+    'timeout': DEFAULT_TIMEOUT,
+    'retries': MAX_RETRIES,
+    'connections_per_host': CONNECTIONS_PER_HOST,
+}
+
+
+def configure(timeout: Optional[float] = None, retries: Optional[int] = None,
+              connections_per_host: Optional[int] = None) -> None:
+    """Change the shared sessions' settings; takes effect on the next request"""
+    with _session_lock:
+        for name, value in [('timeout', timeout), ('retries', retries),
+                            ('connections_per_host', connections_per_host)]:
+            if value is not None:
+                _settings[name] = value
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_session(retry_throttled: bool = True) -> TimeoutSession:
+    """The process-wide session, created on first use"""
+    with _session_lock:
+        session = _sessions.get(retry_throttled)
+        if session is None:
+            session = _sessions[retry_throttled] = create_session(
+                retry_throttled=retry_throttled, **_settings)
+        return session
+
+
+def get(url: str, retry_throttled: bool = True, **kwargs) -> requests.Response:
+    """GET through the shared session (see create_session for retry_throttled)"""
+    return get_session(retry_throttled).get(url, **kwargs)
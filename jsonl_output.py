@@ -0,0 +1,78 @@
+"""
+Streaming JSONL output for enrichment runs
+
+Records are written one JSON line each as soon as every book before them
+is done, so the file can be read while a run is still going. A record
+given before its turn waits in memory until every earlier one has been
+written, so producers should finish records close to input order:
+fetch_covers.iter_enriched yields them strictly in order, and the buffer
+stays empty. compact() turns such a file into the indented JSON array the
+website reads, one record at a time.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class OrderedJsonlWriter:
+    """Writes records given as (input index, record) to a JSONL file in input order"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = None
+        self.next_index = 0
+        self.pending: Dict[int, Dict] = {}
+        self.written = 0
+
+    def __enter__(self) -> 'OrderedJsonlWriter':
+        self.file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, index: int, record: Dict) -> None:
+        """Accept a finished record; it is written once all before it are"""
+        self.pending[index] = record
+        while self.next_index in self.pending:
+            line = json.dumps(self.pending.pop(self.next_index), ensure_ascii=False)
+            self.file.write(line + '\n')
+            self.next_index += 1
+            self.written += 1
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def compact(jsonl_path: Path, json_path: Path, indent: Optional[int] = 2) -> int:
+    """
+    Write the records of a JSONL file as a JSON array, formatted like
+    json.dump(records, indent=indent), and return how many there were. A
+    last line torn by a run still writing it is left out. The array is
+    written to a temporary file first, so readers never see half of it
+    """
+    json_path = Path(json_path)
+    tmp_path = json_path.with_name(json_path.name + '.tmp')
+    pad = '\n' + ' ' * indent if indent is not None else ''
+    count = 0
+    with open(jsonl_path, 'r', encoding='utf-8') as source, \
+            open(tmp_path, 'w', encoding='utf-8') as target:
+        target.write('[')
+        for line in source:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            text = json.dumps(record, ensure_ascii=False, indent=indent).replace('\n', pad)
+            if count:
+                target.write(',' if pad else ', ')
+            target.write(pad + text)
+            count += 1
+        target.write(('\n' if pad and count else '') + ']')
+    os.replace(tmp_path, json_path)
+    return count
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Mirror the covers of books_database.json into a local content-addressed store
+
+Covers are downloaded by a bounded pool of threads through the shared
+http_client session, streamed to disk while they are hashed, and stored as
+covers/<first two hex digits>/<SHA-256>.<ext>, so identical images (such as
+a publisher's placeholder) are kept once. covers/manifest.json maps every
+mirrored URL to its file; re-runs only download URLs that are not in it or
+whose file has gone. Each book gets a local_cover path, which index.html
+prefers over cover_url.
+
+Usage: python3 mirror_covers.py [--concurrency 8] [--rps 10]
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from tqdm import tqdm
+
+import http_client
+from pools import map_bounded
+from rate_limit import TokenBucket
+
+DATABASE_FILE = 'books_database.json'
+COVERS_DIR = 'covers'
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RPS = 10.0
+
+# Bytes read from the network and written to disk at a time
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp',
+              'image/gif': '.gif', 'image/avif': '.avif'}
+
+# Leading bytes of the image formats, for servers that send no usable Content-Type
+MAGIC = [(b'\xff\xd8\xff', '.jpg'), (b'\x89PNG\r\n\x1a\n', '.png'), (b'GIF8', '.gif')]
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """File extension of an image from its first bytes, or None"""
+    for magic, extension in MAGIC:
+        if head.startswith(magic):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[4:12] in (b'ftypavif', b'ftypavis'):
+        return '.avif'
+    return None
+
+
+def load_manifest(path: Path) -> Dict[str, Dict]:
+    """A JSON manifest written by save_manifest, or {} if there is none yet"""
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(path: Path, manifest: Dict) -> None:
+    """Write a JSON manifest atomically, so an interrupted run keeps the old one"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class CoverStore:
+    """Content-addressed image files under root, with the manifest of mirrored URLs"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.manifest_path = self.root / 'manifest.json'
+        self.tmp_dir = self.root / '.tmp'
+        self.manifest: Dict[str, str] = load_manifest(self.manifest_path)
+
+    def path_of(self, url: str) -> Optional[str]:
+        """Mirrored file of url (relative to the store's parent), if it is still there"""
+        path = self.manifest.get(url)
+        if path and (self.root.parent / path).exists():
+            return path
+        return None
+
+    def download(self, url: str, limiter: Optional[TokenBucket] = None) -> str:
+        """
+        Stream url into the store and return the file's path relative to the
+        store's parent. Raises requests.RequestException on network and HTTP
+        errors, ValueError if the answer is not an image
+        """
+        if limiter is not None:
+            limiter.acquire()
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with http_client.get(url, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+            try:
+                head = b''
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        if len(head) < 16:
+                            head += chunk[:16]
+                        digest.update(chunk)
+                        f.write(chunk)
+                extension = sniff_extension(head) or EXTENSIONS.get(content_type)
+                if extension is None:
+                    raise ValueError(f"not an image ({content_type or 'no Content-Type'})")
+
+                sha = digest.hexdigest()
+                target = self.root / sha[:2] / f"{sha}{extension}"
+                target.parent.mkdir(exist_ok=True)
+                # Same content already stored (for another URL): keep that file
+                if target.exists():
+                    os.unlink(tmp_name)
+                else:
+                    os.replace(tmp_name, target)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+
+        path = target.relative_to(self.root.parent).as_posix()
+        self.manifest[url] = path
+        return path
+
+    def save(self) -> None:
+        """Write the manifest of mirrored URLs"""
+        save_manifest(self.manifest_path, self.manifest)
+
+
+def mirror_covers(books: List[Dict], store: CoverStore, concurrency: int = DEFAULT_CONCURRENCY,
+                  limiter: Optional[TokenBucket] = None) -> Dict[str, int]:
+    """
+    Mirror the cover_url of every book and set its local_cover (None for
+    books without a cover or whose download failed). Each URL is fetched at
+    most once, by up to `concurrency` threads at a time. Returns counts of
+    downloaded, already mirrored and failed URLs
+    """
+    urls = sorted({book['cover_url'] for book in books if book.get('cover_url')})
+    paths = {url: store.path_of(url) for url in urls}
+    missing = [url for url in urls if paths[url] is None]
+    counts = {'downloaded': 0, 'cached': len(urls) - len(missing), 'failed': 0}
+
+    if missing:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            with tqdm(total=len(missing), desc='Mirroring covers', unit='cover') as pbar:
+                download = functools.partial(store.download, limiter=limiter)
+                for url, future in map_bounded(executor, download, missing, concurrency):
+                    try:
+                        paths[url] = future.result()
+                        counts['downloaded'] += 1
+                    except (requests.RequestException, ValueError) as e:
+                        pbar.write(f"  ✗ {url}: {e}")
+                        counts['failed'] += 1
+                    pbar.update(1)
+        finally:
+            # Downloads not started yet are dropped, so an interrupt stops promptly
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    for book in books:
+        book['local_cover'] = paths.get(book.get('cover_url'))
+    return counts
+
+
+def main(concurrency: int = DEFAULT_CONCURRENCY, rps: float = DEFAULT_RPS):
+    """Main function"""
+    db_file = Path(DATABASE_FILE)
+    if not db_file.exists():
+        print(f"Error: {DATABASE_FILE} not found!")
+        print("Please run parse_preparsed.py first.")
+        return
+
+    with open(db_file, 'r', encoding='utf-8') as f:
+        books = json.load(f)
+
+    store = CoverStore(Path(COVERS_DIR))
+    http_client.configure(connections_per_host=concurrency)
+    limiter = TokenBucket(rps, burst=concurrency) if rps > 0 else None
+    try:
+        counts = mirror_covers(books, store, concurrency, limiter)
+    finally:
+        store.save()
+
+    with open(db_file, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False, indent=2)
+
+    files = {path for path in store.manifest.values()}
+    size = sum((store.root.parent / path).stat().st_size for path in files
+               if (store.root.parent / path).exists())
+    print(f"\n✅ {counts['downloaded']} covers downloaded, {counts['cached']} already mirrored, "
+          f"{counts['failed']} failed")
+    print(f"📁 {len(store.manifest)} URLs in {len(files)} files ({size / 1e6:.1f} MB) under {COVERS_DIR}/")
+    print(f"📝 local_cover written to {DATABASE_FILE} "
+          f"({sum(1 for b in books if b.get('local_cover'))} of {len(books)} books)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f'Mirror the covers of {DATABASE_FILE} into {COVERS_DIR}/')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'downloads at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS,
+                        help=f'downloads started per second, 0 = unlimited (default: {DEFAULT_RPS:g})')
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    main(args.concurrency, args.rps)
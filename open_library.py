@@ -0,0 +1,122 @@
+"""
+Open Library search and works lookups, the fallback metadata source
+
+Like google_books.py, answers go through the SQLite cache of api_cache.py
+(under keys prefixed with "openlibrary"), so repeated runs make no
+requests. A book takes a search request and, for its description, one
+request for the matching work. The base URLs can be pointed at a stand-in
+server (e.g. benchmarks/mock_books_api.py) with $OPEN_LIBRARY_URL and
+$OPEN_LIBRARY_COVERS_URL or set_base_url().
+"""
+
+import os
+import urllib.parse
+from typing import Dict, Optional
+
+import api_cache
+import enrich_profile
+import http_client
+from rate_limit import TokenBucket
+
+DEFAULT_BASE_URL = 'https://openlibrary.org'
+DEFAULT_COVERS_URL = 'https://covers.openlibrary.org'
+BASE_URL = os.environ.get('OPEN_LIBRARY_URL', DEFAULT_BASE_URL).rstrip('/')
+COVERS_URL = os.environ.get('OPEN_LIBRARY_COVERS_URL', DEFAULT_COVERS_URL).rstrip('/')
+
+# Search doc fields that book_metadata uses
+SEARCH_FIELDS = ('key,title,author_name,first_publish_year,publisher,isbn,language,'
+                 'cover_i,number_of_pages_median,subject')
+
+# Open Library's MARC language codes of the languages in the library
+LANGUAGES = {'ger': 'de', 'eng': 'en', 'fre': 'fr', 'spa': 'es', 'ita': 'it',
+             'swe': 'sv', 'nor': 'no', 'dan': 'da', 'dut': 'nl'}
+
+
+def set_base_url(base_url: str, covers_url: Optional[str] = None) -> None:
+    """Send requests to another server implementing /search.json and /works"""
+    global BASE_URL, COVERS_URL
+    BASE_URL = base_url.rstrip('/')
+    COVERS_URL = (covers_url or base_url).rstrip('/')
+
+
+def _cache_query(kind: str, value: str) -> str:
+    """Cache key; answers of other servers never mix with the real API's"""
+    prefix = 'openlibrary' if BASE_URL == DEFAULT_BASE_URL else f"openlibrary {BASE_URL}"
+    return f"{prefix} {kind} {value}"
+
+
+def _get_json(cache_query: str, url: str, limiter: Optional[TokenBucket]) -> Dict:
+    """Cached JSON of url; raises requests.RequestException on errors"""
+    cache = api_cache.get_cache()
+    with enrich_profile.span('cache_lookup'):
+        data = cache.get(cache_query)
+    if data is not None:
+        return data
+
+    if limiter is not None:
+        with enrich_profile.span('rate_limit'):
+            limiter.acquire()
+    with enrich_profile.span('server'):
+        response = http_client.get(url)
+    response.raise_for_status()
+    with enrich_profile.span('decode'):
+        data = response.json()
+    with enrich_profile.span('cache_store'):
+        cache.put(cache_query, response.text, response.headers.get('ETag'))
+    return data
+
+
+def is_cached(query: str) -> bool:
+    """True if the search for query is answered from the cache"""
+    return api_cache.get_cache().fresh(_cache_query('search', query))
+
+
+def search_docs(query: str, limiter: Optional[TokenBucket] = None) -> Dict:
+    """Raw search.json response for query (best match only)"""
+    url = (f"{BASE_URL}/search.json?q={urllib.parse.quote(query)}&limit=1"
+           f"&fields={urllib.parse.quote(SEARCH_FIELDS, safe=',')}")
+    return _get_json(_cache_query('search', query), url, limiter)
+
+
+def get_work(key: str, limiter: Optional[TokenBucket] = None) -> Dict:
+    """Raw work resource, key like '/works/OL45804W'"""
+    return _get_json(_cache_query('work', key), f"{BASE_URL}{key}.json", limiter)
+
+
+def _description(work: Dict) -> Optional[str]:
+    """Description of a work, which is either text or {'type', 'value'}"""
+    description = work.get('description')
+    if isinstance(description, dict):
+        description = description.get('value')
+    return description or None
+
+
+def book_metadata(doc: Dict, work: Optional[Dict] = None) -> Dict:
+    """Search doc (and its work) as a search_google_books-shaped result"""
+    isbns = doc.get('isbn', [])
+    isbn = next((i for i in isbns if len(i) == 13), isbns[0] if isbns else None)
+    languages = doc.get('language', [])
+
+    return {
+        'google_books_id': None,
+        'description': _description(work or {}),
+        'publisher': (doc.get('publisher') or [None])[0],
+        'published_date': str(doc['first_publish_year']) if doc.get('first_publish_year') else None,
+        'page_count': doc.get('number_of_pages_median'),
+        'categories': doc.get('subject', [])[:3],
+        'language': LANGUAGES.get(languages[0], languages[0]) if languages else None,
+        'isbn': isbn,
+        'cover_url': f"{COVERS_URL}/b/id/{doc['cover_i']}-L.jpg" if doc.get('cover_i') else None,
+    }
+
+
+def search_book(query: str, limiter: Optional[TokenBucket] = None) -> Optional[Dict]:
+    """
+    Metadata of the best match for query, or None if nothing was found.
+    Raises requests.RequestException on network and HTTP errors
+    """
+    docs = search_docs(query, limiter).get('docs')
+    if not docs:
+        return None
+    work = get_work(docs[0]['key'], limiter) if docs[0].get('key') else None
+    return book_metadata(docs[0], work)
@@ -3,103 +3,361 @@
 Script to parse book files and create a structured JSON database
 """
 
+import argparse
+import bisect
+import hashlib
+import io
 import re
 import json
-from typing import List, Dict, Optional
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from pathlib import Path
+import zlib
+
+import parser_stats
+from german_dates import parse_book_list_date
+
+BOOK_FILES = ['books1.txt', 'books2.txt', 'books3.txt', 'books4.txt']
+
+# Large buffers keep streaming runs over multi-GB exports I/O-bound
+READ_BUFFER_SIZE = 1 << 20
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Byte size of the line-aligned chunks handed to worker processes
+CHUNK_SIZE = 4 << 20
+
+# Incremental mode: blocks average about 256 lines and never exceed 1024
+BLOCK_MASK = 0xFF
+MAX_BLOCK_LINES = 1024
+MANIFEST_VERSION = 1
 
 
 def parse_date(text: str) -> Optional[Dict[str, int]]:
     """Extract year and month from text"""
+    stats = parser_stats.STATS
+    if stats is not None:
+        return _parse_date_profiled(text, stats)
+
     if not text:
         return None
 
-    # Common German month abbreviations
-    months = {
-        'jan': 1, 'januar': 1, 'feb': 2, 'februar': 2, 'märz': 3, 'mar': 3,
-        'april': 4, 'apr': 4, 'mai': 5, 'juni': 6, 'juli': 7, 'aug': 8,
-        'august': 8, 'sep': 9, 'sept': 9, 'september': 9, 'okt': 10,
-        'oktober': 10, 'nov': 11, 'november': 11, 'dez': 12, 'dezember': 12
-    }
+    date = parse_book_list_date(text)
+    if date:
+        return {'year': date[0], 'month': date[1]}
 
-    text_lower = text.lower().strip()
+    return None
 
-    # Try to find year (2-digit or 4-digit)
-    year_match = re.search(r'\b(20\d{2}|0[6-9]|1[0-9]|2[0-5])\b', text_lower)
-    if year_match:
-        year = int(year_match.group(1))
-        # Convert 2-digit to 4-digit year
-        if year < 100:
-            year = 2000 + year if year < 50 else 1900 + year
 
-        # Try to find month
-        for month_name, month_num in months.items():
-            if month_name in text_lower:
-                return {'year': year, 'month': month_num}
+def _parse_date_profiled(text: str, stats: parser_stats.ParserStats) -> Optional[Dict[str, int]]:
+    """parse_date that records the outcome and its cost"""
+    start = time.perf_counter_ns()
+    date = parse_book_list_date(text) if text else None
+    elapsed = time.perf_counter_ns() - start
 
-        return {'year': year, 'month': None}
+    if not text:
+        outcome = 'empty'
+    elif not date:
+        outcome = 'no_year'
+    elif date[1] is None:
+        outcome = 'year_only'
+    else:
+        outcome = 'year_month'
+    stats.record('date', outcome, ns=elapsed)
+
+    return {'year': date[0], 'month': date[1]} if date else None
 
-    return None
+
+# Series markers: searched ignoring case, removed with the exact pattern
+SERIES_RULES = [
+    ('band', r'\(Band\s+(\d+)\)'),
+    ('nth_fall', r'\((\d+)\.\s*Fall\)'),
+    ('fall', r'\(Fall\s+(\d+)\)'),
+    ('nth', r'\s+\((\d+)\.\)'),
+]
+SERIES_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE), re.compile(pattern))
+                   for name, pattern in SERIES_RULES]
 
 
 def extract_series_info(title: str) -> tuple:
     """Extract series information from title, return (clean_title, volume)"""
+    stats = parser_stats.STATS
+
     # Look for patterns like (Band 1), (Fall 2), etc.
-    series_patterns = [
-        (r'\(Band\s+(\d+)\)', 'remove'),
-        (r'\((\d+)\.\s*Fall\)', 'remove'),
-        (r'\(Fall\s+(\d+)\)', 'remove'),
-        (r'\s+\((\d+)\.\)', 'remove'),
-    ]
-
-    for pattern, action in series_patterns:
-        match = re.search(pattern, title, re.IGNORECASE)
+    for name, search_re, remove_re in SERIES_PATTERNS:
+        if stats is not None:
+            start = time.perf_counter_ns()
+            match = search_re.search(title)
+            stats.record('series', name, bool(match), time.perf_counter_ns() - start)
+        else:
+            match = search_re.search(title)
         if match:
             volume = int(match.group(1))
-            clean_title = re.sub(pattern, '', title).strip()
+            clean_title = remove_re.sub('', title).strip()
             return clean_title, volume
 
     return title, None
 
 
+# Skip rules for description blocks, checked against the start of a line.
+# Order matters: the first rule that matches is the one reported.
+SKIP_RULES = [
+    ('quote', r'^>>'),  # Quotes
+    ('als', r'^\s*Als\s+'),  # Description lines
+    ('ein', r'^\s*Ein\s+'),  # Description lines
+    ('in', r'^\s*In\s+'),  # Description lines
+    ('sie', r'^\s*Sie\s+'),  # Description lines
+    ('er', r'^\s*Er\s+'),  # Description lines
+    ('die_word', r'^\s*Die\s+[A-Z][a-z]+\s+'),  # "Die Geschichte..."
+    ('vom', r'^\s*Vom\s+'),  # Description lines
+    ('mit', r'^\s*Mit\s+'),  # Description lines
+    ('fuer', r'^\s*Für\s+'),  # Description lines
+    ('auf', r'^\s*Auf\s+'),  # Description lines
+    ('seit', r'^\s*Seit\s+'),  # Description lines
+    ('nach', r'^\s*Nach\s+'),  # Description lines
+    ('waehrend', r'^\s*Während\s+'),  # Description lines
+    ('place_im', r'^\s*[A-Z][a-z]+,?\s+im\s+'),  # "Berlin, im Sommer..."
+]
+
+# Note rules: the title is everything up to the first of these that matches.
+# Order matters: an earlier rule wins even if a later one matches further left.
+NOTE_RULES = [
+    ('meh', r'\s+😐.*$'),
+    ('top', r'\s+TOP!.*$'),
+    ('super', r'\s+super!.*$'),
+    ('nee', r'\s+nee!.*$'),
+    ('zum_heulen', r'\s+zum heulen.*$'),
+    ('dashes', r'\s+-[^-]+-.*$'),  # things in dashes like "-Heidi-"
+    ('selbst', r'\s+selbst.*$'),
+]
+
+
+def _compile_skip_rules(rules: List[Tuple[str, str]]) -> re.Pattern:
+    """Compile skip rules into one anchored alternation with a group per rule"""
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in rules))
+
+
+def _compile_note_rules(rules: List[Tuple[str, str]]) -> re.Pattern:
+    """
+    Compile note rules into one alternation that keeps rule priority.
+
+    Each branch scans the whole text for its rule before the next branch is
+    tried, so the result is the same as searching the rules one at a time.
+    """
+    branches = [f'^(?s:.*?)(?P<{name}>{pattern})' for name, pattern in rules]
+    return re.compile('|'.join(branches), re.IGNORECASE)
+
+
+SKIP_RE = _compile_skip_rules(SKIP_RULES)
+NOTE_RE = _compile_note_rules(NOTE_RULES)
+
+AUTHOR_LOCATION_RE = re.compile(r'^(.+?)\s*\(([^)]+)\)$')
+PARENTHETICAL_RE = re.compile(r'\(([^)]+)\)')
+LINE_NUMBER_RE = re.compile(r'^\s*\d+→')
+
+
+# Single rules, used instead of the alternations when collecting statistics
+SKIP_PATTERNS = [(name, re.compile(pattern)) for name, pattern in SKIP_RULES]
+NOTE_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in NOTE_RULES]
+
+
+def classify_line(line: str) -> Optional[str]:
+    """Return the name of the skip rule matching a stripped line, or None"""
+    stats = parser_stats.STATS
+    if stats is not None:
+        # Same result as SKIP_RE, but every rule is counted and timed
+        for name, pattern in SKIP_PATTERNS:
+            start = time.perf_counter_ns()
+            match = pattern.match(line)
+            stats.record('skip', name, bool(match), time.perf_counter_ns() - start)
+            if match:
+                return name
+        return None
+
+    match = SKIP_RE.match(line)
+    if match:
+        return match.lastgroup
+    return None
+
+
+def split_notes(text: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Split text into (title, notes, note_rule) using the note rules"""
+    stats = parser_stats.STATS
+    if stats is not None:
+        # Same result as NOTE_RE, but every rule is counted and timed
+        for name, pattern in NOTE_PATTERNS:
+            start = time.perf_counter_ns()
+            match = pattern.search(text)
+            stats.record('note', name, bool(match), time.perf_counter_ns() - start)
+            if match:
+                return text[:match.start()].strip(), match.group(0).strip(), name
+        return text, None, None
+
+    match = NOTE_RE.match(text)
+    if not match:
+        return text, None, None
+
+    rule = match.lastgroup
+    return text[:match.start(rule)].strip(), match.group(rule).strip(), rule
+
+
+# First words that can start a skip rule, and second word of "Berlin, im ..."
+SKIP_FIRST_WORDS = frozenset({
+    'Als', 'Ein', 'In', 'Sie', 'Er', 'Die', 'Vom', 'Mit', 'Für', 'Auf', 'Seit',
+    'Nach', 'Während',
+})
+SKIP_SECOND_WORD = 'im'
+
+# Lower-cased text that starts a note rule when it follows whitespace
+NOTE_MARKERS = ('😐', 'top!', 'super!', 'nee!', 'zum heulen', '-', 'selbst')
+
+# Returned by parse_book_line_fast when a line needs the full regex rules
+FALLBACK = object()
+
+
+def _is_capitalized(word: str) -> bool:
+    """True if word matches [A-Z][a-z]+ exactly"""
+    rest = word[1:]
+    return ('A' <= word[0] <= 'Z' and rest.isascii() and rest.isalpha()
+            and rest.islower())
+
+
+def _may_have_note(text: str) -> bool:
+    """True if any note rule could match text (may give false positives)"""
+    probe = text.lower()
+    # 'ſ' matches 's' when the rules ignore case, leave it to the regexes
+    if 'ſ' in probe:
+        return True
+
+    for marker in NOTE_MARKERS:
+        pos = probe.find(marker)
+        while pos != -1:
+            if pos > 0 and probe[pos - 1].isspace():
+                return True
+            pos = probe.find(marker, pos + 1)
+
+    return False
+
+
+def parse_book_line_fast(line: str):
+    """
+    Parse the common "Author: Title (date) notes" shape without regexes.
+
+    Returns the same result as parse_book_line_regex, or FALLBACK when the
+    line might hit a note rule, a series marker, an author location or an
+    unusual skip rule, so only the regex rules can decide it.
+    """
+    line = line.strip()
+
+    # Too short or no colon: never a book, whatever the skip rules say
+    if len(line) < 15 or ':' not in line:
+        return None
+
+    if line.startswith('>>'):
+        return None
+    words = line.split(None, 2)
+    if words[0] in SKIP_FIRST_WORDS and len(words) > 1:
+        # "Als ...", "Ein ...": skipped. "Die" also needs a capitalized word
+        if words[0] != 'Die' or (len(words) > 2 and _is_capitalized(words[1])):
+            return None
+    if len(words) > 1 and words[1] == SKIP_SECOND_WORD:
+        return FALLBACK
+
+    author, _, rest = line.partition(':')
+    author = author.strip()
+    if author.endswith(')'):
+        return FALLBACK
+    rest = rest.strip()
+
+    # Same matches as PARENTHETICAL_RE: "(" up to the next ")", not empty
+    parentheticals = []
+    pieces = []
+    pos = 0
+    while True:
+        open_pos = rest.find('(', pos)
+        if open_pos == -1:
+            break
+        close_pos = rest.find(')', open_pos + 1)
+        if close_pos == -1:
+            break
+        if close_pos == open_pos + 1:
+            return FALLBACK
+        parentheticals.append(rest[open_pos + 1:close_pos])
+        pieces.append(rest[pos:open_pos])
+        pos = close_pos + 1
+    pieces.append(rest[pos:])
+    title = ''.join(pieces).strip()
+
+    # Leftover parentheses could still make a series marker
+    if '(' in title:
+        return FALLBACK
+
+    if _may_have_note(title):
+        return FALLBACK
+
+    if len(title) < 2:
+        return None
+
+    date = None
+    for paren in parentheticals:
+        date = parse_book_list_date(paren)
+        if date:
+            break
+
+    return {
+        'author': author,
+        'title': title,
+        'location': None,
+        'series_volume': None,
+        'year': date[0] if date else None,
+        'month': date[1] if date else None,
+        'notes': None
+    }
+
+
 def parse_book_line(line: str) -> Optional[Dict]:
     """Parse a single book line and extract information"""
+    if parser_stats.STATS is not None:
+        # Statistics need every rule evaluated, so skip the fast path
+        return parse_book_line_regex(line)
+
+    book = parse_book_line_fast(line)
+    if book is FALLBACK:
+        return parse_book_line_regex(line)
+    return book
+
+
+def _line_outcome(outcome: str) -> None:
+    """Record what happened to a line, if statistics are on"""
+    stats = parser_stats.STATS
+    if stats is not None:
+        stats.record('line', outcome)
+
+
+def parse_book_line_regex(line: str) -> Optional[Dict]:
+    """Parse a single book line with the full regex rules"""
     line = line.strip()
 
     # Skip empty lines
     if not line:
+        _line_outcome('empty')
         return None
 
     # Skip description blocks (they start with specific patterns)
-    skip_patterns = [
-        r'^>>',  # Quotes
-        r'^\s*Als\s+',  # Description lines
-        r'^\s*Ein\s+',  # Description lines
-        r'^\s*In\s+',  # Description lines
-        r'^\s*Sie\s+',  # Description lines
-        r'^\s*Er\s+',  # Description lines
-        r'^\s*Die\s+[A-Z][a-z]+\s+',  # "Die Geschichte..."
-        r'^\s*Vom\s+',  # Description lines
-        r'^\s*Mit\s+',  # Description lines
-        r'^\s*Für\s+',  # Description lines
-        r'^\s*Auf\s+',  # Description lines
-        r'^\s*Seit\s+',  # Description lines
-        r'^\s*Nach\s+',  # Description lines
-        r'^\s*Während\s+',  # Description lines
-        r'^\s*[A-Z][a-z]+,?\s+im\s+',  # "Berlin, im Sommer..."
-    ]
-
-    for pattern in skip_patterns:
-        if re.match(pattern, line):
-            return None
+    if classify_line(line):
+        _line_outcome('skip_rule')
+        return None
 
     # Skip lines that are too short to be book entries
     if len(line) < 15:
+        _line_outcome('too_short')
         return None
 
     # Main pattern: Author: Title (anything in parenthesis) trailing notes
     # Split by colon to get author and rest
     if ':' not in line:
+        _line_outcome('no_colon')
         return None
 
     parts = line.split(':', 1)
@@ -111,7 +369,7 @@ def parse_book_line(line: str) -> Optional[Dict]:
 
     # Extract location from author if present (e.g., "Kepler, Lars (Bergisch Gladbach)")
     location = None
-    author_location_match = re.match(r'^(.+?)\s*\(([^)]+)\)$', author_part)
+    author_location_match = AUTHOR_LOCATION_RE.match(author_part)
     if author_location_match:
         author = author_location_match.group(1).strip()
         location = author_location_match.group(2).strip()
@@ -120,30 +378,13 @@ def parse_book_line(line: str) -> Optional[Dict]:
 
     # Now parse the rest: Title (date/info) notes
     # Find all parenthetical expressions
-    parentheticals = re.findall(r'\(([^)]+)\)', rest)
+    parentheticals = PARENTHETICAL_RE.findall(rest)
 
     # Remove all parentheticals from rest to get base title + notes
-    title_and_notes = re.sub(r'\([^)]+\)', '', rest).strip()
+    title_and_notes = PARENTHETICAL_RE.sub('', rest).strip()
 
     # The title is everything up to common note patterns
-    note_patterns = [
-        r'\s+😐.*$',
-        r'\s+TOP!.*$',
-        r'\s+super!.*$',
-        r'\s+nee!.*$',
-        r'\s+zum heulen.*$',
-        r'\s+-[^-]+-.*$',  # things in dashes like "-Heidi-"
-        r'\s+selbst.*$',
-    ]
-
-    notes = None
-    title = title_and_notes
-    for note_pattern in note_patterns:
-        match = re.search(note_pattern, title_and_notes, re.IGNORECASE)
-        if match:
-            notes = match.group(0).strip()
-            title = re.sub(note_pattern, '', title_and_notes, flags=re.IGNORECASE).strip()
-            break
+    title, notes, _ = split_notes(title_and_notes)
 
     # Extract series info from title
     title, series_volume = extract_series_info(title)
@@ -171,37 +412,574 @@ def parse_book_line(line: str) -> Optional[Dict]:
 
     # Skip if no actual title
     if not book['title'] or len(book['title']) < 2:
+        _line_outcome('no_title')
         return None
 
+    _line_outcome('book')
     return book
 
 
-def parse_file(filepath: Path) -> List[Dict]:
-    """Parse a single book file"""
-    books = []
-
-    with open(filepath, 'r', encoding='utf-8') as f:
+def iter_books(filepath: Path) -> Iterator[Dict]:
+    """Yield parsed books from a file one at a time, in file order"""
+    with open(filepath, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
         for line in f:
             # Remove line numbers (format: "     1→")
-            line = re.sub(r'^\s*\d+→', '', line)
+            if '→' in line:
+                line = LINE_NUMBER_RE.sub('', line)
 
             book = parse_book_line(line)
             if book:
-                books.append(book)
+                yield book
+
+
+def parse_file(filepath: Path) -> List[Dict]:
+    """Parse a single book file"""
+    return list(iter_books(filepath))
+
+
+def split_ranges(filepath: Path, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Split a file into line-aligned (start, end) byte ranges of about chunk_size"""
+    size = filepath.stat().st_size
+    ranges = []
+    start = 0
+
+    with open(filepath, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # Move the cut to just after the next newline
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+def parse_bytes(data: bytes) -> List[Dict]:
+    """Parse the books in a line-aligned piece of a UTF-8 file"""
+    books = []
+    # StringIO with newline=None splits lines exactly like text-mode open()
+    for line in io.StringIO(data.decode('utf-8'), newline=None):
+        if '→' in line:
+            line = LINE_NUMBER_RE.sub('', line)
+
+        book = parse_book_line(line)
+        if book:
+            books.append(book)
 
     return books
 
 
-def main():
+def parse_range(filepath: Path, start: int, end: int) -> List[Dict]:
+    """Parse the books in one line-aligned byte range of a file"""
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        return parse_bytes(f.read(end - start))
+
+
+def _parse_range_task(filepath: Path, start: int, end: int,
+                      with_stats: bool) -> Tuple[List[Dict], Optional[Dict]]:
+    """Worker entry point: parse a range and return its rule statistics too"""
+    if not with_stats:
+        return parse_range(filepath, start, end), None
+
+    stats = parser_stats.enable()
+    books = parse_range(filepath, start, end)
+    parser_stats.disable()
+    return books, stats.to_dict()
+
+
+def iter_chunks_parallel(filepaths: List[Path], workers: int,
+                         chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[Path, List[Dict]]]:
+    """
+    Parse files in a process pool and yield (filepath, books) per chunk.
+
+    Chunks are yielded in file and line order. Only a bounded window of
+    chunks is in flight at once, so memory does not grow with file size.
+    Rule statistics collected in the workers are merged into this process.
+    """
+    stats = parser_stats.STATS
+    tasks = ((filepath, start, end)
+             for filepath in filepaths
+             for start, end in split_ranges(filepath, chunk_size))
+    window = workers * 2
+    pending = deque()
+
+    def result(future):
+        books, worker_stats = future.result()
+        if worker_stats:
+            stats.merge(worker_stats)
+        return books
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for filepath, start, end in tasks:
+            future = executor.submit(_parse_range_task, filepath, start, end, stats is not None)
+            pending.append((filepath, future))
+            if len(pending) >= window:
+                filepath, future = pending.popleft()
+                yield filepath, result(future)
+
+        while pending:
+            filepath, future = pending.popleft()
+            yield filepath, result(future)
+
+
+def sort_key(book: Dict) -> Tuple[int, int]:
+    """Sort key used for the database: by year and month, undated books last"""
+    return (
+        book['year'] if book['year'] else 9999,
+        book['month'] if book['month'] else 99
+    )
+
+
+def format_record(book: Dict) -> str:
+    """Format a book the way json.dump(..., indent=2) nests it inside a list"""
+    text = json.dumps(book, ensure_ascii=False, indent=2)
+    return '  ' + text.replace('\n', '\n  ')
+
+
+def write_books(books: Iterable[Dict], f: TextIO, fmt: str = 'json') -> int:
+    """
+    Stream books to an open text file and return how many were written.
+
+    'jsonl' writes one compact record per line. 'json' writes the same
+    indented array json.dump would, without holding the list in memory.
+    """
+    count = 0
+
+    if fmt == 'jsonl':
+        for book in books:
+            f.write(json.dumps(book, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+        return count
+
+    for book in books:
+        f.write('[\n' if count == 0 else ',\n')
+        f.write(format_record(book))
+        count += 1
+
+    f.write('\n]' if count else '[]')
+    return count
+
+
+def stream_files(filepaths: List[Path], output_file: Path, fmt: str, workers: int = 1) -> None:
+    """Parse files straight into the output file with constant memory"""
+    year_range = [None, None]
+
+    def parsed():
+        if workers > 1:
+            for _, books in iter_chunks_parallel(filepaths, workers):
+                yield from books
+            return
+
+        for filepath in filepaths:
+            print(f"Parsing {filepath}...")
+            yield from iter_books(filepath)
+
+    def books():
+        for book in parsed():
+            year = book['year']
+            if year:
+                if year_range[0] is None or year < year_range[0]:
+                    year_range[0] = year
+                if year_range[1] is None or year > year_range[1]:
+                    year_range[1] = year
+            yield book
+
+    with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        count = write_books(books(), f, fmt)
+
+    print(f"\nStreamed {count} books to {output_file} (unsorted)")
+    if year_range[0] is not None:
+        print(f"\nDate range: {year_range[0]} - {year_range[1]}")
+
+
+def manifest_paths(output_file: Path) -> Tuple[Path, Path]:
+    """Sidecar manifest and block cache files that belong to a database"""
+    return (output_file.with_name(output_file.stem + '.manifest.json'),
+            output_file.with_name(output_file.stem + '.blocks.jsonl'))
+
+
+def iter_blocks(filepath: Path, file_hash=None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Split a file into content-defined blocks of whole lines.
+
+    A block ends after a line whose CRC has its low bits all zero, so
+    inserting or editing a line only changes the block around it instead of
+    shifting every later block. Yields (offset, data) for each block.
+    """
+    offset = 0
+    lines = []
+    with open(filepath, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        for raw in f:
+            lines.append(raw)
+            if len(lines) >= MAX_BLOCK_LINES or zlib.crc32(raw) & BLOCK_MASK == 0:
+                data = b''.join(lines)
+                if file_hash is not None:
+                    file_hash.update(data)
+                yield offset, data
+                offset += len(data)
+                lines = []
+
+    if lines:
+        data = b''.join(lines)
+        if file_hash is not None:
+            file_hash.update(data)
+        yield offset, data
+
+
+def block_digest(data: bytes) -> str:
+    """Checksum of a block or file"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_manifest(manifest_file: Path) -> Dict:
+    """Load the manifest of the last incremental run, if it is usable"""
+    if not manifest_file.exists():
+        return {}
+
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+
+    return manifest
+
+
+def load_block_cache(cache_file: Path) -> Dict[str, List[Dict]]:
+    """Load the parsed books of every cached block, keyed by block digest"""
+    cache = {}
+    if not cache_file.exists():
+        return cache
+
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            cache[entry['digest']] = entry['records']
+
+    return cache
+
+
+def save_manifest(manifest: Dict, manifest_file: Path) -> None:
+    """Write the manifest"""
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def write_database(books: List[Dict], output_file: Path) -> List[List[int]]:
+    """
+    Write sorted books exactly like json.dump(..., indent=2) does.
+
+    Returns one [year_key, month_key, end_offset] entry per sort key, where
+    end_offset is the byte offset just past the last book with that key.
+    """
+    groups = []
+    offset = 0
+
+    with open(output_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        for i, book in enumerate(books):
+            data = (('[\n' if i == 0 else ',\n') + format_record(book)).encode('utf-8')
+            f.write(data)
+            offset += len(data)
+
+            key = list(sort_key(book))
+            if groups and groups[-1][:2] == key:
+                groups[-1][2] = offset
+            else:
+                groups.append(key + [offset])
+
+        f.write(b'\n]' if books else b'[]')
+
+    return groups
+
+
+def database_state(output_file: Path, count: int, groups: List[List[int]]) -> Dict:
+    """Describe the written database so the next run can tell if it changed"""
+    stat = output_file.stat()
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'count': count,
+        'groups': groups,
+    }
+
+
+def find_appends(filepaths: List[Path], output_file: Path, manifest: Dict) -> Optional[List[Tuple]]:
+    """
+    Detect source files that only had lines appended since the last run.
+
+    Returns [(filepath, appended_bytes, new_file_digest, stat)] if every
+    file is either unchanged or only grew, and the database on disk is the
+    one the manifest describes. Returns None when a rebuild is needed.
+    """
+    files = manifest.get('files', {})
+    database = manifest.get('database')
+    if not filepaths or [str(filepath) for filepath in filepaths] != list(files) or not database:
+        return None
+
+    if not output_file.exists():
+        return None
+    stat = output_file.stat()
+    if (stat.st_size, stat.st_mtime_ns) != (database['size'], database['mtime_ns']):
+        return None
+
+    appended = []
+    for filepath in filepaths:
+        entry = files[str(filepath)]
+        stat = filepath.stat()
+        if (stat.st_size, stat.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+            continue
+        if stat.st_size <= entry['size'] or not entry['ends_with_newline']:
+            return None
+
+        with open(filepath, 'rb') as f:
+            prefix = f.read(entry['size'])
+            file_hash = hashlib.blake2b(prefix, digest_size=16)
+            # hexdigest() does not finalize, so the hash can keep going
+            if file_hash.hexdigest() != entry['digest']:
+                return None
+            data = f.read()
+            file_hash.update(data)
+
+        appended.append((filepath, data, file_hash.hexdigest(), stat))
+
+    return appended
+
+
+def plan_inserts(new_books: List[Tuple[Path, Dict]], groups: List[List[int]],
+                 last_file: Path) -> Optional[Dict[int, List[Dict]]]:
+    """
+    Work out where appended books go in the sorted database.
+
+    A full rebuild stable-sorts all files in order, so a book appended to
+    the last file goes after every existing book with the same key. For
+    other files that only holds if no existing book shares the key.
+    Returns {byte_offset: [books]} or None if a book has no safe slot.
+    """
+    keys = [tuple(group[:2]) for group in groups]
+    inserts = {}
+
+    for filepath, book in new_books:
+        key = sort_key(book)
+        index = bisect.bisect_right(keys, key) - 1
+        if index < 0:
+            return None
+        if keys[index] == key and filepath != last_file:
+            return None
+        inserts.setdefault(groups[index][2], []).append(book)
+
+    return inserts
+
+
+def insert_into_database(output_file: Path, inserts: Dict[int, List[Dict]],
+                         groups: List[List[int]]) -> List[List[int]]:
+    """Splice books into the database file and return the updated groups"""
+    blobs = {}
+    for offset, books in inserts.items():
+        books.sort(key=sort_key)
+        blobs[offset] = [(sort_key(book), (',\n' + format_record(book)).encode('utf-8'))
+                         for book in books]
+
+    # Rewrite only the tail of the file, from the first insert onwards
+    start = min(inserts)
+    with open(output_file, 'r+b') as f:
+        f.seek(start)
+        tail = f.read()
+
+        pieces = []
+        position = start
+        for offset in sorted(blobs):
+            pieces.append(tail[position - start:offset - start])
+            pieces.extend(data for _, data in blobs[offset])
+            position = offset
+        pieces.append(tail[position - start:])
+
+        f.seek(start)
+        f.write(b''.join(pieces))
+
+    # Shift group ends past the inserted bytes and add groups for new keys
+    updated = []
+    shift = 0
+    for year_key, month_key, offset in groups:
+        updated.append([year_key, month_key, offset + shift])
+        for key, data in blobs.get(offset, []):
+            shift += len(data)
+            if tuple(updated[-1][:2]) == key:
+                updated[-1][2] = offset + shift
+            else:
+                updated.append(list(key) + [offset + shift])
+
+    return updated
+
+
+def update_incremental(filepaths: List[Path], output_file: Path) -> Optional[List[Dict]]:
+    """
+    Bring the database up to date, re-parsing only changed blocks.
+
+    Books appended to the source files are parsed on their own and spliced
+    into the database in place, and None is returned. Otherwise unchanged
+    blocks are taken from the block cache, the database is rewritten and
+    the full book list is returned.
+    """
+    manifest_file, cache_file = manifest_paths(output_file)
+    manifest = load_manifest(manifest_file)
+
+    appended = find_appends(filepaths, output_file, manifest) if manifest else None
+    if appended is not None:
+        database = manifest['database']
+        new_blocks = []
+        new_books = []
+
+        for filepath, data, digest, stat in appended:
+            books = parse_bytes(data)
+            new_blocks.append((filepath, data, digest, stat, books))
+            new_books.extend((filepath, book) for book in books)
+
+        inserts = plan_inserts(new_books, database['groups'], filepaths[-1])
+        if inserts is not None:
+            if inserts:
+                database['groups'] = insert_into_database(output_file, inserts, database['groups'])
+
+            with open(cache_file, 'a', encoding='utf-8') as f:
+                for filepath, data, digest, stat, books in new_blocks:
+                    block = block_digest(data)
+                    entry = manifest['files'][str(filepath)]
+                    entry['blocks'].append({'offset': entry['size'], 'length': len(data), 'digest': block})
+                    entry.update({
+                        'size': stat.st_size,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'digest': digest,
+                        'ends_with_newline': data.endswith(b'\n'),
+                    })
+                    f.write(json.dumps({'digest': block, 'records': books}, ensure_ascii=False) + '\n')
+
+            manifest['database'] = database_state(output_file, database['count'] + len(new_books),
+                                                  database['groups'])
+            save_manifest(manifest, manifest_file)
+
+            if new_books:
+                print(f"⚡ Added {len(new_books)} new books to {output_file} "
+                      f"({manifest['database']['count']} total)")
+            else:
+                print(f"✓ {output_file} is up to date ({database['count']} books)")
+            return None
+
+    # Rebuild from blocks, parsing only the ones not in the cache
+    cache = load_block_cache(cache_file) if manifest else {}
+    all_books = []
+    files = {}
+    live_blocks = {}
+    reused = parsed = 0
+
+    for filepath in filepaths:
+        stat = filepath.stat()
+        file_hash = hashlib.blake2b(digest_size=16)
+        blocks = []
+        last_data = b''
+
+        for offset, data in iter_blocks(filepath, file_hash):
+            digest = block_digest(data)
+            if digest in cache:
+                books = cache[digest]
+                reused += 1
+            else:
+                books = parse_bytes(data)
+                parsed += 1
+            live_blocks[digest] = books
+            blocks.append({'offset': offset, 'length': len(data), 'digest': digest})
+            all_books.extend(books)
+            last_data = data
+
+        files[str(filepath)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': file_hash.hexdigest(),
+            'ends_with_newline': last_data.endswith(b'\n') or not last_data,
+            'blocks': blocks,
+        }
+
+    print(f"♻ Reused {reused} cached blocks, parsed {parsed} changed blocks")
+
+    all_books.sort(key=sort_key)
+    groups = write_database(all_books, output_file)
+
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        for digest, books in live_blocks.items():
+            f.write(json.dumps({'digest': digest, 'records': books}, ensure_ascii=False) + '\n')
+
+    save_manifest({
+        'version': MANIFEST_VERSION,
+        'files': files,
+        'database': database_state(output_file, len(all_books), groups),
+    }, manifest_file)
+
+    return all_books
+
+
+def main(argv: Optional[List[str]] = None):
     """Main parsing function"""
+    parser = argparse.ArgumentParser(description='Parse book lists into a JSON database')
+    parser.add_argument('files', nargs='*', default=BOOK_FILES,
+                        help='book list files to parse (default: books1.txt ... books4.txt)')
+    parser.add_argument('-o', '--output', default='books_database.json',
+                        help='output file (default: books_database.json)')
+    parser.add_argument('--format', choices=['json', 'jsonl'],
+                        help='output format (default: from the output file extension)')
+    parser.add_argument('--stream', action='store_true',
+                        help='write books as they are parsed, in file order, with constant memory')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='parse line-aligned chunks in N processes (default: 1)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-parse blocks that changed since the last incremental run')
+    parser.add_argument('--stats', nargs='?', const='parser_stats.json', metavar='FILE',
+                        help='count and time every parser rule, print a report and save it '
+                             'as JSON (default: parser_stats.json)')
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        parser_stats.enable()
+    run(args, parser)
+    parser_stats.finish(args.stats)
+
+
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Parse the book files as selected on the command line"""
+    output_file = Path(args.output)
+    fmt = args.format or ('jsonl' if output_file.suffix == '.jsonl' else 'json')
+    filepaths = [Path(filename) for filename in args.files if Path(filename).exists()]
+
+    if args.stream:
+        stream_files(filepaths, output_file, fmt, args.workers)
+        return
+
+    if args.incremental:
+        if fmt != 'json':
+            parser.error('--incremental only supports JSON output')
+        all_books = update_incremental(filepaths, output_file)
+        if all_books is not None:
+            print(f"\nSaved {len(all_books)} books to {output_file}")
+            print_statistics(all_books)
+        return
+
     # Parse all book files
     all_books = []
-    book_files = ['books1.txt', 'books2.txt', 'books3.txt', 'books4.txt']
 
-    for filename in book_files:
-        filepath = Path(filename)
-        if filepath.exists():
-            print(f"Parsing {filename}...")
+    if args.workers > 1:
+        print(f"Parsing {len(filepaths)} files with {args.workers} workers...")
+        counts = {}
+        for filepath, books in iter_chunks_parallel(filepaths, args.workers):
+            all_books.extend(books)
+            counts[filepath] = counts.get(filepath, 0) + len(books)
+        for filepath in filepaths:
+            print(f"  {filepath}: {counts.get(filepath, 0)} books")
+    else:
+        for filepath in filepaths:
+            print(f"Parsing {filepath}...")
             books = parse_file(filepath)
             all_books.extend(books)
             print(f"  Found {len(books)} books")
@@ -209,19 +987,21 @@ def main():
     print(f"\nTotal books parsed: {len(all_books)}")
 
     # Sort by year and month
-    all_books.sort(key=lambda x: (
-        x['year'] if x['year'] else 9999,
-        x['month'] if x['month'] else 99
-    ))
+    all_books.sort(key=sort_key)
 
     # Save to JSON
-    output_file = 'books_database.json'
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_books, f, ensure_ascii=False, indent=2)
+        if fmt == 'jsonl':
+            write_books(all_books, f, fmt)
+        else:
+            json.dump(all_books, f, ensure_ascii=False, indent=2)
 
     print(f"\nSaved {len(all_books)} books to {output_file}")
+    print_statistics(all_books)
+
 
-    # Print some statistics
+def print_statistics(all_books: List[Dict]) -> None:
+    """Print date range and top authors"""
     years = [b['year'] for b in all_books if b['year']]
     if years:
         print(f"\nDate range: {min(years)} - {max(years)}")
@@ -4,15 +4,51 @@ Script to parse preparsed JSON files and create a structured database
 with Google Books API enrichment for missing data
 """
 
+import argparse
 import json
 import re
 import requests
 import time
+import unicodedata
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
-import urllib.parse
+from typing import Dict, Iterator, List, Optional
 from tqdm import tqdm
 
+import api_cache
+import enrich_profile
+import gazetteer
+import google_books
+import http_client
+import parser_stats
+import providers
+from checkpoint import CheckpointJournal
+from german_dates import parse_preparsed_date
+from rate_limit import AdaptiveRateLimiter, TokenBucket
+
+# Defaults for the Google Books API calls of full enrichment: the rate
+# starts at DEFAULT_RPS and adapts between that and DEFAULT_MAX_RPS
+DEFAULT_RPS = 2.0
+DEFAULT_MAX_RPS = 10.0
+DEFAULT_CONCURRENCY = 4
+
+# Requests per second to Open Library when it backs Google Books up
+DEFAULT_OPEN_LIBRARY_RPS = 2.0
+
+# Times a book is queued again after 429/503 answers before the run stops
+MAX_THROTTLED_ATTEMPTS = 8
+
+DATABASE_FILE = 'books_database.json'
+
+# Checkpoint of an enrichment run, removed once books_database.json is written
+JOURNAL_FILE = 'books_database.journal.jsonl'
+
+# Fields filled in from Google Books, reused by --incremental
+ENRICHMENT_FIELDS = ['description', 'google_books_id', 'publisher', 'published_date',
+                     'page_count', 'categories', 'language', 'isbn', 'cover_url']
+
 
 def parse_date(date_str: str) -> tuple[Optional[int], Optional[int]]:
     """
@@ -23,51 +59,47 @@ def parse_date(date_str: str) -> tuple[Optional[int], Optional[int]]:
       - "Jan. 2014" -> (2014, 1)
       - "2015-11-06" -> (2015, 11)
     """
+    stats = parser_stats.STATS
+    if stats is not None:
+        return _parse_date_profiled(date_str, stats)
+
     if not date_str:
         return None, None
 
-    # German month names/abbreviations
-    months_map = {
-        'jan': 1, 'januar': 1,
-        'feb': 2, 'februar': 2,
-        'mär': 3, 'märz': 3, 'mar': 3,
-        'apr': 4, 'april': 4,
-        'mai': 5,
-        'jun': 6, 'juni': 6,
-        'jul': 7, 'juli': 7,
-        'aug': 8, 'august': 8,
-        'sep': 9, 'sept': 9, 'september': 9,
-        'okt': 10, 'oktober': 10,
-        'nov': 11, 'november': 11,
-        'dez': 12, 'dezember': 12
-    }
+    return parse_preparsed_date(date_str)
 
-    date_lower = date_str.lower().strip().rstrip('.')
-
-    # Try ISO format first: YYYY-MM-DD
-    iso_match = re.match(r'(\d{4})-(\d{2})-\d{2}', date_lower)
-    if iso_match:
-        return int(iso_match.group(1)), int(iso_match.group(2))
-
-    # Try to find year (2-digit or 4-digit)
-    year_match = re.search(r'\b(20\d{2}|\d{2})\b', date_lower)
-    year = None
-    if year_match:
-        year = int(year_match.group(1))
-        # Convert 2-digit to 4-digit year
-        if year < 100:
-            year = 2000 + year if year < 50 else 1900 + year
-
-    # Try to find month
-    month = None
-    for month_name, month_num in months_map.items():
-        if month_name in date_lower:
-            month = month_num
-            break
+
+def _parse_date_profiled(date_str: str, stats: parser_stats.ParserStats) -> tuple[Optional[int], Optional[int]]:
+    """parse_date that records the outcome and its cost"""
+    start = time.perf_counter_ns()
+    year, month = parse_preparsed_date(date_str) if date_str else (None, None)
+    elapsed = time.perf_counter_ns() - start
+
+    if not date_str:
+        outcome = 'empty'
+    elif year and month:
+        outcome = 'year_month'
+    elif year:
+        outcome = 'year_only'
+    elif month:
+        outcome = 'month_only'
+    else:
+        outcome = 'unparsed'
+    stats.record('date', outcome, ns=elapsed)
 
     return year, month
 
 
+# Series markers: searched ignoring case, removed with the exact pattern
+SERIES_RULES = [
+    ('band', r'\(Band\s+(\d+)\)'),
+    ('nth_fall', r'\((\d+)\.\s*Fall\)'),
+    ('fall', r'\(Fall\s+(\d+)\)'),
+]
+SERIES_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE), re.compile(pattern))
+                   for name, pattern in SERIES_RULES]
+
+
 def extract_series_info(title: str) -> tuple[str, Optional[int]]:
     """
     Extract series volume from title
@@ -75,129 +107,218 @@ def extract_series_info(title: str) -> tuple[str, Optional[int]]:
       - "Der Hypnotiseur (Band 1)" -> ("Der Hypnotiseur", 1)
       - "Liar (Band 3)" -> ("Liar", 3)
     """
+    stats = parser_stats.STATS
+
     # Look for patterns like (Band X), (Fall X)
-    series_patterns = [
-        r'\(Band\s+(\d+)\)',
-        r'\((\d+)\.\s*Fall\)',
-        r'\(Fall\s+(\d+)\)',
-    ]
-
-    for pattern in series_patterns:
-        match = re.search(pattern, title, re.IGNORECASE)
+    for name, search_re, remove_re in SERIES_PATTERNS:
+        if stats is not None:
+            start = time.perf_counter_ns()
+            match = search_re.search(title)
+            stats.record('series', name, bool(match), time.perf_counter_ns() - start)
+        else:
+            match = search_re.search(title)
         if match:
             volume = int(match.group(1))
-            clean_title = re.sub(pattern, '', title).strip()
+            clean_title = remove_re.sub('', title).strip()
             return clean_title, volume
 
     return title, None
 
 
+# Notes mentioning a series are never locations
+SERIES_NOTE_RE = re.compile(r'\b(Fall|Band)\b', re.IGNORECASE)
+
+
 def extract_location_from_notes(notes: str) -> tuple[Optional[str], Optional[str]]:
     """
-    Extract location info from notes if it looks like a place
+    Extract location info from notes if they name a known place (see gazetteer.py)
     Returns (location, remaining_notes)
     Examples:
       - "Bergisch Gladbach" -> ("Bergisch Gladbach", None)
-      - "Sydney" -> ("Sydney", None)
+      - "sydney" -> ("Sydney", None)
+      - "Baskenland – Spanien" -> ("Baskenland – Spanien", None)
+      - "Bonn-Arzt und Wissenschaftler" -> ("Bonn", "Arzt und Wissenschaftler")
+      - "England - super!" -> ("England", "super!")
+      - "Romy" -> (None, "Romy")
       - "Fall 2" -> (None, "Fall 2")
       - "3. Fall 😐" -> (None, "3. Fall 😐")
     """
+    stats = parser_stats.STATS
+    if stats is None:
+        location, remaining_notes, _ = _classify_notes(notes)
+        return location, remaining_notes
+
+    start = time.perf_counter_ns()
+    location, remaining_notes, rule = _classify_notes(notes)
+    stats.record('location', rule, ns=time.perf_counter_ns() - start)
+    return location, remaining_notes
+
+
+def _classify_notes(notes: str) -> tuple[Optional[str], Optional[str], str]:
+    """extract_location_from_notes plus the name of the rule that decided it"""
     if not notes:
-        return None, None
+        return None, None, 'empty'
 
     notes = notes.strip()
 
     # Check if notes contain "Fall" or "Band" - these are not locations
-    if re.search(r'\b(Fall|Band)\b', notes, re.IGNORECASE):
-        return None, notes
+    if SERIES_NOTE_RE.search(notes):
+        return None, notes, 'series_marker'
+
+    # Known places, looked up in the gazetteer (see gazetteer.py)
+    places = gazetteer.get_gazetteer()
+    location = places.lookup(notes)
+    if location:
+        return location, None, 'gazetteer'
+
+    # A known place with more detail: the place is the location and the
+    # detail stays a note ("Bonn-Arzt und Wissenschaftler", "England - super!"),
+    # unless the detail is a place too ("Baskenland – Spanien")
+    leading = places.leading_place(notes)
+    if leading:
+        place, rest = leading
+        if places.lookup(rest):
+            return notes, None, 'place_list'
+        return place, rest, 'leading_place'
+
+    return None, notes, 'not_a_place'
+
+
+def search_google_books(title: str, author: str,
+                        limiter: Optional[TokenBucket] = None,
+                        volume_id: Optional[str] = None,
+                        isbn: Optional[str] = None) -> Optional[Dict]:
+    """
+    Search Google Books API for a book (cached; limiter throttles real requests).
+    A known volume id or ISBN is fetched directly; the title and author
+    query is only used when neither finds the volume.
+    http_client.Throttled is raised, not swallowed, so the book can be retried
+    """
+    query = google_books.build_query(title, author)
 
-    # Check if it looks like a location (single word or two words, no numbers/emojis)
-    # List of known locations from the data
-    known_locations = [
-        'Bergisch Gladbach', 'Sydney', 'England', 'Frankreich', 'Berlin',
-        'Autorenteam', 'Schweden', 'Göteborg', 'Baskenland – Spanien',
-        'Bonn-Arzt und Wissenschaftler', 'Belfast', 'Köln'
-    ]
+    try:
+        data = google_books.search_identifiers(volume_id, isbn, limiter)
+        if data is None:
+            data = google_books.search_volumes(query, limiter)
 
-    for location in known_locations:
-        if notes.lower() == location.lower():
-            return location, None
+        if 'items' in data and len(data['items']) > 0:
+            with enrich_profile.span('extract'):
+                return _extract_volume(data)
 
-    # If notes contain emojis, numbers, or common note phrases, it's not a location
-    if re.search(r'[😐👍]|\d+\.|zum |Esther', notes):
-        return None, notes
+    except http_client.Throttled:
+        raise
+    except requests.RequestException as e:
+        print(f"  ⚠ API error: {e}")
+        return None
 
-    # If it's a single word or two words with no special chars, might be location
-    if re.match(r'^[A-Za-zäöüÄÖÜß\s-]{2,30}$', notes) and len(notes.split()) <= 4:
-        return notes, None
+    return None
 
-    return None, notes
 
+def _extract_volume(data: Dict) -> Dict:
+    """search_google_books result from the first volume of a response"""
+    book_info = data['items'][0]['volumeInfo']
+
+    result = {
+        'google_books_id': data['items'][0]['id'],
+        'description': book_info.get('description'),
+        'publisher': book_info.get('publisher'),
+        'published_date': book_info.get('publishedDate'),
+        'page_count': book_info.get('pageCount'),
+        'categories': book_info.get('categories', []),
+        'language': book_info.get('language'),
+        'isbn': None,
+        'cover_url': None
+    }
 
-def search_google_books(title: str, author: str) -> Optional[Dict]:
-    """Search Google Books API for a book"""
-    query = f"{title} {author}".strip()
-    encoded_query = urllib.parse.quote(query)
+    # Extract ISBN
+    if 'industryIdentifiers' in book_info:
+        for identifier in book_info['industryIdentifiers']:
+            if identifier['type'] in ['ISBN_13', 'ISBN_10']:
+                result['isbn'] = identifier['identifier']
+                break
 
-    url = f"https://www.googleapis.com/books/v1/volumes?q={encoded_query}&maxResults=1"
+    # Extract cover URL
+    if 'imageLinks' in book_info:
+        if 'extraLarge' in book_info['imageLinks']:
+            result['cover_url'] = book_info['imageLinks']['extraLarge']
+        elif 'large' in book_info['imageLinks']:
+            result['cover_url'] = book_info['imageLinks']['large']
+        elif 'medium' in book_info['imageLinks']:
+            result['cover_url'] = book_info['imageLinks']['medium']
+        elif 'thumbnail' in book_info['imageLinks']:
+            result['cover_url'] = book_info['imageLinks']['thumbnail']
 
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        # Convert http to https and upgrade to higher resolution
+        if result['cover_url']:
+            result['cover_url'] = result['cover_url'].replace('http://', 'https://')
+            # Upgrade zoom level to maximum quality - zoom=50 provides ultra-high resolution
+            result['cover_url'] = result['cover_url'].replace('zoom=1', 'zoom=50')
 
-        if 'items' in data and len(data['items']) > 0:
-            book_info = data['items'][0]['volumeInfo']
-
-            result = {
-                'google_books_id': data['items'][0]['id'],
-                'description': book_info.get('description'),
-                'publisher': book_info.get('publisher'),
-                'published_date': book_info.get('publishedDate'),
-                'page_count': book_info.get('pageCount'),
-                'categories': book_info.get('categories', []),
-                'language': book_info.get('language'),
-                'isbn': None,
-                'cover_url': None
-            }
-
-            # Extract ISBN
-            if 'industryIdentifiers' in book_info:
-                for identifier in book_info['industryIdentifiers']:
-                    if identifier['type'] in ['ISBN_13', 'ISBN_10']:
-                        result['isbn'] = identifier['identifier']
-                        break
-
-            # Extract cover URL
-            if 'imageLinks' in book_info:
-                if 'extraLarge' in book_info['imageLinks']:
-                    result['cover_url'] = book_info['imageLinks']['extraLarge']
-                elif 'large' in book_info['imageLinks']:
-                    result['cover_url'] = book_info['imageLinks']['large']
-                elif 'medium' in book_info['imageLinks']:
-                    result['cover_url'] = book_info['imageLinks']['medium']
-                elif 'thumbnail' in book_info['imageLinks']:
-                    result['cover_url'] = book_info['imageLinks']['thumbnail']
-
-                # Convert http to https and upgrade to higher resolution
-                if result['cover_url']:
-                    result['cover_url'] = result['cover_url'].replace('http://', 'https://')
-                    # Upgrade zoom level to maximum quality - zoom=50 provides ultra-high resolution
-                    result['cover_url'] = result['cover_url'].replace('zoom=1', 'zoom=50')
-
-            return result
+    return result
 
-    except requests.RequestException as e:
-        print(f"  ⚠ API error: {e}")
-        return None
 
-    return None
+def _normalize(text) -> str:
+    """Case-folded, NFKC, whitespace-collapsed text for key building"""
+    return ' '.join(unicodedata.normalize('NFKC', str(text or '')).casefold().split())
+
+
+def book_key(book: Dict) -> str:
+    """Stable identity of a processed book: normalized author, title, volume and date"""
+    return '\x1f'.join([_normalize(book['author']), _normalize(book['title']),
+                        str(book.get('series_volume') or ''),
+                        str(book.get('year') or ''), str(book.get('month') or '')])
+
+
+def load_database_index(filepath: Path) -> Dict[str, Dict]:
+    """Hash index of an existing books_database.json by book_key"""
+    if not filepath.exists():
+        return {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return {book_key(book): book for book in json.load(f)}
+
+
+def needs_lookup(processed: Dict) -> bool:
+    """True if a book lacks a description or cover and was never matched to a volume"""
+    return ((not processed['description'] or not processed.get('cover_url'))
+            and not processed.get('google_books_id'))
 
 
-def process_book(book_data: Dict, fetch_missing: bool = True) -> Dict:
+@contextmanager
+def _unprofiled() -> Iterator[None]:
+    """Suspend --profile and --stats, for passes that only count books"""
+    profile, stats = enrich_profile.PROFILE, parser_stats.STATS
+    enrich_profile.PROFILE = parser_stats.STATS = None
+    try:
+        yield
+    finally:
+        enrich_profile.PROFILE, parser_stats.STATS = profile, stats
+
+
+def process_book(book_data: Dict, fetch_missing: bool = True,
+                 limiter: Optional[TokenBucket] = None,
+                 database: Optional[Dict[str, Dict]] = None,
+                 provider: Optional[providers.Provider] = None,
+                 refresh: bool = False) -> Dict:
     """
-    Process a single book entry from preparsed data
+    Process a single book entry from preparsed data.
+    API requests are rate limited by limiter, if given. With a database
+    index (see load_database_index), enrichment of the same book from the
+    previous run is reused and the API is only asked about the rest, or,
+    with refresh, about every book (by volume id or ISBN where known).
+    Missing data is looked up with provider instead of search_google_books
+    if one is given
     """
+    if enrich_profile.PROFILE is None:
+        return _process_book(book_data, fetch_missing, limiter, database, provider, refresh)
+
+    with enrich_profile.book(f"{book_data['author']}: {book_data['title']}"):
+        return _process_book(book_data, fetch_missing, limiter, database, provider, refresh)
+
+
+def _process_book(book_data: Dict, fetch_missing: bool, limiter: Optional[TokenBucket],
+                  database: Optional[Dict[str, Dict]],
+                  provider: Optional[providers.Provider], refresh: bool) -> Dict:
+    """process_book without the profiling"""
     # Start with basic fields
     processed = {
         'author': book_data['author'],
@@ -233,23 +354,38 @@ def process_book(book_data: Dict, fetch_missing: bool = True) -> Dict:
     processed['isbn'] = None
     processed['cover_url'] = None
 
+    # Reuse what the previous run found for this book
+    if database:
+        with enrich_profile.span('merge'):
+            existing = database.get(book_key(processed))
+            if existing:
+                for key in ENRICHMENT_FIELDS:
+                    if not processed[key] and existing.get(key):
+                        processed[key] = existing[key]
+
     # Fetch from Google Books API if description or cover is missing
-    if fetch_missing and (not processed['description'] or not processed.get('cover_url')):
-        google_data = search_google_books(processed['title'], processed['author'])
+    if fetch_missing and (refresh or needs_lookup(processed)):
+        volume_id, isbn = processed['google_books_id'], processed['isbn']
+        if provider is not None:
+            google_data = provider.lookup(processed['title'], processed['author'], volume_id, isbn)
+        else:
+            google_data = search_google_books(processed['title'], processed['author'], limiter,
+                                              volume_id, isbn)
 
         if google_data:
-            # Only use Google data for fields that are empty
-            if not processed['description'] and google_data['description']:
-                processed['description'] = google_data['description']
+            with enrich_profile.span('merge'):
+                # Only use Google data for fields that are empty
+                if not processed['description'] and google_data['description']:
+                    processed['description'] = google_data['description']
 
-            if google_data['cover_url']:
-                processed['cover_url'] = google_data['cover_url']
+                if google_data['cover_url']:
+                    processed['cover_url'] = google_data['cover_url']
 
-            # Always add metadata if available
-            for key in ['google_books_id', 'publisher', 'published_date',
-                       'page_count', 'categories', 'language', 'isbn']:
-                if google_data.get(key):
-                    processed[key] = google_data[key]
+                # Always add metadata if available
+                for key in ['google_books_id', 'publisher', 'published_date',
+                           'page_count', 'categories', 'language', 'isbn']:
+                    if google_data.get(key):
+                        processed[key] = google_data[key]
 
     return processed
 
@@ -273,7 +409,111 @@ def load_preparsed_files() -> List[Dict]:
     return all_books
 
 
-def main(mode: str = None):
+def _show_book(pbar: tqdm, book_data: Dict) -> None:
+    """Update the progress bar description with a book"""
+    author = book_data['author'][:20]  # Truncate if too long
+    title = book_data['title'][:30]
+    pbar.set_description(f"📚 {author}: {title}")
+
+
+def process_books(books: List[Dict], fetch_missing: bool,
+                  rps: float = DEFAULT_RPS, concurrency: int = DEFAULT_CONCURRENCY,
+                  journal: Optional[CheckpointJournal] = None, resume: bool = False,
+                  database: Optional[Dict[str, Dict]] = None,
+                  max_rps: float = DEFAULT_MAX_RPS,
+                  secondary: Optional[providers.Provider] = None,
+                  refresh: bool = False) -> List[Dict]:
+    """
+    Process books and return them in input order.
+    With fetch_missing, up to `concurrency` books are looked up at once (the
+    next is started as one finishes) while a shared adaptive limiter paces
+    the API calls, starting at `rps` requests per second and adjusting
+    between a halved rate and `max_rps`. Books whose request was throttled
+    go to the back of the queue; after MAX_THROTTLED_ATTEMPTS
+    http_client.Throttled is raised. With a secondary provider, Google Books
+    lookups are hedged by it (see providers.HedgedProvider).
+    Finished books are appended to journal; with resume, books already in it
+    are taken from there instead of being fetched again. database and
+    refresh are passed on to process_book
+    """
+    processed_books = [None] * len(books)
+
+    # Use tqdm for beautiful progress bar
+    with tqdm(total=len(books), desc="📚 Processing", unit="book",
+              bar_format='{l_bar}{bar:30}{r_bar}{bar:-10b}',
+              colour='green') as pbar:
+        if not fetch_missing:
+            for index, book_data in enumerate(books):
+                _show_book(pbar, book_data)
+                processed_books[index] = process_book(book_data, fetch_missing=False,
+                                                      database=database)
+                pbar.update()
+            return processed_books
+
+        done = {}
+        if journal is not None:
+            if resume:
+                done = journal.replay(books)
+                for index, record in done.items():
+                    processed_books[index] = record
+                pbar.update(len(done))
+            journal.open(resume)
+
+        limiter = AdaptiveRateLimiter(rps, max(rps, max_rps))
+        provider = None
+        if secondary is not None:
+            provider = providers.HedgedProvider(
+                providers.GoogleBooksProvider(search_google_books, limiter), secondary,
+                workers=2 * concurrency)
+        attempts = {}
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            queue = deque(index for index in range(len(books)) if index not in done)
+            pending = {}
+
+            def fill() -> None:
+                """Keep `concurrency` lookups in flight, so no more are started than can run"""
+                while queue and len(pending) < concurrency:
+                    index = queue.popleft()
+                    future = executor.submit(process_book, books[index], True, limiter,
+                                             database, provider, refresh)
+                    pending[future] = index
+
+            fill()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    try:
+                        processed_books[index] = future.result()
+                    except http_client.Throttled:
+                        attempts[index] = attempts.get(index, 0) + 1
+                        if attempts[index] >= MAX_THROTTLED_ATTEMPTS:
+                            raise
+                        queue.append(index)
+                        continue
+                    if journal is not None:
+                        journal.record(index, books[index], processed_books[index])
+                    _show_book(pbar, books[index])
+                    pbar.set_postfix_str(f"{limiter.rate:.1f} req/s", refresh=False)
+                    pbar.update()
+                fill()
+        finally:
+            # Drop the lookups not started yet, so an interrupt or error stops
+            # after the ones in flight instead of fetching every remaining book
+            executor.shutdown(wait=False, cancel_futures=True)
+            if journal is not None:
+                journal.close()
+            if provider is not None:
+                provider.close()
+                pbar.write(f"🔀 Lookups: {provider.summary()}")
+
+    return processed_books
+
+
+def main(mode: str = None, rps: float = DEFAULT_RPS, concurrency: int = DEFAULT_CONCURRENCY,
+         resume: bool = False, incremental: bool = False, max_rps: float = DEFAULT_MAX_RPS,
+         open_library_rps: Optional[float] = None, refresh: bool = False):
     """Main function"""
     print("="*60)
     print("📚 Book Library Parser - Preparsed Edition")
@@ -302,9 +542,29 @@ def main(mode: str = None):
     fetch_missing = False
     books_to_process = raw_books
 
+    database = None
+    lookups = len(raw_books)
+    if refresh:
+        database = load_database_index(Path(DATABASE_FILE))
+        known = 0
+        with _unprofiled():
+            for book in raw_books:
+                processed = process_book(book, fetch_missing=False, database=database)
+                known += bool(processed['google_books_id'] or processed['isbn'])
+        print(f"🔄 Refresh: looking up all {lookups} books again, {known} of them "
+              f"directly by volume id or ISBN from {DATABASE_FILE}")
+    elif incremental:
+        database = load_database_index(Path(DATABASE_FILE))
+        with _unprofiled():
+            lookups = sum(1 for book in raw_books
+                          if needs_lookup(process_book(book, fetch_missing=False, database=database)))
+        print(f"♻️  Incremental: reusing {DATABASE_FILE} ({len(database)} books), "
+              f"{lookups} books need the API")
+
     if choice == '2':
         fetch_missing = True
-        print(f"\n🌐 Full enrichment mode - this will take ~{len(raw_books) * 0.5 / 60:.1f} minutes")
+        print(f"\n🌐 Full enrichment mode - this will take up to ~{lookups / rps / 60:.1f} minutes "
+              f"({rps:g}-{max(rps, max_rps):g} requests/s, {concurrency} at a time)")
         confirm = input("Continue? (y/n): ").strip().lower()
         if confirm != 'y':
             print("Aborted.")
@@ -316,30 +576,28 @@ def main(mode: str = None):
     else:
         print(f"\n⚡ Quick parse mode - no API calls")
 
+    journal = CheckpointJournal(Path(JOURNAL_FILE)) if fetch_missing else None
+    if journal is not None and resume:
+        print(f"\n♻️  Resuming from {JOURNAL_FILE}")
+    elif journal is not None and journal.exists():
+        print(f"\n⚠ Discarding the unfinished run in {JOURNAL_FILE} (use --resume to continue it)")
+
     # Process all books
     print("\n" + "="*60)
     print("Processing books...")
     print("="*60 + "\n")
 
-    processed_books = []
-    total = len(books_to_process)
+    secondary = None
+    if open_library_rps:
+        secondary = providers.OpenLibraryProvider(TokenBucket(open_library_rps))
 
-    # Use tqdm for beautiful progress bar
-    with tqdm(books_to_process, desc="📚 Processing", unit="book",
-              bar_format='{l_bar}{bar:30}{r_bar}{bar:-10b}',
-              colour='green') as pbar:
-        for book_data in pbar:
-            # Update progress bar description with current book
-            author = book_data['author'][:20]  # Truncate if too long
-            title = book_data['title'][:30]
-            pbar.set_description(f"📚 {author}: {title}")
-
-            processed = process_book(book_data, fetch_missing=fetch_missing)
-            processed_books.append(processed)
-
-            # Rate limiting for API calls
-            if fetch_missing:
-                time.sleep(0.5)
+    try:
+        processed_books = process_books(books_to_process, fetch_missing, rps, concurrency,
+                                        journal, resume, database, max_rps, secondary, refresh)
+    except http_client.Throttled as e:
+        print(f"\n❌ Still throttled after {MAX_THROTTLED_ATTEMPTS} attempts ({e})")
+        print(f"   Finished books are kept in {JOURNAL_FILE}; rerun later with --resume")
+        return
 
     # Sort by date
     processed_books.sort(key=lambda x: (
@@ -348,10 +606,14 @@ def main(mode: str = None):
     ))
 
     # Save to JSON
-    output_file = 'books_database.json'
+    output_file = DATABASE_FILE
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(processed_books, f, ensure_ascii=False, indent=2)
 
+    # The results are safe now, so the checkpoint is no longer needed
+    if journal is not None:
+        journal.remove()
+
     # Statistics
     print("\n" + "="*60)
     print("✅ Processing complete!")
@@ -368,6 +630,7 @@ def main(mode: str = None):
     covers = sum(1 for b in processed_books if b.get('cover_url'))
     print(f"  Books with descriptions: {descriptions} ({descriptions/len(processed_books)*100:.1f}%)")
     print(f"  Books with covers: {covers} ({covers/len(processed_books)*100:.1f}%)")
+    api_cache.print_cache_summary()
 
     # Top authors
     authors = {}
@@ -384,7 +647,51 @@ def main(mode: str = None):
 
 
 if __name__ == '__main__':
-    import sys
     # Allow running with command line argument: python parse_preparsed.py 1
-    mode = sys.argv[1] if len(sys.argv) > 1 else None
-    main(mode)
+    parser = argparse.ArgumentParser(description='Build books_database.json from the preparsed files')
+    parser.add_argument('mode', nargs='?', choices=['1', '2', '3'],
+                        help='1 = quick parse, 2 = full enrichment, 3 = test mode (asks if omitted)')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS,
+                        help=f'initial Google Books requests per second (default: {DEFAULT_RPS:g})')
+    parser.add_argument('--max-rps', type=float, default=DEFAULT_MAX_RPS,
+                        help='requests per second the rate may ramp up to while the API '
+                             f'does not throttle (default: {DEFAULT_MAX_RPS:g})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'maximum requests in flight (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--open-library', nargs='?', type=float, const=DEFAULT_OPEN_LIBRARY_RPS,
+                        metavar='RPS',
+                        help='ask Open Library too when Google Books is slow or lacks a '
+                             'description or cover, at up to RPS requests per second '
+                             f'(default: {DEFAULT_OPEN_LIBRARY_RPS:g})')
+    parser.add_argument('--resume', action='store_true',
+                        help=f'continue an interrupted enrichment from {JOURNAL_FILE}')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'reuse enrichment from the existing {DATABASE_FILE} and only '
+                             'look up new or incomplete books')
+    parser.add_argument('--refresh', action='store_true',
+                        help=f'look up every book again, by the volume id or ISBN in {DATABASE_FILE} '
+                             'where known (implies --incremental)')
+    parser.add_argument('--timeout', type=float, default=http_client.DEFAULT_TIMEOUT,
+                        help=f'seconds to wait for an API response (default: {http_client.DEFAULT_TIMEOUT})')
+    parser.add_argument('--profile', nargs='?', const='enrich_trace.json', metavar='FILE',
+                        help='time every enrichment stage per book, print p50/p95/p99 per stage '
+                             'and save a Chrome trace (default: enrich_trace.json)')
+    parser.add_argument('--stats', nargs='?', const='parser_stats.json', metavar='FILE',
+                        help='count and time every parser rule, print a report and save it '
+                             'as JSON (default: parser_stats.json)')
+    args = parser.parse_args()
+    if args.rps <= 0:
+        parser.error('--rps must be positive')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+
+    http_client.configure(timeout=args.timeout, connections_per_host=args.concurrency)
+
+    if args.stats:
+        parser_stats.enable()
+    if args.profile:
+        enrich_profile.enable()
+    main(args.mode, args.rps, args.concurrency, args.resume, args.incremental, args.max_rps,
+         args.open_library, args.refresh)
+    parser_stats.finish(args.stats)
+    enrich_profile.finish(args.profile)
@@ -0,0 +1,113 @@
+"""
+Opt-in hit counters and timings for the parser rules
+
+Parsers check the module-level STATS and only record anything when it is
+set, so the normal path costs one global lookup. Enable with enable(),
+then print report() or save to_dict() as JSON at the end of a run.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class RuleStats:
+    """Evaluations, hits and cumulative nanoseconds of one rule"""
+
+    __slots__ = ('evals', 'hits', 'ns')
+
+    def __init__(self):
+        self.evals = 0
+        self.hits = 0
+        self.ns = 0
+
+
+class ParserStats:
+    """Per-category rule counters, e.g. category 'skip', rule 'als'"""
+
+    def __init__(self):
+        self.categories: Dict[str, Dict[str, RuleStats]] = {}
+
+    def rule(self, category: str, name: str) -> RuleStats:
+        """Return the counters of a rule, creating them on first use"""
+        rules = self.categories.setdefault(category, {})
+        stats = rules.get(name)
+        if stats is None:
+            stats = rules[name] = RuleStats()
+        return stats
+
+    def record(self, category: str, name: str, hit: bool = True, ns: int = 0) -> None:
+        """Record one evaluation of a rule"""
+        stats = self.rule(category, name)
+        stats.evals += 1
+        stats.ns += ns
+        if hit:
+            stats.hits += 1
+
+    def merge(self, data: Dict) -> None:
+        """Add counters from another run's to_dict() output"""
+        for category, rules in data.items():
+            for name, values in rules.items():
+                stats = self.rule(category, name)
+                stats.evals += values['evals']
+                stats.hits += values['hits']
+                stats.ns += values['ns']
+
+    def to_dict(self) -> Dict:
+        """Counters as plain JSON-serializable dicts"""
+        return {
+            category: {
+                name: {'evals': stats.evals, 'hits': stats.hits, 'ns': stats.ns}
+                for name, stats in rules.items()
+            }
+            for category, rules in self.categories.items()
+        }
+
+    def report(self) -> str:
+        """Human-readable table, rules sorted by hits within each category"""
+        lines = []
+        for category, rules in self.categories.items():
+            lines.append(f"\n{category}:")
+            lines.append(f"  {'rule':24} {'hits':>9} {'evals':>9} {'total ms':>10} {'ns/eval':>9}")
+            for name, stats in sorted(rules.items(), key=lambda x: x[1].hits, reverse=True):
+                per_eval = stats.ns / stats.evals if stats.evals else 0
+                lines.append(f"  {name:24} {stats.hits:9} {stats.evals:9} "
+                             f"{stats.ns / 1e6:10.2f} {per_eval:9.0f}")
+        return '\n'.join(lines)
+
+    def write_json(self, path: Path) -> None:
+        """Save the counters to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# The active collector, or None when instrumentation is off
+STATS: Optional[ParserStats] = None
+
+
+def enable() -> ParserStats:
+    """Start collecting parser statistics"""
+    global STATS
+    STATS = ParserStats()
+    return STATS
+
+
+def disable() -> None:
+    """Stop collecting parser statistics"""
+    global STATS
+    STATS = None
+
+
+def finish(stats_file: Optional[str]) -> None:
+    """Print the report and save it as JSON, if instrumentation is on"""
+    if STATS is None:
+        return
+
+    print("\n" + "=" * 60)
+    print("🔬 Parser rule statistics")
+    print("=" * 60)
+    print(STATS.report())
+
+    if stats_file:
+        STATS.write_json(Path(stats_file))
+        print(f"\n📁 Saved statistics to {stats_file}")
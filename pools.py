@@ -0,0 +1,37 @@
+"""
+Bounded submission to an executor
+
+Submitting a whole work list at once means an interrupt or error has to
+wait for (or explicitly cancel) every queued item. map_bounded() submits
+lazily, so at most `limit` calls are queued or running at a time, and
+nothing new starts once the caller stops iterating. Callers shut the
+executor down with cancel_futures=True in a finally block:
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for url, future in map_bounded(executor, download, urls, concurrency):
+            ...
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+
+def map_bounded(executor: Executor, fn: Callable[[Any], Any], items: Iterable,
+                limit: int) -> Iterator[Tuple[Any, Future]]:
+    """Yield (item, finished future of fn(item)) in completion order, with at most limit in flight"""
+    remaining = iter(items)
+    pending: Dict[Future, Any] = {}
+    while True:
+        while len(pending) < limit:
+            item = next(remaining, remaining)
+            if item is remaining:
+                break
+            pending[executor.submit(fn, item)] = item
+        if not pending:
+            return
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            yield pending.pop(future), future
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Pick the smallest cover zoom level that is still wide enough, by reading headers only
+
+Google Books serves each cover at several zoom levels (…&zoom=N) and Open
+Library at three sizes (…-S.jpg, -M.jpg, -L.jpg), but which dimensions a
+level gives differs from book to book, and the larger ones can be many
+times the bytes for no visible gain. For every candidate URL of every
+book, a Range request reads only the first few KB and the JPEG or PNG
+header in them gives the dimensions (Content-Range gives the file size).
+All candidates are probed concurrently by a bounded pool of threads. Each
+book's cover_url is then set to its narrowest candidate at least
+--target-width pixels wide (the widest, if none is), with cover_width and
+cover_height. Probes are cached in covers/probes.json, so re-runs, and
+runs with another target, only probe new URLs.
+
+Usage: python3 probe_covers.py [--target-width 640] [--concurrency 16] [--rps 20]
+"""
+
+import argparse
+import functools
+import json
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from tqdm import tqdm
+
+import http_client
+from mirror_covers import COVERS_DIR, DATABASE_FILE, load_manifest, save_manifest
+from pools import map_bounded
+from rate_limit import TokenBucket
+
+PROBES_FILE = Path(COVERS_DIR) / 'probes.json'
+
+# The widest size resize_covers.py builds (320 px cards on 2x screens)
+DEFAULT_TARGET_WIDTH = 640
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RPS = 20.0
+
+# Zoom levels and Open Library sizes tried for every cover
+GOOGLE_ZOOMS = ('1', '2', '3', '4', '5', '6', '50')
+OPEN_LIBRARY_SIZES = ('S', 'M', 'L')
+
+# Bytes asked for first; a JPEG whose frame header comes later (after a
+# large EXIF or ICC block) is asked again for up to MAX_PROBE_BYTES
+PROBE_BYTES = 4 * 1024
+MAX_PROBE_BYTES = 64 * 1024
+
+GOOGLE_ZOOM_RE = re.compile(r'([?&]zoom=)\d+')
+OPEN_LIBRARY_RE = re.compile(r'(/b/\w+/[^/?]+-)[SML](\.jpg)')
+
+# JPEG start-of-frame markers (the ones holding the dimensions)
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def candidate_urls(url: str) -> List[str]:
+    """Every size of the cover at url (just url if its size cannot be chosen)"""
+    if GOOGLE_ZOOM_RE.search(url):
+        return [GOOGLE_ZOOM_RE.sub(rf'\g<1>{zoom}', url, count=1) for zoom in GOOGLE_ZOOMS]
+    if OPEN_LIBRARY_RE.search(url):
+        return [OPEN_LIBRARY_RE.sub(rf'\g<1>{size}\g<2>', url, count=1) for size in OPEN_LIBRARY_SIZES]
+    return [url]
+
+
+def image_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the first bytes of a JPEG or PNG, or None if not (yet) found"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(head) >= 24 and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        return None
+    if not head.startswith(b'\xff\xd8'):
+        return None
+    i = 2
+    while i + 4 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+        elif marker in SOF_MARKERS:
+            if i + 9 > len(head):
+                return None
+            height, width = struct.unpack('>HH', head[i + 5:i + 9])
+            return width, height
+        else:
+            i += 2 + struct.unpack('>H', head[i + 2:i + 4])[0]
+    return None
+
+
+def total_size(response: requests.Response) -> Optional[int]:
+    """Size of the whole file, from Content-Range (206) or Content-Length (200)"""
+    if response.status_code == 206:
+        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def probe(url: str, limiter: Optional[TokenBucket] = None) -> Dict[str, Optional[int]]:
+    """
+    {'width', 'height', 'bytes'} of the image at url, read from its first
+    bytes. Raises requests.RequestException on network and HTTP errors,
+    ValueError if no JPEG or PNG dimensions are found
+    """
+    wanted = PROBE_BYTES
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        with http_client.get(url, headers={'Range': f"bytes=0-{wanted - 1}"}, stream=True) as response:
+            response.raise_for_status()
+            # A server ignoring Range sends everything; stop reading once the header is in
+            limit = wanted if response.status_code == 206 else MAX_PROBE_BYTES
+            size = total_size(response)
+            head, dimensions = b'', None
+            for chunk in response.iter_content(1024):
+                head += chunk
+                dimensions = image_size(head)
+                if dimensions or len(head) >= limit:
+                    break
+        if dimensions:
+            return {'width': dimensions[0], 'height': dimensions[1], 'bytes': size}
+        if len(head) < limit or limit >= MAX_PROBE_BYTES:
+            raise ValueError(f"no JPEG/PNG dimensions in the first {len(head)} bytes")
+        wanted = MAX_PROBE_BYTES
+
+
+def choose(probes: List[Tuple[str, Dict]], target_width: int) -> Tuple[str, Dict]:
+    """
+    The narrowest (url, probe) at least target_width wide, else the widest;
+    of equal widths the fewest bytes
+    """
+    def cost(item: Tuple[str, Dict]) -> Tuple[int, float]:
+        return item[1]['width'], item[1]['bytes'] if item[1]['bytes'] is not None else float('inf')
+
+    wide_enough = [item for item in probes if item[1]['width'] >= target_width]
+    if wide_enough:
+        return min(wide_enough, key=cost)
+    widest = max(item[1]['width'] for item in probes)
+    return min((item for item in probes if item[1]['width'] == widest), key=cost)
+
+
+def probe_covers(books: List[Dict], target_width: int = DEFAULT_TARGET_WIDTH,
+                 concurrency: int = DEFAULT_CONCURRENCY, limiter: Optional[TokenBucket] = None,
+                 probes_file: Path = PROBES_FILE) -> Dict[str, int]:
+    """
+    Probe the candidate URLs of every book's cover_url and set its
+    cover_url, cover_width and cover_height to the chosen candidate. Books
+    none of whose candidates could be probed keep their cover_url, without
+    dimensions. Returns counts of probed, cached and failed URLs and of
+    changed and unresolved covers, with the bytes of the covers before and
+    after
+    """
+    probes = load_manifest(probes_file)
+    candidates = {book['cover_url']: candidate_urls(book['cover_url'])
+                  for book in books if book.get('cover_url')}
+    urls = sorted({url for group in candidates.values() for url in group})
+    missing = [url for url in urls if url not in probes]
+    counts = {'probed': 0, 'cached': len(urls) - len(missing), 'failed': 0,
+              'changed': 0, 'unresolved': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    if missing:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            with tqdm(total=len(missing), desc='Probing covers', unit='url') as pbar:
+                for url, future in map_bounded(executor, functools.partial(probe, limiter=limiter),
+                                               missing, concurrency):
+                    try:
+                        probes[url] = future.result()
+                        counts['probed'] += 1
+                    except (requests.RequestException, ValueError) as e:
+                        pbar.write(f"  ✗ {url}: {e}")
+                        counts['failed'] += 1
+                    pbar.update(1)
+        finally:
+            # Probes not started yet are dropped, so an interrupt stops promptly
+            executor.shutdown(wait=False, cancel_futures=True)
+            save_manifest(probes_file, probes)
+
+    for book in books:
+        url = book.get('cover_url')
+        if not url:
+            continue
+        known = [(candidate, probes[candidate]) for candidate in candidates[url] if candidate in probes]
+        if not known:
+            book['cover_width'] = book['cover_height'] = None
+            counts['unresolved'] += 1
+            continue
+        chosen, found = choose(known, target_width)
+        if url in probes and chosen != url:
+            counts['bytes_before'] += probes[url]['bytes'] or 0
+            counts['bytes_after'] += found['bytes'] or 0
+        counts['changed'] += chosen != url
+        book['cover_url'] = chosen
+        book['cover_width'] = found['width']
+        book['cover_height'] = found['height']
+    return counts
+
+
+def main(target_width: int = DEFAULT_TARGET_WIDTH, concurrency: int = DEFAULT_CONCURRENCY,
+         rps: float = DEFAULT_RPS):
+    """Main function"""
+    db_file = Path(DATABASE_FILE)
+    if not db_file.exists():
+        print(f"Error: {DATABASE_FILE} not found!")
+        print("Please run parse_preparsed.py first.")
+        return
+
+    with open(db_file, 'r', encoding='utf-8') as f:
+        books = json.load(f)
+
+    http_client.configure(connections_per_host=concurrency)
+    limiter = TokenBucket(rps, burst=concurrency) if rps > 0 else None
+    counts = probe_covers(books, target_width, concurrency, limiter)
+
+    with open(db_file, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False, indent=2)
+
+    covers = [book for book in books if book.get('cover_width')]
+    print(f"\n✅ {counts['probed']} URLs probed, {counts['cached']} cached, {counts['failed']} failed")
+    print(f"🖼️  {len(covers)} covers measured, {counts['changed']} moved to another size, "
+          f"{counts['unresolved']} could not be probed")
+    if covers:
+        narrow = sum(1 for book in covers if book['cover_width'] < target_width)
+        print(f"📐 {len(covers) - narrow} at least {target_width} px wide, "
+              f"{narrow} narrower (no larger size available)")
+    if counts['bytes_before']:
+        print(f"📦 Changed covers: {counts['bytes_before'] / 1e6:.1f} MB before, "
+              f"{counts['bytes_after'] / 1e6:.1f} MB now")
+    print(f"📝 cover_url, cover_width and cover_height written to {DATABASE_FILE}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Choose the smallest adequate cover size by probing headers')
+    parser.add_argument('--target-width', type=int, default=DEFAULT_TARGET_WIDTH,
+                        help=f'smallest cover width wanted in pixels (default: {DEFAULT_TARGET_WIDTH})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'probes at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS,
+                        help=f'probes started per second, 0 = unlimited (default: {DEFAULT_RPS:g})')
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    main(args.target_width, args.concurrency, args.rps)
@@ -0,0 +1,208 @@
+"""
+Metadata providers and hedged lookups across them
+
+A provider answers lookup(title, author, volume_id, isbn) with a dict
+shaped like search_google_books' result, or None; the identifiers, when
+known, let it fetch the book directly. HedgedProvider asks a primary
+provider first and, when it has not answered within a deadline derived
+from its recent p90 latency (or answered without a description or cover),
+asks the secondary too. The first complete answer wins; if neither is
+complete, the primary's answer is filled in from the secondary's, unless
+the primary was throttled: then http_client.Throttled is raised, so the
+book is retried instead of being saved with the secondary's partial answer.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+import requests
+
+import enrich_profile
+import google_books
+import http_client
+import open_library
+from rate_limit import TokenBucket
+
+# Latency samples kept for the hedging deadline, and the deadline used
+# until enough of them have been collected (seconds)
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+DEFAULT_DEADLINE = 1.0
+MIN_DEADLINE = 0.05
+
+
+def is_complete(result: Optional[Dict]) -> bool:
+    """True if a lookup result has both a description and a cover"""
+    return bool(result and result.get('description') and result.get('cover_url'))
+
+
+def merge_results(primary: Optional[Dict], secondary: Optional[Dict]) -> Optional[Dict]:
+    """primary with its empty fields taken from secondary"""
+    if not primary or not secondary:
+        return primary or secondary
+    merged = dict(primary)
+    for key, value in secondary.items():
+        if not merged.get(key) and value:
+            merged[key] = value
+    return merged
+
+
+class Provider(ABC):
+    """A metadata source; subclasses implement lookup"""
+
+    name = 'provider'
+
+    @abstractmethod
+    def lookup(self, title: str, author: str, volume_id: Optional[str] = None,
+               isbn: Optional[str] = None) -> Optional[Dict]:
+        """Metadata of a book, or None; may raise http_client.Throttled"""
+
+    def is_cached(self, title: str, author: str, volume_id: Optional[str] = None,
+                  isbn: Optional[str] = None) -> bool:
+        """True if lookup would be answered without a request"""
+        return False
+
+
+class GoogleBooksProvider(Provider):
+    """Google Books through a script's search_google_books(title, author, limiter, volume_id, isbn)"""
+
+    name = 'google_books'
+
+    def __init__(self, search: Callable[..., Optional[Dict]], limiter: Optional[TokenBucket] = None):
+        self.search = search
+        self.limiter = limiter
+
+    def lookup(self, title: str, author: str, volume_id: Optional[str] = None,
+               isbn: Optional[str] = None) -> Optional[Dict]:
+        return self.search(title, author, self.limiter, volume_id, isbn)
+
+    def is_cached(self, title: str, author: str, volume_id: Optional[str] = None,
+                  isbn: Optional[str] = None) -> bool:
+        if volume_id or isbn:
+            return google_books.identifier_cached(volume_id, isbn)
+        return google_books.is_cached(google_books.build_query(title, author))
+
+
+class OpenLibraryProvider(Provider):
+    """Open Library search plus the matching work's description; identifiers are not used"""
+
+    name = 'open_library'
+
+    def __init__(self, limiter: Optional[TokenBucket] = None):
+        self.limiter = limiter
+
+    def lookup(self, title: str, author: str, volume_id: Optional[str] = None,
+               isbn: Optional[str] = None) -> Optional[Dict]:
+        try:
+            return open_library.search_book(google_books.build_query(title, author), self.limiter)
+        except http_client.Throttled:
+            raise
+        except requests.RequestException as e:
+            print(f"  ⚠ Open Library error: {e}")
+            return None
+
+    def is_cached(self, title: str, author: str, volume_id: Optional[str] = None,
+                  isbn: Optional[str] = None) -> bool:
+        return open_library.is_cached(google_books.build_query(title, author))
+
+
+class LatencyTracker:
+    """Sliding window of request latencies giving a percentile-based deadline"""
+
+    def __init__(self, percentile: float = 90, window: int = LATENCY_WINDOW,
+                 default: float = DEFAULT_DEADLINE):
+        self.percentile = percentile
+        self.default = default
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def deadline(self) -> float:
+        """Seconds to wait before hedging"""
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return self.default
+            ordered = sorted(self.samples)
+        rank = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(MIN_DEADLINE, ordered[rank])
+
+
+class HedgedProvider(Provider):
+    """
+    Primary provider hedged by a secondary one. Lookups run on an own pool
+    of `workers` threads, so callers can be worker threads themselves
+    """
+
+    name = 'hedged'
+
+    def __init__(self, primary: Provider, secondary: Provider, workers: int = 8,
+                 percentile: float = 90):
+        self.primary = primary
+        self.secondary = secondary
+        self.latency = LatencyTracker(percentile)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hedge')
+        self.lock = threading.Lock()
+        self.counts = {'primary': 0, 'secondary': 0, 'merged': 0, 'none': 0,
+                       'hedged': 0, 'fallback': 0}
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+
+    def _submit_primary(self, title: str, author: str, volume_id: Optional[str],
+                        isbn: Optional[str]) -> Future:
+        """Start the primary lookup; its latency is sampled unless it is cached"""
+        cached = self.primary.is_cached(title, author, volume_id, isbn)
+        start = time.monotonic()
+        future = self.executor.submit(enrich_profile.in_current_book(self.primary.lookup),
+                                      title, author, volume_id, isbn)
+        if not cached:
+            future.add_done_callback(lambda f: self.latency.add(time.monotonic() - start))
+        return future
+
+    def lookup(self, title: str, author: str, volume_id: Optional[str] = None,
+               isbn: Optional[str] = None) -> Optional[Dict]:
+        primary = self._submit_primary(title, author, volume_id, isbn)
+        done, _ = wait([primary], timeout=self.latency.deadline())
+        if primary in done and primary.exception() is None and is_complete(primary.result()):
+            self._count('primary')
+            return primary.result()
+        self._count('fallback' if primary in done else 'hedged')
+
+        secondary = self.executor.submit(enrich_profile.in_current_book(self.secondary.lookup),
+                                         title, author, volume_id, isbn)
+        pending = {primary, secondary} - done
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.exception() is None and is_complete(future.result()):
+                    self._count('primary' if future is primary else 'secondary')
+                    return future.result()
+
+        # A throttled primary is retried by the caller rather than settling for a partial answer
+        if isinstance(primary.exception(), http_client.Throttled):
+            raise primary.exception()
+        results = [f.result() if f.exception() is None else None for f in (primary, secondary)]
+        merged = merge_results(*results)
+        if merged is None and primary.exception() is not None:
+            self._count('none')
+            raise primary.exception()
+        self._count('merged' if merged else 'none')
+        return merged
+
+    def summary(self) -> str:
+        """One line with the answers by source"""
+        c = self.counts
+        return (f"{c['primary']} {self.primary.name}, {c['secondary']} {self.secondary.name}, "
+                f"{c['merged']} merged, {c['none']} not found; {c['hedged']} hedged after "
+                f"{self.latency.deadline() * 1000:.0f} ms, {c['fallback']} fallbacks")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
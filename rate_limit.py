@@ -0,0 +1,107 @@
+"""
+Rate limiting for the Google Books API calls
+
+A TokenBucket is shared by all worker threads: every request takes one
+token, tokens refill at a fixed rate and up to `burst` of them can be saved
+up. Wall-clock time of an enrichment run is then bounded by the quota
+instead of by a fixed sleep after every book.
+
+An AdaptiveRateLimiter finds the rate the API tolerates by itself (AIMD):
+successes raise the rate linearly over time, each 429/503 halves it, and a
+Retry-After pauses every thread until the server is ready again.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available and take it; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate grows by about `increase` requests per second
+    every second without throttling, up to max_rate, and halves (down to
+    min_rate) when the API throttles
+    """
+
+    def __init__(self, rate: float, max_rate: float, min_rate: float = 0.1,
+                 increase: float = 0.5, burst: int = 1):
+        super().__init__(min(rate, max_rate), burst)
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, self.rate)
+        self.increase = increase
+        self.paused_until = 0.0
+        self.decreased_at = 0.0
+        self.throttles = 0
+
+    def acquire(self) -> float:
+        """Block until a token is available and any pause is over; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                else:
+                    delay = self.paused_until - now
+            time.sleep(delay)
+            waited += delay
+
+    def succeeded(self) -> None:
+        """Additive increase after a request that was not throttled"""
+        with self.lock:
+            self._refill(time.monotonic())
+            # About `rate` requests succeed per second, together adding `increase`
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def throttled(self, sent_at: float, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease after a 429/503 to a request sent at sent_at
+        (time.monotonic()). Requests sent before the last decrease don't halve
+        the rate again, so one burst of rejections counts once
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.throttles += 1
+            self._refill(now)
+            if sent_at >= self.decreased_at:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.decreased_at = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+                self.tokens = 0.0
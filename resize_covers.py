@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build resized AVIF, WebP and JPEG versions of the mirrored covers
+
+Every local_cover of books_database.json (see mirror_covers.py) is scaled
+to 160, 320 and 640 px wide (never enlarged) by a pool of processes and
+saved as covers/sized/<aa>/<sha256>-<width>.<avif|webp|jpg>. Each book gets
+cover_sizes, the files by format with their dimensions, from which
+index.html builds srcset lists, so a 320 px card loads an image of a few
+KB instead of the original. Work is keyed by the SHA-256 of the original:
+covers/sized/manifest.json remembers what was built with which settings,
+and re-runs only process new covers. AVIF is left out if the installed
+Pillow cannot write it.
+
+Usage: python3 resize_covers.py [--workers N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+from tqdm import tqdm
+
+from mirror_covers import COVERS_DIR, DATABASE_FILE, load_manifest, save_manifest
+
+SIZED_DIR = Path(COVERS_DIR) / 'sized'
+
+# Widths built for every cover; the carousel cards are 320 px wide and the
+# detail view 200 px, and 640 covers both on 2x screens
+WIDTHS = (160, 320, 640)
+
+# Formats in order of preference, with their extension and encoder options
+FORMATS = {
+    'avif': ('avif', 'AVIF', {'quality': 55, 'speed': 6}),
+    'webp': ('webp', 'WEBP', {'quality': 78, 'method': 5}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def available_formats() -> List[str]:
+    """The formats of FORMATS that this Pillow can write"""
+    return [name for name in FORMATS if name != 'avif' or features.check('avif')]
+
+
+def settings_key(formats: List[str]) -> str:
+    """Identity of the build settings; a change rebuilds every cover"""
+    return json.dumps([WIDTHS, [(name, FORMATS[name]) for name in formats]], sort_keys=True)
+
+
+def source_hash(path: Path) -> str:
+    """SHA-256 of a cover: the stem of files mirror_covers.py stored, else hashed"""
+    if len(path.stem) == 64 and all(c in '0123456789abcdef' for c in path.stem):
+        return path.stem
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_sizes(source: str, sha: str, out_dir: str, formats: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Resize one cover to every width in every format (runs in a worker process).
+    Returns {format: [{'src', 'width', 'height', 'bytes'}, ...]} by ascending width
+    """
+    out = Path(out_dir) / sha[:2]
+    out.mkdir(parents=True, exist_ok=True)
+    sizes: Dict[str, List[Dict]] = {name: [] for name in formats}
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    for width in sorted({min(width, image.width) for width in WIDTHS}):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for name in formats:
+            extension, pil_format, options = FORMATS[name]
+            target = out / f"{sha}-{width}.{extension}"
+            tmp_path = target.with_name(target.name + '.tmp')
+            resized.save(tmp_path, pil_format, **options)
+            os.replace(tmp_path, target)
+            sizes[name].append({'src': target.as_posix(), 'width': width, 'height': height,
+                                'bytes': target.stat().st_size})
+    return sizes
+
+
+def is_built(entry: Optional[Dict], key: str) -> bool:
+    """True if a manifest entry was built with the current settings and its files exist"""
+    return bool(entry and entry['settings'] == key and all(
+        Path(size['src']).exists() for sizes in entry['sizes'].values() for size in sizes))
+
+
+def record_sizes(sizes: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """cover_sizes value of a book: the sizes without their byte counts"""
+    return {name: [{key: size[key] for key in ('src', 'width', 'height')} for size in entries]
+            for name, entries in sizes.items()}
+
+
+def resize_covers(books: List[Dict], workers: Optional[int] = None,
+                  out_dir: Path = SIZED_DIR) -> Tuple[Dict[str, int], Dict[str, Dict]]:
+    """
+    Build the sizes of every book's local_cover and set its cover_sizes
+    (None without a mirrored cover). Returns counts of built, reused and
+    failed covers and the manifest {sha: {'source', 'settings', 'sizes'}}
+    """
+    formats = available_formats()
+    key = settings_key(formats)
+    manifest_path = out_dir / 'manifest.json'
+    manifest = load_manifest(manifest_path)
+
+    sources: Dict[str, str] = {}
+    for book in books:
+        local = book.get('local_cover')
+        if local and Path(local).exists() and local not in sources:
+            sources[local] = source_hash(Path(local))
+    todo = {sha: local for local, sha in sources.items() if not is_built(manifest.get(sha), key)}
+    counts = {'built': 0, 'reused': len(set(sources.values())) - len(todo), 'failed': 0}
+
+    if todo:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(build_sizes, local, sha, str(out_dir), formats): sha
+                           for sha, local in todo.items()}
+                with tqdm(total=len(futures), desc='Resizing covers', unit='cover') as pbar:
+                    for future in as_completed(futures):
+                        sha = futures[future]
+                        try:
+                            manifest[sha] = {'source': todo[sha], 'settings': key,
+                                             'sizes': future.result()}
+                            counts['built'] += 1
+                        except (OSError, ValueError, Image.DecompressionBombError) as e:
+                            pbar.write(f"  ✗ {todo[sha]}: {e}")
+                            counts['failed'] += 1
+                        pbar.update(1)
+        finally:
+            save_manifest(manifest_path, manifest)
+
+    for book in books:
+        sha = sources.get(book.get('local_cover'))
+        entry = manifest.get(sha) if sha else None
+        book['cover_sizes'] = record_sizes(entry['sizes']) if is_built(entry, key) else None
+    return counts, manifest
+
+
+def main(workers: Optional[int] = None):
+    """Main function"""
+    db_file = Path(DATABASE_FILE)
+    if not db_file.exists():
+        print(f"Error: {DATABASE_FILE} not found!")
+        print("Please run parse_preparsed.py first.")
+        return
+
+    with open(db_file, 'r', encoding='utf-8') as f:
+        books = json.load(f)
+    if not any(book.get('local_cover') for book in books):
+        print("No mirrored covers found. Please run mirror_covers.py first.")
+        return
+
+    formats = available_formats()
+    if 'avif' not in formats:
+        print("⚠ This Pillow cannot write AVIF; building WebP and JPEG only")
+    counts, manifest = resize_covers(books, workers)
+
+    with open(db_file, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False, indent=2)
+
+    # Bytes of the originals against the 320 px versions a card loads
+    in_use = {book['local_cover'] for book in books if book.get('cover_sizes')}
+    used = {sha: entry for sha, entry in manifest.items() if entry['source'] in in_use}
+    original_bytes = sum(Path(entry['source']).stat().st_size for entry in used.values()
+                         if Path(entry['source']).exists())
+    print(f"\n✅ {counts['built']} covers resized, {counts['reused']} up to date, {counts['failed']} failed")
+    print(f"📝 cover_sizes written to {DATABASE_FILE} "
+          f"({sum(1 for b in books if b.get('cover_sizes'))} of {len(books)} books)")
+    if used and original_bytes:
+        print(f"📦 Originals: {original_bytes / 1e6:.1f} MB; at 320 px:")
+        for name in formats:
+            card_bytes = sum(next((s['bytes'] for s in entry['sizes'][name] if s['width'] >= 320),
+                                  entry['sizes'][name][-1]['bytes']) for entry in used.values())
+            print(f"  {name:5} {card_bytes / 1e6:7.2f} MB ({card_bytes / original_bytes:.1%})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build resized AVIF/WebP/JPEG covers for the website')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes to resize with (default: one per CPU)')
+    args = parser.parse_args()
+    main(args.workers)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Quick script to upgrade existing cover URLs to higher quality (zoom=5)
+
+probe_covers.py measures the sizes instead and picks the smallest one
+that is wide enough.
 """
 
 import json